@@ -1,11 +1,23 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Dict
+from functools import partial
+from tempfile import SpooledTemporaryFile
+
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from starlette.background import BackgroundTask
+
+from bulk import NDJSON, BodyError, iter_records, ndjson_line
+from item_repository import DEFAULT_LIMIT, MAX_LIMIT, ItemFilter, iter_all, open_repository
 
 app = FastAPI()
 
-# 用于模拟数据库
-fake_db: Dict[int, dict] = {}
+# 存储层：默认进程内，ITEM_STORE=sqlite:///items.db 换成 SQLite（WAL 模式）
+repo = open_repository()
+
+# 批量接口每攒够这么多条记录，就放到线程池里在一次加锁 / 一个事务里写入
+BULK_CHUNK = 500
+RESULT_SPOOL_BYTES = 1 << 20
 
 # Pydantic 模型用于请求体验证
 class Item(BaseModel):
@@ -13,47 +25,129 @@ class Item(BaseModel):
     price: float
     description: str = ""
 
-# GET 方法：获取所有 item
+# GET 方法：分页获取 item，可按名字、价格区间过滤
+# 返回 next_cursor，带上它请求下一页；为 null 说明已经是最后一页
+# 请求头 Accept: application/x-ndjson 时不分页，一行一个 item 流式返回全部结果
 @app.get("/items")
-def get_items():
-    return fake_db
+def get_items(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: str | None = None,
+    name: str | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    accept: str | None = Header(None),
+):
+    filters = ItemFilter(name=name, min_price=min_price, max_price=max_price)
+    if accept is not None and NDJSON in accept:
+        # 每次产出一整页，线程池只切换一次
+        pages = (b"".join(ndjson_line(item) for item in page) for page in iter_all(repo, filters))
+        return StreamingResponse(pages, media_type=NDJSON)
+    try:
+        items, next_cursor = repo.list(filters, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
 
 # GET 方法：获取指定 item
 @app.get("/items/{item_id}")
 def get_item(item_id: int):
-    if item_id not in fake_db:
+    item = repo.get(item_id)
+    if item is None:
         raise HTTPException(status_code=404, detail="Item not found")
-    return fake_db[item_id]
+    return item
 
 # POST 方法：创建新 item
 @app.post("/items")
 def create_item(item: Item):
-    item_id = len(fake_db) + 1
-    fake_db[item_id] = item.dict()
+    item_id = repo.create(item.model_dump())
     return {"item_id": item_id, "message": "Item created"}
 
+# POST 方法：批量新建 / 更新 / 删除
+# 请求体是 NDJSON（Content-Type: application/x-ndjson）或 JSON 数组，边收边解析、每 BULK_CHUNK 条写一次，
+# 不会整个读进内存。每条记录默认是新建；{"op": "update", "id": 3, ...} 整体更新，{"op": "delete", "id": 3} 删除
+# 响应是 NDJSON：每条记录一行结果（index 是它在请求里的序号），最后一行是汇总
+# 结果先写进临时文件（超过 1 MB 落盘），请求体读完再发回去：大多数客户端要把请求体发完才开始读响应，
+# 边读边回会在 TCP 缓冲区满了以后互相等死
+@app.post("/items/bulk")
+async def bulk_items(request: Request):
+    results = SpooledTemporaryFile(max_size=RESULT_SPOOL_BYTES)
+    counts = {"ok": 0, "failed": 0}
+    records = iter_records(request.stream(), request.headers.get("content-type"))
+    chunk, start, error = [], 0, None
+    try:
+        async for record in records:
+            chunk.append(record)
+            if len(chunk) == BULK_CHUNK:
+                results.write(await run_in_threadpool(apply_bulk, chunk, start, counts))
+                chunk, start = [], start + len(chunk)
+    except BodyError as exc:
+        # 请求体整体坏了：已经解析出来的照常处理，后面的没法再解析
+        error = str(exc)
+    if chunk:
+        results.write(await run_in_threadpool(apply_bulk, chunk, start, counts))
+    if error is not None:
+        results.write(ndjson_line({"error": error}))
+    results.write(ndjson_line({"summary": counts}))
+    results.seek(0)
+    status = 400 if error is not None and not counts["ok"] + counts["failed"] else 200
+    return StreamingResponse(
+        iter(partial(results.read, 1 << 16), b""),
+        status_code=status,
+        media_type=NDJSON,
+        background=BackgroundTask(results.close),
+    )
+
+def apply_bulk(records: list, start: int, counts: dict) -> bytes:
+    with repo.batch():
+        results = [apply_one(index, record) for index, record in enumerate(records, start)]
+    for result in results:
+        counts["ok" if result["ok"] else "failed"] += 1
+    return b"".join(ndjson_line(result) for result in results)
+
+def apply_one(index: int, record) -> dict:
+    if isinstance(record, ValueError):
+        return {"index": index, "ok": False, "error": str(record)}
+    if not isinstance(record, dict):
+        return {"index": index, "ok": False, "error": "Expected a JSON object"}
+    op = record.get("op", "create")
+    try:
+        if op == "create":
+            return {"index": index, "ok": True, "item_id": repo.create(Item.model_validate(record).model_dump())}
+        item_id = record.get("id")
+        # bool 是 int 的子类，true 会被当成 1 去改 / 删 1 号 item
+        if not isinstance(item_id, int) or isinstance(item_id, bool):
+            return {"index": index, "ok": False, "error": "Field 'id' must be an integer"}
+        if op == "update":
+            found = repo.update(item_id, Item.model_validate(record).model_dump())
+        elif op == "delete":
+            found = repo.delete(item_id)
+        else:
+            return {"index": index, "ok": False, "error": f"Unknown op {op!r}"}
+    except ValidationError as exc:
+        errors = exc.errors(include_url=False, include_input=False, include_context=False)
+        return {"index": index, "ok": False, "error": errors}
+    if not found:
+        return {"index": index, "ok": False, "id": item_id, "error": "Item not found"}
+    return {"index": index, "ok": True, "id": item_id}
+
 # PUT 方法：整体更新 item
 @app.put("/items/{item_id}")
 def update_item(item_id: int, item: Item):
-    if item_id not in fake_db:
+    if not repo.update(item_id, item.model_dump()):
         raise HTTPException(status_code=404, detail="Item not found")
-    fake_db[item_id] = item.dict()
     return {"message": "Item updated"}
 
 # PATCH 方法：局部更新 item
 @app.patch("/items/{item_id}")
 def patch_item(item_id: int, item: Item):
-    if item_id not in fake_db:
-        raise HTTPException(status_code=404, detail="Item not found")
     # 只更新非空字段
-    for key, value in item.dict(exclude_unset=True).items():
-        fake_db[item_id][key] = value
+    if not repo.patch(item_id, item.model_dump(exclude_unset=True)):
+        raise HTTPException(status_code=404, detail="Item not found")
     return {"message": "Item patched"}
 
 # DELETE 方法：删除 item
 @app.delete("/items/{item_id}")
 def delete_item(item_id: int):
-    if item_id not in fake_db:
+    if not repo.delete(item_id):
         raise HTTPException(status_code=404, detail="Item not found")
-    del fake_db[item_id]
     return {"message": "Item deleted"}
@@ -0,0 +1,128 @@
+"""批量接口用到的流式解析：请求体边收边拆成一条条记录，不把整个请求体读进内存。
+
+支持两种格式（按 Content-Type 区分）：
+
+- ``application/x-ndjson``：一行一个 JSON，坏掉的行只影响这一条
+- ``application/json``：一个 JSON 数组，用 ``raw_decode`` 从缓冲区里逐个解出元素；
+  数组本身坏了（缺括号、缺逗号、多余的逗号或字符）就没法继续往下找下一个元素，报错并停止
+
+单条记录超过 ``MAX_RECORD_BYTES`` 直接报错，免得一条没有换行的大数据把内存撑满。
+"""
+from __future__ import annotations
+
+import codecs
+import json
+from typing import Any, AsyncIterator
+
+
+NDJSON = "application/x-ndjson"
+MAX_RECORD_BYTES = 1 << 20
+
+_decoder = json.JSONDecoder()
+# iter_json_array 的状态：等 "["、等第一个元素或 "]"、等逗号后的元素、等 "," 或 "]"、数组已结束
+_START, _FIRST, _VALUE, _COMMA, _DONE = range(5)
+
+
+class BodyError(ValueError):
+    """请求体整体格式错误，后面的记录无法再解析。"""
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """逐行产出解析结果；解析失败的行产出 ``ValueError`` 对象而不是抛出，调用方按条记录错误。"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _loads(line)
+        if len(buffer) > MAX_RECORD_BYTES:
+            raise BodyError(f"record exceeds {MAX_RECORD_BYTES} bytes")
+    if buffer.strip():
+        yield _loads(buffer)
+
+
+def _loads(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as exc:
+        return ValueError(f"invalid JSON: {exc}")
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """逐个产出 JSON 数组的元素。
+
+    按"期待元素 / 期待逗号"的状态校验分隔符：``[{"a":1} {"b":2}]``、``[,,1]``、``[1,]`` 这类数组
+    报 ``BodyError``。请求体结束时还没产出的元素（被截断或不合法）先产出 ``ValueError``（按条记录错误），
+    再报 ``BodyError``，不会被悄悄丢掉。
+    """
+    text, pos, state = "", 0, _START
+    # 多字节 UTF-8 字符可能被切在两个块之间，用增量解码器处理
+    decode = codecs.getincrementaldecoder("utf-8")().decode
+
+    async for chunk in chunks:
+        text = text[pos:] + decode(chunk)
+        pos = 0
+        while True:
+            pos = _skip_ws(text, pos)
+            if pos >= len(text):
+                break
+            char = text[pos]
+            if state == _START:
+                if char != "[":
+                    raise BodyError("expected a JSON array")
+                state, pos = _FIRST, pos + 1
+            elif state == _DONE:
+                raise BodyError("unexpected data after the array")
+            elif state == _COMMA:
+                if char not in ",]":
+                    raise BodyError(f"expected ',' or ']' at {char!r}")
+                state, pos = (_VALUE if char == "," else _DONE), pos + 1
+            elif char == "]" and state == _FIRST:
+                state, pos = _DONE, pos + 1
+            elif char in ",]":
+                raise BodyError(f"expected an array element at {char!r}")
+            else:
+                try:
+                    value, end = _decoder.raw_decode(text, pos)
+                except json.JSONDecodeError:
+                    # 可能只是这个元素还没收全，等下一个块；太长了就当成格式错误
+                    if len(text) - pos > MAX_RECORD_BYTES:
+                        raise BodyError("invalid JSON array element") from None
+                    break
+                if end == len(text) and not isinstance(value, (dict, list, str)):
+                    break  # 数字可能被切断（"12" 后面还有 "3"），等下一个块
+                yield value
+                state, pos = _COMMA, end
+
+    text = text[pos:] + decode(b"", final=True)
+    pos = _skip_ws(text, 0)
+    if state == _DONE and pos == len(text):
+        return
+    if state == _START:
+        raise BodyError("expected a JSON array")
+    if state in (_FIRST, _VALUE) and pos < len(text):
+        # 还压着一个没产出的元素：可能被截断（"[1,2" 里的 2 也许本来是 23），也可能本身不合法，按这一条记下错误
+        try:
+            _decoder.raw_decode(text, pos)
+            yield ValueError("truncated JSON value at the end of the body")
+        except json.JSONDecodeError as exc:
+            yield ValueError(f"invalid JSON: {exc}")
+        raise BodyError("invalid or truncated JSON array element")
+    raise BodyError("unterminated JSON array" if state != _DONE else "unexpected data after the array")
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos] in " \t\r\n":
+        pos += 1
+    return pos
+
+
+def iter_records(chunks: AsyncIterator[bytes], content_type: str | None) -> AsyncIterator[Any]:
+    if content_type is not None and content_type.split(";")[0].strip() == NDJSON:
+        return iter_ndjson(chunks)
+    return iter_json_array(chunks)
+
+
+def ndjson_line(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
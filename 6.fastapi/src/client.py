@@ -1,21 +1,95 @@
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 
+BASE_URL = "http://localhost:8000"
+
 data = {
     "name": "Orange",
     "price": 2.99
 }
 
-print("正在发送请求到服务器，请稍候...")
 
-try:
-    response = requests.post("http://localhost:8000/items", json=data, timeout=5)
-    print("服务器响应：", response.json())
-except requests.exceptions.Timeout:
-    print("请求超时！服务器可能没有响应。")
-except requests.exceptions.ConnectionError:
-    print("连接失败！可能是服务器地址或端口错误，或者未开启服务。")
-except Exception as e:
-    print(f"发生其他错误：{e}")
+def post_one():
+    print("正在发送请求到服务器，请稍候...")
+
+    try:
+        response = requests.post(f"{BASE_URL}/items", json=data, timeout=5)
+        print("服务器响应：", response.json())
+    except requests.exceptions.Timeout:
+        print("请求超时！服务器可能没有响应。")
+    except requests.exceptions.ConnectionError:
+        print("连接失败！可能是服务器地址或端口错误，或者未开启服务。")
+    except Exception as e:
+        print(f"发生其他错误：{e}")
+
+
+def make_items(n):
+    return [{"name": f"fruit-{i % 1000}", "price": round(random.uniform(0.5, 50), 2)} for i in range(n)]
+
+
+# 逐条上传：每个 item 一次 HTTP 往返（复用连接）
+def upload_one_by_one(items):
+    with requests.Session() as session:
+        for item in items:
+            session.post(f"{BASE_URL}/items", json=item, timeout=10).raise_for_status()
+    return len(items), 0
+
+
+# 批量上传：按 batch_size 切成 NDJSON 批次，同时有 parallel 个批次在路上；
+# 请求体用生成器分块发送，响应按行读，客户端这边也不需要把整批结果攒在内存里
+def upload_bulk(items, batch_size, parallel):
+    def send(batch):
+        body = (json.dumps(item).encode() + b"\n" for item in batch)
+        headers = {"Content-Type": "application/x-ndjson"}
+        with requests.post(f"{BASE_URL}/items/bulk", data=body, headers=headers, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                result = json.loads(line)
+                if "summary" in result:
+                    return result["summary"]["ok"], result["summary"]["failed"]
+        raise RuntimeError("bulk response ended without a summary")
+
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    ok = failed = 0
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        for batch_ok, batch_failed in pool.map(send, batches):
+            ok, failed = ok + batch_ok, failed + batch_failed
+    return ok, failed
+
+
+def benchmark(n, batch_size, parallel, single):
+    items = make_items(n)
+    rows = []
+    if single:
+        # 逐条上传太慢，只取一部分估算速度
+        sample = items[:single]
+        start = time.perf_counter()
+        ok, failed = upload_one_by_one(sample)
+        rows.append(("逐条 POST /items", ok, failed, time.perf_counter() - start))
+    start = time.perf_counter()
+    ok, failed = upload_bulk(items, batch_size, parallel)
+    rows.append((f"批量 /items/bulk（每批 {batch_size}，并发 {parallel}）", ok, failed, time.perf_counter() - start))
+
+    for label, ok, failed, elapsed in rows:
+        print(f"{label}: {ok} 成功 / {failed} 失败，{elapsed:.2f}s，{ok / elapsed:,.0f} items/s")
+
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="items 服务的客户端")
+    sub = parser.add_subparsers(dest="command")
+    p_bulk = sub.add_parser("bulk", help="批量上传并和逐条上传对比 items/s")
+    p_bulk.add_argument("-n", type=int, default=100_000, help="批量上传的 item 数")
+    p_bulk.add_argument("--batch-size", type=int, default=5000)
+    p_bulk.add_argument("--parallel", type=int, default=4, help="同时在路上的批次数")
+    p_bulk.add_argument("--single", type=int, default=2000, help="逐条上传的 item 数，0 表示跳过")
+    args = parser.parse_args()
 
-pass
\ No newline at end of file
+    if args.command == "bulk":
+        benchmark(args.n, args.batch_size, args.parallel, args.single)
+    else:
+        post_one()
@@ -0,0 +1,116 @@
+"""提交一批校验任务，用三种方式取结果，对比耗时和请求数。
+
+    python client.py --mode poll -n 200     # 每隔 --interval 秒 GET /jobs/{id}，带 If-None-Match
+    python client.py --mode wait -n 200     # 长轮询 GET /jobs/{id}?wait=30
+    python client.py --mode ws -n 200       # 一个 WebSocket 连接订阅全部任务
+
+HTTP 请求用信号量限制在 ``--concurrency`` 个以内：成百上千个请求同时排在 httpx 连接池上，
+客户端自己就会变成瓶颈。
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+import httpx
+import websockets
+
+
+FINISHED = ("done", "failed")
+
+
+class RequestCount:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.not_modified = 0
+
+
+async def submit(client: httpx.AsyncClient, n: int, limit: asyncio.Semaphore) -> list[str]:
+    """提交 n 个任务；遇到 429 按 Retry-After 等一会儿再提交。"""
+    async def one(i: int) -> str:
+        while True:
+            async with limit:
+                response = await client.post("/shadowhunter/verify", json={"user_id": i, "name": f"user-{i}"})
+            if response.status_code == 429:
+                await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+                continue
+            response.raise_for_status()
+            return response.json()["job_id"]
+
+    return await asyncio.gather(*(one(i) for i in range(n)))
+
+
+async def poll(
+    client: httpx.AsyncClient, job_id: str, interval: float, limit: asyncio.Semaphore, counter: RequestCount
+) -> dict:
+    tag, job = None, None
+    while True:
+        headers = {"If-None-Match": tag} if tag else {}
+        async with limit:
+            response = await client.get(f"/jobs/{job_id}", headers=headers)
+        counter.requests += 1
+        if response.status_code == 304:
+            counter.not_modified += 1
+        else:
+            response.raise_for_status()
+            tag, job = response.headers.get("ETag"), response.json()
+            if job["status"] in FINISHED:
+                return job
+        await asyncio.sleep(interval)
+
+
+async def long_poll(client: httpx.AsyncClient, job_id: str, limit: asyncio.Semaphore, counter: RequestCount) -> dict:
+    while True:
+        async with limit:
+            response = await client.get(f"/jobs/{job_id}", params={"wait": 30})
+        counter.requests += 1
+        response.raise_for_status()
+        job = response.json()
+        if job["status"] in FINISHED:
+            return job
+
+
+async def subscribe(base_url: str, job_ids: list[str], counter: RequestCount) -> list[dict]:
+    url = base_url.replace("http", "ws", 1) + "/jobs/ws"
+    results = []
+    async with websockets.connect(url) as ws:
+        await ws.send(json.dumps({"subscribe": job_ids}))
+        counter.requests += 1
+        while len(results) < len(job_ids):
+            results.append(json.loads(await ws.recv()))
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="异步任务取结果的三种方式")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mode", choices=["poll", "wait", "ws"], default="ws")
+    parser.add_argument("-n", type=int, default=200, help="任务数")
+    parser.add_argument("--interval", type=float, default=0.1, help="轮询间隔（秒）")
+    parser.add_argument("--concurrency", type=int, default=20, help="同时在途的 HTTP 请求数")
+    args = parser.parse_args()
+
+    limit = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        job_ids = await submit(client, args.n, limit)
+        submitted = time.perf_counter() - started
+        counter = RequestCount()
+        if args.mode == "poll":
+            results = await asyncio.gather(*(poll(client, j, args.interval, limit, counter) for j in job_ids))
+        elif args.mode == "wait":
+            results = await asyncio.gather(*(long_poll(client, j, limit, counter) for j in job_ids))
+        else:
+            results = await subscribe(args.url, job_ids, counter)
+        elapsed = time.perf_counter() - started
+
+    statuses = Counter(r["status"] for r in results)
+    print(f"模式 {args.mode}：{args.n} 个任务，提交 {submitted:.2f}s，全部拿到结果 {elapsed:.2f}s")
+    print(f"任务状态 {dict(statuses)}；取结果发了 {counter.requests} 个请求"
+          + (f"（其中 304 {counter.not_modified} 个）" if args.mode == "poll" else ""))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,161 @@
+"""先接收、后处理的任务队列。
+
+接口只负责把请求放进有界的 ``asyncio.Queue`` 并马上返回 job_id，固定数量的协程 worker 在后台
+调用上游慢服务。队列满了直接拒绝（429 + ``Retry-After``），而不是让请求排队把内存和连接都拖垮。
+
+    queue = JobQueue(handler, workers=256, maxsize=5000, on_done=callback)
+    await queue.start()          # 在 lifespan 里启动 / 停止
+    job = queue.submit(payload)  # 满了抛 QueueFull
+
+``on_done(job)`` 在任务完成（成功或失败）后由 worker 调用，``server.py`` 用它把结果交给 ``ResultStore``；
+回调抛出的异常只记日志，不会让 worker 退出。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "256"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "5000"))
+# Retry-After 的上下限（秒）
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 30
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass(slots=True)
+class Job:
+    id: str
+    payload: Any
+    status: str = "queued"  # queued / running / done / failed
+    result: Any = None
+    error: str | None = None
+    created: float = field(default_factory=time.time)
+    started: float | None = None
+    finished: float | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class JobQueue:
+    """有界队列 + 固定数量的 worker。``handler`` 是处理一个 payload 的协程函数。"""
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[Any]],
+        workers: int = JOB_WORKERS,
+        maxsize: int = JOB_QUEUE_SIZE,
+        on_done: Callable[[Job], None] | None = None,
+    ) -> None:
+        self.handler = handler
+        self.workers = workers
+        self.maxsize = maxsize
+        self.on_done = on_done
+        self._queue: asyncio.Queue[Job] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._finished: deque[float] = deque(maxlen=2000)  # 最近完成时间，用来估算消化速度
+        self.accepted = 0
+        self.rejected = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.running = 0
+
+    async def start(self) -> None:
+        # 队列在事件循环里创建，worker 和接口用的是同一个循环
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker(), name=f"job-worker-{i}") for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, payload: Any) -> Job:
+        job = Job(id=uuid.uuid4().hex, payload=payload)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFull(self.retry_after()) from None
+        self.accepted += 1
+        return job
+
+    def drain_rate(self) -> float:
+        """最近每秒完成的任务数。"""
+        done = self._finished
+        if len(done) < 2:
+            return 0.0
+        span = time.monotonic() - done[0]
+        return len(done) / span if span > 0 else 0.0
+
+    def retry_after(self) -> int:
+        """按现在的积压和消化速度估算多久以后队列能腾出空间。"""
+        rate = self.drain_rate()
+        if rate <= 0:
+            return MAX_RETRY_AFTER
+        return max(MIN_RETRY_AFTER, min(MAX_RETRY_AFTER, math.ceil(self._queue.qsize() / rate)))
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status, job.started = "running", time.time()
+            self.running += 1
+            try:
+                job.result = await self.handler(job.payload)
+                job.status = "done"
+                self.succeeded += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001 - 失败记在任务上，worker 继续处理下一个
+                job.status, job.error = "failed", f"{type(exc).__name__}: {exc}"
+                self.failed += 1
+            finally:
+                self.running -= 1
+                job.finished = time.time()
+                job.payload = None  # 结果还要保留一段时间，请求体就不用再留着了
+                self._finished.append(time.monotonic())
+                self._queue.task_done()
+            if self.on_done is not None:
+                # 回调出错只记日志：worker 要是跟着退出，池子会悄悄变小，最后队列只剩 429
+                try:
+                    self.on_done(job)
+                except Exception:
+                    logger.exception("on_done failed for job %s", job.id)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queue_size": self._queue.qsize() if self._queue is not None else 0,
+            "queue_max": self.maxsize,
+            "running": self.running,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "drain_rate": round(self.drain_rate(), 1),
+        }
@@ -0,0 +1,31 @@
+"""``POST /shadowhunter/verify`` 的压测：100 个用户各自每秒 5 个请求，合计目标 500 RPS。
+
+    python server.py                      # 单个 uvicorn 进程，上游用进程内的桩
+    locust -f locustfile.py --headless -u 100 -r 50 -t 60s --host http://127.0.0.1:8000
+
+``LOAD_RPS_PER_USER`` 调整每个用户的速率。202 和 429 都算正常响应（429 说明背压生效），
+429 单独记一类，方便在统计里看拒绝比例。
+"""
+import os
+import random
+
+from locust import FastHttpUser, constant_throughput, task
+
+
+RPS_PER_USER = float(os.getenv("LOAD_RPS_PER_USER", "5"))
+
+
+class VerifyUser(FastHttpUser):
+    wait_time = constant_throughput(RPS_PER_USER)
+
+    @task
+    def verify(self) -> None:
+        payload = {"user_id": random.randint(1, 1_000_000), "token": f"{random.getrandbits(64):016x}"}
+        with self.client.post("/shadowhunter/verify", json=payload, catch_response=True) as response:
+            if response.status_code == 202:
+                response.success()
+            elif response.status_code == 429:
+                response.success()
+                response.request_meta["name"] = "/shadowhunter/verify [429]"
+            else:
+                response.failure(f"unexpected status {response.status_code}")
@@ -0,0 +1,108 @@
+"""任务结果的存放和三种取结果的方式共用的通知。
+
+- 轮询：``get(job_id)`` 直接读，接口按状态生成 ETag，没变化时返回 304
+- 长轮询：``wait(job_id, timeout)`` 等这个任务的 future，不用反复查
+- WebSocket：``watch(job_id, events)`` 把连接的事件队列挂在任务上，完成时推过去
+
+排队中和运行中的任务一直保留（数量受队列长度和 worker 数限制）；完成的任务 ``RESULT_TTL`` 秒后删除。
+所有任务的 TTL 相同，完成顺序就是过期顺序，用一个 deque 从头清理就够了，均摊 O(1)。
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any
+
+from jobs import Job
+
+
+RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "300"))
+FINISHED = ("done", "failed")
+
+
+class ResultStore:
+    def __init__(self, ttl: float = RESULT_TTL) -> None:
+        self.ttl = ttl
+        self._jobs: dict[str, Job] = {}
+        self._expiry: deque[tuple[float, str]] = deque()
+        # 只有真的有人在等时才创建 future / 挂事件队列
+        self._futures: dict[str, asyncio.Future] = {}
+        self._watchers: dict[str, set[asyncio.Queue]] = {}
+        self.expired = 0
+
+    def add(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        self._sweep()
+
+    def get(self, job_id: str) -> Job | None:
+        self._sweep()
+        return self._jobs.get(job_id)
+
+    def finish(self, job: Job) -> None:
+        """JobQueue 的 on_done 回调：唤醒长轮询和 WebSocket 订阅，开始计算 TTL。"""
+        self._expiry.append((time.monotonic() + self.ttl, job.id))
+        future = self._futures.pop(job.id, None)
+        if future is not None and not future.done():
+            future.set_result(job)
+        for events in self._watchers.pop(job.id, ()):
+            events.put_nowait(job)
+        self._sweep()
+
+    async def wait(self, job_id: str, timeout: float) -> Job | None:
+        """等任务完成，最多 ``timeout`` 秒；返回任务当前的样子（超时也返回），任务不存在返回 None。"""
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED or timeout <= 0:
+            return job
+        future = self._futures.get(job_id)
+        if future is None:
+            future = self._futures[job_id] = asyncio.get_running_loop().create_future()
+        try:
+            # shield：一个等待者超时取消，不影响同一任务的其他等待者
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            return job
+
+    def watch(self, job_id: str, events: asyncio.Queue) -> bool:
+        """任务完成时把它放进 ``events``；已经完成的马上放进去。任务不存在返回 False。"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        if job.status in FINISHED:
+            events.put_nowait(job)
+        else:
+            self._watchers.setdefault(job_id, set()).add(events)
+        return True
+
+    def unwatch(self, job_ids: set[str], events: asyncio.Queue) -> None:
+        for job_id in job_ids:
+            watchers = self._watchers.get(job_id)
+            if watchers is not None:
+                watchers.discard(events)
+                if not watchers:
+                    del self._watchers[job_id]
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            _, job_id = expiry.popleft()
+            if self._jobs.pop(job_id, None) is not None:
+                self.expired += 1
+
+    def stats(self) -> dict[str, Any]:
+        self._sweep()
+        return {
+            "jobs": len(self._jobs),
+            "finished": len(self._expiry),
+            "expired": self.expired,
+            "long_polls": len(self._futures),
+            "watched": len(self._watchers),
+            "ttl": self.ttl,
+        }
+
+
+def etag(job: Job) -> str:
+    # 状态只会 queued -> running -> done/failed 单向变化，id + 状态就能唯一标识一个版本
+    return f'"{job.id}-{job.status}"'
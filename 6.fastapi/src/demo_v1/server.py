@@ -1,22 +1,113 @@
+import asyncio
+from contextlib import asynccontextmanager
 
-from requests import Request
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 
+import upstream
+from jobs import JobQueue, QueueFull
+from results import ResultStore, etag
 
-app = FastAPI()
 
+# 长轮询最多挂这么久，再长容易被代理 / 负载均衡的空闲超时断开
+MAX_WAIT = 30.0
 
-@app.post("/shadowhunter/verify")
-async def shadowhunter_verify_route(request: Request):
+# 接口只入队，worker 在后台调用上游；队列满了返回 429。结果放在 store 里，完成后保留 TTL 秒
+store = ResultStore()
+queue = JobQueue(upstream.verify, on_done=store.finish)
 
-    request_json = await request.json()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await queue.start()
+    yield
+    await queue.stop()
+    await upstream.close()
 
-    return
 
-# @app.get("/shadowhunter/verify")
-# async def s
+app = FastAPI(lifespan=lifespan)
+
+
+@app.post("/shadowhunter/verify", status_code=202)
+async def shadowhunter_verify_route(request: Request, response: Response):
+    try:
+        request_json = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be JSON")
+
+    try:
+        job = queue.submit(request_json)
+    except QueueFull as exc:
+        raise HTTPException(
+            status_code=429, detail="Job queue is full", headers={"Retry-After": str(exc.retry_after)}
+        )
+    store.add(job)
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return {"job_id": job.id, "status": job.status}
+
+
+# 队列积压、拒绝数和消化速度，压测时看这里
+@app.get("/shadowhunter/stats")
+async def shadowhunter_stats_route():
+    return {"queue": queue.stats(), "results": store.stats()}
+
+
+# 轮询 + 长轮询：?wait=N 时最多等 N 秒任务完成；If-None-Match 和当前 ETag 相同时返回 304
+@app.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    response: Response,
+    wait: float = Query(0, ge=0, le=MAX_WAIT),
+    if_none_match: str | None = Header(None),
+):
+    job = await store.wait(job_id, wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    tag = etag(job)
+    if if_none_match == tag:
+        return Response(status_code=304, headers={"ETag": tag})
+    response.headers["ETag"] = tag
+    return job.to_dict()
+
+
+# WebSocket：客户端发 {"subscribe": [job_id, ...]}（可以发多次），每个任务完成时推一条结果；
+# 不存在或已过期的任务马上回 {"job_id": ..., "status": "unknown"}，格式不对的消息回 {"error": ...}，连接保持
+@app.websocket("/jobs/ws")
+async def jobs_ws(websocket: WebSocket):
+    await websocket.accept()
+    events: asyncio.Queue = asyncio.Queue()
+    subscribed: set[str] = set()
+
+    async def push():
+        while True:
+            job = await events.get()
+            await websocket.send_json(job.to_dict())
+
+    pusher = asyncio.create_task(push())
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except (KeyError, ValueError):
+                # 二进制帧没有 "text"，不是 JSON 的文本帧抛 JSONDecodeError
+                await websocket.send_json({"error": "expected a JSON text frame"})
+                continue
+            job_ids = message.get("subscribe", []) if isinstance(message, dict) else None
+            if not isinstance(job_ids, list) or not all(isinstance(job_id, str) for job_id in job_ids):
+                await websocket.send_json({"error": 'expected {"subscribe": [job_id, ...]}'})
+                continue
+            for job_id in job_ids:
+                if store.watch(job_id, events):
+                    subscribed.add(job_id)
+                else:
+                    await websocket.send_json({"job_id": job_id, "status": "unknown"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        pusher.cancel()
+        store.unwatch(subscribed, events)
+
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # 压测时关掉访问日志，每个请求打一行日志在 500 RPS 下很占 CPU
+    uvicorn.run(app, host="0.0.0.0", port=8000, access_log=False)
@@ -0,0 +1,114 @@
+import asyncio
+import pathlib
+import sys
+import time
+
+import pytest
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from jobs import MAX_RETRY_AFTER, MIN_RETRY_AFTER, JobQueue, QueueFull  # noqa: E402
+
+
+async def wait_until(predicate, timeout: float = 2.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_workers_process_jobs_and_report_each_one() -> None:
+    async def handler(payload):
+        if payload == "boom":
+            raise ValueError("bad payload")
+        return {"echo": payload}
+
+    done = []
+    queue = JobQueue(handler, workers=2, maxsize=10, on_done=done.append)
+    await queue.start()
+    try:
+        jobs = [queue.submit(p) for p in ("a", "boom", "b")]
+        await wait_until(lambda: len(done) == 3)
+    finally:
+        await queue.stop()
+
+    ok, failed, last = jobs
+    assert ok.status == "done" and ok.result == {"echo": "a"}
+    assert failed.status == "failed" and failed.error == "ValueError: bad payload"
+    assert last.status == "done"
+    assert all(job.payload is None and job.finished >= job.started for job in jobs)
+    stats = queue.stats()
+    assert (stats["accepted"], stats["succeeded"], stats["failed"], stats["running"]) == (3, 2, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_with_retry_after() -> None:
+    release = asyncio.Event()
+
+    async def handler(payload):
+        await release.wait()
+
+    queue = JobQueue(handler, workers=1, maxsize=2)
+    await queue.start()
+    try:
+        queue.submit(1)
+        await wait_until(lambda: queue.running == 1)
+        queue.submit(2)
+        queue.submit(3)
+        with pytest.raises(QueueFull) as exc:
+            queue.submit(4)
+        # 还没有任务完成，估不出消化速度，按上限让客户端等
+        assert exc.value.retry_after == MAX_RETRY_AFTER
+        assert queue.stats()["rejected"] == 1
+    finally:
+        release.set()
+        await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_retry_after_follows_backlog_and_drain_rate() -> None:
+    async def handler(payload):
+        return payload
+
+    queue = JobQueue(handler, workers=0, maxsize=100)
+    await queue.start()
+    for i in range(30):
+        queue.submit(i)
+    # 假装最近 1 秒内完成了 20 个任务：30 个积压约 1.5 秒消化完，向上取整
+    now = time.monotonic()
+    queue._finished.extend(now - 1 + i / 20 for i in range(20))
+    assert queue.drain_rate() == pytest.approx(20, rel=0.05)
+    assert queue.retry_after() == 2
+
+    queue._finished.clear()
+    queue._finished.extend([now - 0.001, now])
+    assert queue.retry_after() == MIN_RETRY_AFTER
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_failing_on_done_does_not_shrink_the_pool(caplog: pytest.LogCaptureFixture) -> None:
+    async def handler(payload):
+        return payload
+
+    seen = []
+
+    def on_done(job):
+        seen.append(job.id)
+        raise RuntimeError("store is broken")
+
+    queue = JobQueue(handler, workers=2, maxsize=100, on_done=on_done)
+    await queue.start()
+    try:
+        jobs = [queue.submit(i) for i in range(20)]
+        await wait_until(lambda: len(seen) == 20)
+    finally:
+        await queue.stop()
+
+    # 两个 worker 都还活着，每个任务都处理完了
+    assert all(job.status == "done" for job in jobs)
+    assert queue.stats()["succeeded"] == 20
+    assert caplog.text.count("on_done failed") == 20
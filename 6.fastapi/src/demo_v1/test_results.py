@@ -0,0 +1,116 @@
+import asyncio
+import importlib.util
+import pathlib
+import sys
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from jobs import Job  # noqa: E402
+from results import ResultStore, etag  # noqa: E402
+
+
+def finished(job: Job, status: str = "done") -> Job:
+    job.status, job.result = status, {"ok": status == "done"}
+    return job
+
+
+def test_finished_jobs_expire_after_the_ttl() -> None:
+    store = ResultStore(ttl=0.05)
+    pending, done = Job("pending", None), Job("done", None)
+    store.add(pending)
+    store.add(done)
+    store.finish(finished(done))
+    assert store.get("done") is done
+    assert store.stats()["finished"] == 1
+
+    time.sleep(0.06)
+    assert store.get("done") is None
+    # 没完成的任务不过期
+    assert store.get("pending") is pending
+    assert store.stats()["expired"] == 1
+
+
+def test_etag_changes_with_the_status() -> None:
+    job = Job("abc", None)
+    queued = etag(job)
+    job.status = "running"
+    assert etag(job) != queued
+    assert etag(job) == '"abc-running"'
+
+
+@pytest.mark.asyncio
+async def test_long_poll_wakes_every_waiter_when_the_job_finishes() -> None:
+    store = ResultStore()
+    job = Job("j", None)
+    store.add(job)
+
+    # 一个等待者超时不影响同一任务的其他等待者
+    assert (await store.wait("j", 0.01)).status == "queued"
+    waiters = [asyncio.create_task(store.wait("j", 2)) for _ in range(3)]
+    short = asyncio.create_task(store.wait("j", 0.01))
+    assert (await short).status == "queued"
+
+    store.finish(finished(job))
+    assert [w.status for w in await asyncio.gather(*waiters)] == ["done"] * 3
+    assert store.stats()["long_polls"] == 0
+
+    assert await store.wait("j", 2) is job
+    assert await store.wait("missing", 2) is None
+
+
+@pytest.mark.asyncio
+async def test_watchers_get_pushed_once_and_can_unsubscribe() -> None:
+    store = ResultStore()
+    early, late, gone = Job("early", None), Job("late", None), Job("gone", None)
+    for job in (early, late, gone):
+        store.add(job)
+    store.finish(finished(early, "failed"))
+
+    events: asyncio.Queue = asyncio.Queue()
+    assert not store.watch("missing", events)
+    assert store.watch("early", events) and store.watch("late", events) and store.watch("gone", events)
+    # 已经完成的马上推送
+    assert events.get_nowait() is early
+
+    store.unwatch({"gone"}, events)
+    assert store.stats()["watched"] == 1
+    store.finish(finished(late))
+    store.finish(finished(gone))
+    assert await asyncio.wait_for(events.get(), 1) is late
+    assert events.empty()
+    assert store.stats()["watched"] == 0
+
+
+def load_server():
+    # 6.fastapi/src 下也有一个 server.py，按文件路径加载，避免按模块名拿错
+    spec = importlib.util.spec_from_file_location("demo_v1_server", ROOT / "server.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_malformed_ws_messages_get_an_error_frame() -> None:
+    server = load_server()
+    job = Job("j1", None)
+    server.store.add(job)
+    server.store.finish(finished(job))
+
+    with TestClient(server.app).websocket_connect("/jobs/ws") as ws:
+        for bad in ("not json", "[1, 2]", "3", '{"subscribe": "j1"}', '{"subscribe": [1]}'):
+            ws.send_text(bad)
+            assert list(ws.receive_json()) == ["error"]
+        ws.send_bytes(b'{"subscribe": ["j1"]}')
+        assert ws.receive_json() == {"error": "expected a JSON text frame"}
+
+        # 出错之后连接还能正常订阅
+        ws.send_json({"subscribe": ["j1", "missing"]})
+        replies = [ws.receive_json(), ws.receive_json()]
+        assert {"job_id": "missing", "status": "unknown"} in replies
+        assert any(r.get("job_id") == "j1" and r.get("status") == "done" for r in replies)
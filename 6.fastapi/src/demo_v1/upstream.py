@@ -0,0 +1,59 @@
+"""上游校验服务的调用，以及压测时代替它的本地桩。
+
+设置了 ``UPSTREAM_URL`` 就用共享的 ``httpx.AsyncClient`` 把 payload 转发过去；没设置时用进程内的桩，
+按 ``UPSTREAM_LATENCY_MS``（默认 200 ms，±25% 抖动）睡一会儿再返回，模拟慢上游。
+桩也可以单独起成一个 HTTP 服务，这样压测时连网络开销一起算进去：
+
+    python -m uvicorn upstream:stub_app --port 9000
+    UPSTREAM_URL=http://127.0.0.1:9000/verify python server.py
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+from typing import Any
+
+import httpx
+from fastapi import FastAPI, Request
+
+
+UPSTREAM_URL = os.getenv("UPSTREAM_URL")
+UPSTREAM_LATENCY_MS = float(os.getenv("UPSTREAM_LATENCY_MS", "200"))
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "10"))
+
+_client: httpx.AsyncClient | None = None
+
+
+async def stub_verify(payload: Any) -> dict[str, Any]:
+    await asyncio.sleep(UPSTREAM_LATENCY_MS / 1000 * random.uniform(0.75, 1.25))
+    return {"verified": True, "echo": payload}
+
+
+async def verify(payload: Any) -> Any:
+    """任务 worker 调用的处理函数。"""
+    global _client
+    if not UPSTREAM_URL:
+        return await stub_verify(payload)
+    if _client is None:
+        # 连接池要容得下所有 worker 同时请求
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=512)
+        _client = httpx.AsyncClient(timeout=UPSTREAM_TIMEOUT, limits=limits)
+    response = await _client.post(UPSTREAM_URL, json=payload)
+    response.raise_for_status()
+    return response.json()
+
+
+async def close() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+stub_app = FastAPI()
+
+
+@stub_app.post("/verify")
+async def stub_verify_route(request: Request):
+    return await stub_verify(await request.json())
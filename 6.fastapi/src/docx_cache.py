@@ -0,0 +1,151 @@
+"""DOCX 转 HTML 的缓存和进程池。
+
+- 按内容的 sha256 缓存转换结果：同一份文档不管是按路径读的还是上传的，只转换一次
+- 按路径读的文件先看 (mtime, size)，没变就直接用上次算好的 hash，不用重读文件
+- 转换在进程池里跑：mammoth 是纯 Python，大文档一转就是几百毫秒 CPU，放在线程池里也会因为 GIL 拖慢其他请求
+- 同一份文档同时被请求多次时只转换一次，其余请求等同一个任务
+- 缓存按 HTML 字节数做 LRU 淘汰（``DOCX_CACHE_MB``，默认 256），gzip 版本在放进缓存时就压好
+
+    cache = RenderCache()
+    page = await cache.render_path("policy.docx")   # -> Rendered(digest, html, gzipped)
+    page = await cache.render_bytes(uploaded_bytes)
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import io
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import mammoth
+
+
+RENDER_WORKERS = int(os.getenv("DOCX_RENDER_WORKERS", str(os.cpu_count() or 2)))
+CACHE_BYTES = int(os.getenv("DOCX_CACHE_MB", "256")) << 20
+
+PAGE = """<html>
+<head>
+    <meta charset="utf-8">
+    <title>Word 表格展示</title>
+    <style>
+        table {{ border-collapse: collapse; margin-bottom: 20px; }}
+        td, th {{ border: 1px solid #333; padding: 8px; text-align: center; }}
+    </style>
+</head>
+<body>
+    <h2>提取的 Word 表格如下：</h2>
+    {body}
+</body>
+</html>
+"""
+
+
+@dataclass(frozen=True)
+class Rendered:
+    digest: str
+    html: bytes
+    gzipped: bytes
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.html) + len(self.gzipped)
+
+    def etag(self, gzip: bool) -> str:
+        # 压缩和不压缩是两种表示，强 ETag 要区分开
+        return f'"{self.digest[:32]}{"-gz" if gzip else ""}"'
+
+
+def convert(data: bytes) -> tuple[bytes, bytes]:
+    """在子进程里执行：转换、套上页面模板、顺便压好 gzip，主进程只做缓存。"""
+    body = mammoth.convert_to_html(io.BytesIO(data)).value
+    html = PAGE.format(body=body).encode("utf-8")
+    return html, gzip.compress(html, compresslevel=6)
+
+
+def _read(path: Path) -> tuple[bytes, str]:
+    data = path.read_bytes()
+    return data, hashlib.sha256(data).hexdigest()
+
+
+class RenderCache:
+    def __init__(self, workers: int = RENDER_WORKERS, max_bytes: int = CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._pool = ProcessPoolExecutor(max_workers=workers)
+        self._pages: OrderedDict[str, Rendered] = OrderedDict()
+        self._bytes = 0
+        self._pending: dict[str, asyncio.Task] = {}
+        # 路径 -> (mtime_ns, size, sha256)：文件没动过就不用重新读、重新算 hash
+        self._stats: dict[Path, tuple[int, int, str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def close(self) -> None:
+        self._pool.shutdown(cancel_futures=True)
+
+    async def render_path(self, path: str | Path) -> Rendered:
+        """文件不存在时抛 FileNotFoundError。"""
+        path = Path(path).resolve()
+        stat = await asyncio.to_thread(path.stat)
+        known = self._stats.get(path)
+        if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size) and known[2] in self._pages:
+            return self._hit(known[2])
+        data, digest = await asyncio.to_thread(_read, path)
+        self._stats[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return await self._render(digest, data)
+
+    async def render_bytes(self, data: bytes) -> Rendered:
+        digest = await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+        return await self._render(digest, data)
+
+    def _hit(self, digest: str) -> Rendered:
+        self.hits += 1
+        self._pages.move_to_end(digest)
+        return self._pages[digest]
+
+    async def _render(self, digest: str, data: bytes) -> Rendered:
+        if digest in self._pages:
+            return self._hit(digest)
+        task = self._pending.get(digest)
+        if task is None:
+            self.misses += 1
+            task = self._pending[digest] = asyncio.create_task(self._convert(digest, data))
+        else:
+            self.hits += 1
+        # 转换放在单独的任务里：第一个请求的客户端断开了，其他在等的请求照样拿到结果
+        return await asyncio.shield(task)
+
+    async def _convert(self, digest: str, data: bytes) -> Rendered:
+        try:
+            html, gzipped = await asyncio.get_running_loop().run_in_executor(self._pool, convert, data)
+        finally:
+            del self._pending[digest]
+        page = Rendered(digest, html, gzipped)
+        self._store(page)
+        return page
+
+    def _store(self, page: Rendered) -> None:
+        if page.nbytes > self.max_bytes:
+            return
+        self._pages[page.digest] = page
+        self._bytes += page.nbytes
+        while self._bytes > self.max_bytes:
+            _, old = self._pages.popitem(last=False)
+            self._bytes -= old.nbytes
+            self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "documents": len(self._pages),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "converting": len(self._pending),
+        }
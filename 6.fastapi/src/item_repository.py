@@ -0,0 +1,336 @@
+"""商品的存储层：``02_route_and_request.py`` 的路由只通过这里读写，不再直接操作字典。
+
+- id 单调递增，删除后不会复用（``len(fake_db) + 1`` 删掉一个后会和已有 id 撞上）
+- 同步路由跑在线程池里，写操作加锁
+- ``name`` 精确匹配和价格区间有二级索引
+- ``GET /items`` 用游标分页：每页只取 ``limit`` 条，和总条数无关
+- ``batch()`` 把一批写操作合在一次加锁（SQLite 是一个事务）里，给批量接口用
+
+两种后端，用 ``ITEM_STORE`` 选择：
+
+    ITEM_STORE=memory                  # 默认，进程内，重启就没了
+    ITEM_STORE=sqlite:///items.db      # SQLite WAL 模式，读写可以并发，多进程共用一个文件
+
+游标对调用方是不透明的字符串。按 id 翻页时游标里是上一页最后一个 id；带价格条件时结果按
+(price, id) 排序，游标里是上一页最后一条的 (price, id)。
+"""
+from __future__ import annotations
+
+import base64
+import json
+import math
+import os
+import sqlite3
+import threading
+from bisect import bisect_left, bisect_right, insort
+from contextlib import AbstractContextManager, contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterator, Protocol
+
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+FIELDS = ("name", "price", "description")
+
+
+@dataclass
+class ItemFilter:
+    name: str | None = None
+    min_price: float | None = None
+    max_price: float | None = None
+
+    @property
+    def by_price(self) -> bool:
+        # 有名字条件时走名字索引（通常很少几条），价格只做过滤，按 id 排序
+        return self.name is None and (self.min_price is not None or self.max_price is not None)
+
+    def match(self, name: str, price: float) -> bool:
+        return (
+            (self.name is None or name == self.name)
+            and (self.min_price is None or price >= self.min_price)
+            and (self.max_price is None or price <= self.max_price)
+        )
+
+
+def encode_cursor(key: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def _is_number(value: Any) -> bool:
+    # bool 是 int 的子类；json 还接受 NaN / Infinity，它们没法参与排序比较
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def decode_cursor(cursor: str, by_price: bool = False) -> tuple:
+    """解析失败或形状和查询方式对不上时抛 ValueError，路由里转成 400。
+
+    按价格翻页的游标是 ``(price, id)``，其余是 ``(id,)``；换了查询条件却沿用旧游标也算无效。
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("invalid cursor") from exc
+    if not isinstance(key, list) or len(key) != (2 if by_price else 1) or not all(map(_is_number, key)):
+        raise ValueError("invalid cursor")
+    if not isinstance(key[-1], int):
+        raise ValueError("invalid cursor")
+    return tuple(key)
+
+
+class ItemRepository(Protocol):
+    def create(self, item: dict[str, Any]) -> int: ...
+    def get(self, item_id: int) -> dict[str, Any] | None: ...
+    def update(self, item_id: int, item: dict[str, Any]) -> bool: ...
+    def patch(self, item_id: int, fields: dict[str, Any]) -> bool: ...
+    def delete(self, item_id: int) -> bool: ...
+    def list(self, filters: ItemFilter, limit: int, cursor: str | None) -> tuple[list[dict[str, Any]], str | None]: ...
+    def batch(self) -> AbstractContextManager[None]: ...
+
+
+class MemoryRepository:
+    """进程内实现：记录存成 (name, price, description) 元组，另有三份有序的 id 列表当索引。"""
+
+    def __init__(self) -> None:
+        # 可重入：batch() 持有锁时，里面的 create / update 还会再取一次
+        self._lock = threading.RLock()
+        self._next_id = 1
+        self._rows: dict[int, tuple[str, float, str]] = {}
+        self._ids: list[int] = []  # id 单调递增，追加就是有序的
+        self._by_name: dict[str, list[int]] = {}
+        self._by_price: list[int] = []  # 按 (price, id) 排序
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """一批写操作只取一次锁，中间不会插进别的请求。"""
+        with self._lock:
+            yield
+
+    def _price_key(self, item_id: int) -> tuple[float, int]:
+        return self._rows[item_id][1], item_id
+
+    def _index(self, item_id: int) -> None:
+        # 新建时 id 最大，insort 等于追加；更新时按原 id 插回去
+        insort(self._by_name.setdefault(self._rows[item_id][0], []), item_id)
+        insort(self._by_price, item_id, key=self._price_key)
+
+    def _unindex(self, item_id: int) -> None:
+        name = self._rows[item_id][0]
+        ids = self._by_name[name]
+        del ids[bisect_left(ids, item_id)]
+        if not ids:
+            del self._by_name[name]
+        pos = bisect_left(self._by_price, self._price_key(item_id), key=self._price_key)
+        del self._by_price[pos]
+
+    @staticmethod
+    def _row(item: dict[str, Any]) -> tuple[str, float, str]:
+        return item["name"], float(item["price"]), item.get("description", "")
+
+    def _dict(self, item_id: int) -> dict[str, Any]:
+        name, price, description = self._rows[item_id]
+        return {"id": item_id, "name": name, "price": price, "description": description}
+
+    def create(self, item: dict[str, Any]) -> int:
+        with self._lock:
+            item_id = self._next_id
+            self._next_id += 1
+            self._rows[item_id] = self._row(item)
+            self._ids.append(item_id)
+            self._index(item_id)
+            return item_id
+
+    def get(self, item_id: int) -> dict[str, Any] | None:
+        with self._lock:
+            return self._dict(item_id) if item_id in self._rows else None
+
+    def update(self, item_id: int, item: dict[str, Any]) -> bool:
+        with self._lock:
+            if item_id not in self._rows:
+                return False
+            self._unindex(item_id)
+            self._rows[item_id] = self._row(item)
+            self._index(item_id)
+            return True
+
+    def patch(self, item_id: int, fields: dict[str, Any]) -> bool:
+        with self._lock:
+            if item_id not in self._rows:
+                return False
+            current = dict(zip(FIELDS, self._rows[item_id]))
+            current.update((k, v) for k, v in fields.items() if k in FIELDS)
+            self._unindex(item_id)
+            self._rows[item_id] = self._row(current)
+            self._index(item_id)
+            return True
+
+    def delete(self, item_id: int) -> bool:
+        with self._lock:
+            if item_id not in self._rows:
+                return False
+            self._unindex(item_id)
+            del self._ids[bisect_left(self._ids, item_id)]
+            del self._rows[item_id]
+            return True
+
+    def list(self, filters: ItemFilter, limit: int, cursor: str | None) -> tuple[list[dict[str, Any]], str | None]:
+        after = decode_cursor(cursor, filters.by_price) if cursor else None
+        with self._lock:
+            if filters.by_price:
+                index, key = self._by_price, self._price_key
+                lo = (filters.min_price if filters.min_price is not None else float("-inf"), 0)
+                start = bisect_left(index, lo, key=key)
+                if after is not None:
+                    start = max(start, bisect_right(index, (float(after[0]), int(after[1])), key=key))
+            else:
+                index, key = (self._by_name.get(filters.name, []) if filters.name is not None else self._ids), None
+                start = bisect_right(index, int(after[0])) if after is not None else 0
+
+            page: list[int] = []
+            pos = start
+            # 价格条件下一旦超过上限就可以停；名字索引里再按价格过滤
+            while pos < len(index) and len(page) < limit:
+                item_id = index[pos]
+                name, price, _ = self._rows[item_id]
+                if filters.by_price and filters.max_price is not None and price > filters.max_price:
+                    break
+                if filters.match(name, price):
+                    page.append(item_id)
+                pos += 1
+            items = [self._dict(i) for i in page]
+
+        next_cursor = None
+        if len(page) == limit:
+            last = items[-1]
+            next_cursor = encode_cursor((last["price"], last["id"]) if filters.by_price else (last["id"],))
+        return items, next_cursor
+
+
+class SqliteRepository:
+    """SQLite 实现：WAL 模式下读不挡写；每个线程一个连接，写操作再加一把进程内的锁。"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            price REAL NOT NULL,
+            description TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS items_name ON items (name, id);
+        CREATE INDEX IF NOT EXISTS items_price ON items (price, id);
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # AUTOINCREMENT 保证删除后 id 不复用；synchronous=NORMAL 是 WAL 下常用的设置
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """一批写操作放在一个事务里：比每条自动提交快得多，出错整批回滚。"""
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _write(self, sql: str, params: tuple) -> sqlite3.Cursor:
+        with self._write_lock:
+            return self._conn().execute(sql, params)
+
+    def create(self, item: dict[str, Any]) -> int:
+        cur = self._write(
+            "INSERT INTO items (name, price, description) VALUES (?, ?, ?)",
+            (item["name"], float(item["price"]), item.get("description", "")),
+        )
+        return cur.lastrowid
+
+    def get(self, item_id: int) -> dict[str, Any] | None:
+        row = self._conn().execute("SELECT * FROM items WHERE id = ?", (item_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def update(self, item_id: int, item: dict[str, Any]) -> bool:
+        cur = self._write(
+            "UPDATE items SET name = ?, price = ?, description = ? WHERE id = ?",
+            (item["name"], float(item["price"]), item.get("description", ""), item_id),
+        )
+        return cur.rowcount > 0
+
+    def patch(self, item_id: int, fields: dict[str, Any]) -> bool:
+        fields = {k: v for k, v in fields.items() if k in FIELDS}
+        if not fields:
+            return self.get(item_id) is not None
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        cur = self._write(f"UPDATE items SET {assignments} WHERE id = ?", (*fields.values(), item_id))
+        return cur.rowcount > 0
+
+    def delete(self, item_id: int) -> bool:
+        return self._write("DELETE FROM items WHERE id = ?", (item_id,)).rowcount > 0
+
+    def list(self, filters: ItemFilter, limit: int, cursor: str | None) -> tuple[list[dict[str, Any]], str | None]:
+        after = decode_cursor(cursor, filters.by_price) if cursor else None
+        where, params = [], []
+        if filters.name is not None:
+            where.append("name = ?")
+            params.append(filters.name)
+        if filters.min_price is not None:
+            where.append("price >= ?")
+            params.append(filters.min_price)
+        if filters.max_price is not None:
+            where.append("price <= ?")
+            params.append(filters.max_price)
+        if filters.by_price:
+            order = "price, id"
+            if after is not None:
+                where.append("(price, id) > (?, ?)")
+                params += [float(after[0]), int(after[1])]
+        else:
+            order = "id"
+            if after is not None:
+                where.append("id > ?")
+                params.append(int(after[0]))
+        sql = "SELECT * FROM items" + (" WHERE " + " AND ".join(where) if where else "") + f" ORDER BY {order} LIMIT ?"
+        items = [dict(row) for row in self._conn().execute(sql, (*params, limit))]
+
+        next_cursor = None
+        if len(items) == limit:
+            last = items[-1]
+            next_cursor = encode_cursor((last["price"], last["id"]) if filters.by_price else (last["id"],))
+        return items, next_cursor
+
+
+def iter_all(repo: ItemRepository, filters: ItemFilter, page_size: int = MAX_LIMIT) -> Iterator[list[dict[str, Any]]]:
+    """按页走完所有符合条件的记录，给 NDJSON 流式响应用；每次只有一页在内存里。"""
+    cursor = None
+    while True:
+        items, cursor = repo.list(filters, page_size, cursor)
+        if items:
+            yield items
+        if cursor is None:
+            return
+
+
+def open_repository(url: str | None = None) -> ItemRepository:
+    url = url or os.getenv("ITEM_STORE", "memory")
+    if url == "memory":
+        return MemoryRepository()
+    if url.startswith("sqlite:///"):
+        return SqliteRepository(url.removeprefix("sqlite:///"))
+    raise ValueError(f"unsupported ITEM_STORE: {url!r}")
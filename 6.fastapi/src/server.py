@@ -1,32 +1,114 @@
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
-import mammoth
-
-app = FastAPI()
-
-def docx_to_html(docx_path: str) -> str:
-    with open(docx_path, "rb") as docx_file:
-        result = mammoth.convert_to_html(docx_file)
-        return result.value  # 返回 HTML 内容
-
-@app.get("/", response_class=HTMLResponse)
-def read_docx_tables():
-    html_content = docx_to_html("/Users/azen/Desktop/llm/RAG-Tutorial/data/附件1：2024年度东莞市“倍增计划”骨干人员子女入读民办中小学校资助项目申报指南.docx")
-    full_page = f"""
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Word 表格展示</title>
-        <style>
-            table {{ border-collapse: collapse; margin-bottom: 20px; }}
-            td, th {{ border: 1px solid #333; padding: 8px; text-align: center; }}
-        </style>
-    </head>
-    <body>
-        <h2>提取的 Word 表格如下：</h2>
-        {html_content}
-    </body>
-    </html>
-    """
-    print(html_content)
-    return full_page
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from fastapi import FastAPI, HTTPException, Request, UploadFile
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+
+from docx_cache import RenderCache, Rendered
+
+# 首页展示的文档；/documents/{name} 只能访问 DOCX_DIR 目录下的 .docx
+DOCX_PATH = Path(os.getenv(
+    "DOCX_PATH",
+    "/Users/azen/Desktop/llm/RAG-Tutorial/data/附件1：2024年度东莞市“倍增计划”骨干人员子女入读民办中小学校资助项目申报指南.docx",
+))
+DOCX_DIR = Path(os.getenv("DOCX_DIR", str(DOCX_PATH.parent))).resolve()
+MAX_UPLOAD_BYTES = 20 << 20
+MAX_BATCH = 50
+
+cache: RenderCache
+
+
+# 进程池在服务启动时创建、关闭时回收；放在模块顶层的话 import 一下就会起子进程
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global cache
+    cache = RenderCache()
+    try:
+        yield
+    finally:
+        cache.close()
+
+app = FastAPI(lifespan=lifespan)
+
+
+# 同一份内容 ETag 不变：浏览器带 If-None-Match 来问，没变就回 304，不再传一遍页面
+# no-cache 表示每次都要来问一下（文档可能被替换），但问的代价只是一个 304
+def html_response(page: Rendered, request: Request) -> Response:
+    use_gzip = "gzip" in request.headers.get("accept-encoding", "")
+    tag = page.etag(use_gzip)
+    headers = {"ETag": tag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if tag in [t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+    body = page.gzipped if use_gzip else page.html
+    return Response(body, media_type="text/html; charset=utf-8", headers=headers)
+
+
+def doc_path(name: str) -> Path:
+    path = (DOCX_DIR / name).resolve()
+    # 挡住 ../ 之类跳出目录的名字
+    if path.parent != DOCX_DIR or path.suffix != ".docx":
+        raise HTTPException(status_code=404, detail="Document not found")
+    return path
+
+
+async def render_doc(name: str | Path) -> Rendered:
+    path = name if isinstance(name, Path) else doc_path(name)
+    try:
+        return await cache.render_path(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+
+@app.get("/")
+async def read_docx_tables(request: Request):
+    return html_response(await render_doc(DOCX_PATH), request)
+
+
+@app.get("/documents/{name}")
+async def read_doc(name: str, request: Request):
+    return html_response(await render_doc(name), request)
+
+
+# 上传一个 .docx 直接拿到 HTML；内容和已经缓存的文档一样时不会再转换
+@app.post("/render")
+async def render_upload(file: UploadFile, request: Request):
+    data = await file.read(MAX_UPLOAD_BYTES + 1)
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="File too large")
+    try:
+        page = await cache.render_bytes(data)
+    except Exception:
+        # 不是合法的 docx（zip 解不开之类），mammoth 在子进程里抛的错会原样传回来
+        raise HTTPException(status_code=400, detail="Not a valid .docx file")
+    return html_response(page, request)
+
+
+class BatchRequest(BaseModel):
+    names: list[str] = Field(max_length=MAX_BATCH)
+
+
+# 一次渲染多份文档：各自的读文件、转换并发进行，单份失败不影响其他
+@app.post("/render/batch")
+async def render_batch(batch: BatchRequest):
+    pages = await asyncio.gather(
+        *(render_doc(name) for name in batch.names), return_exceptions=True,
+    )
+    results = []
+    for name, page in zip(batch.names, pages):
+        if isinstance(page, HTTPException):
+            results.append({"name": name, "error": page.detail})
+        elif isinstance(page, Exception):
+            results.append({"name": name, "error": "Not a valid .docx file"})
+        else:
+            results.append({"name": name, "etag": page.etag(False), "html": page.html.decode("utf-8")})
+    return {"documents": results}
+
+
+@app.get("/render/stats")
+async def render_stats():
+    return cache.stats()
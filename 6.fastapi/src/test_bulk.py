@@ -0,0 +1,146 @@
+import importlib
+import json
+import pathlib
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import bulk  # noqa: E402
+from bulk import NDJSON, BodyError, iter_json_array, iter_ndjson, iter_records, ndjson_line  # noqa: E402
+from item_repository import MemoryRepository  # noqa: E402
+
+
+async def collect(parser, *parts: bytes) -> list:
+    """跑完解析器，返回产出的值；ValueError 记成 ("error", 消息)，最后的 BodyError 记成 ("body", 消息)。"""
+
+    async def chunks():
+        for part in parts:
+            yield part
+
+    out = []
+    try:
+        async for value in parser(chunks()):
+            out.append(("error", str(value)) if isinstance(value, ValueError) else value)
+    except BodyError as exc:
+        out.append(("body", str(exc)))
+    return out
+
+
+def split_every(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_lines_across_chunks_and_bad_lines() -> None:
+    body = '{"name":"笔","price":1}\n\n{"bad"\n[1, 2]\n{"last":true}'.encode()
+    for size in (1, 3, len(body)):
+        out = await collect(iter_ndjson, *split_every(body, size))
+        assert out[0] == {"name": "笔", "price": 1}
+        assert out[1][0] == "error" and out[1][1].startswith("invalid JSON")
+        assert out[2:] == [[1, 2], {"last": True}]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_line_without_newline_is_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(bulk, "MAX_RECORD_BYTES", 16)
+    out = await collect(iter_ndjson, b'{"a":1}\n', b'{"b":"' + b"x" * 20)
+    assert out == [{"a": 1}, ("body", "record exceeds 16 bytes")]
+
+
+@pytest.mark.asyncio
+async def test_json_array_elements_across_chunks() -> None:
+    records = [{"name": "墨水", "price": 2.5}, 123456, "x, ]", [1, {"y": None}], True]
+    body = json.dumps(records, ensure_ascii=False).encode()
+    for size in (1, 2, 7, len(body)):
+        assert await collect(iter_json_array, *split_every(body, size)) == records
+    assert await collect(iter_json_array, b" [ ] \n") == []
+
+
+@pytest.mark.parametrize(
+    "body, expected",
+    [
+        (b'[{"a":1} {"b":2}]', [{"a": 1}, ("body", "expected ',' or ']' at '{'")]),
+        (b"[,,1]", [("body", "expected an array element at ','")]),
+        (b"[1,,2]", [1, ("body", "expected an array element at ','")]),
+        (b"[1,]", [1, ("body", "expected an array element at ']'")]),
+        (b"[1] 2", [1, ("body", "unexpected data after the array")]),
+        (b'{"a":1}', [("body", "expected a JSON array")]),
+        (b"", [("body", "expected a JSON array")]),
+        (b"[1, 2 ", [1, 2, ("body", "unterminated JSON array")]),
+    ],
+)
+@pytest.mark.asyncio
+async def test_json_array_separator_errors(body: bytes, expected: list) -> None:
+    assert await collect(iter_json_array, body) == expected
+
+
+@pytest.mark.asyncio
+async def test_pending_element_at_the_end_is_reported() -> None:
+    # 被截断的最后一个数字不能悄悄丢掉，也不能当成完整的值
+    out = await collect(iter_json_array, b"[1,", b"2")
+    assert out == [
+        1,
+        ("error", "truncated JSON value at the end of the body"),
+        ("body", "invalid or truncated JSON array element"),
+    ]
+    out = await collect(iter_json_array, b'[{"a":1}, {"b":')
+    assert out[0] == {"a": 1}
+    assert out[1][0] == "error" and out[1][1].startswith("invalid JSON")
+    assert out[2] == ("body", "invalid or truncated JSON array element")
+
+
+@pytest.mark.asyncio
+async def test_content_type_selects_the_parser() -> None:
+    async def chunks():
+        yield b'{"a":1}\n'
+
+    assert [v async for v in iter_records(chunks(), f"{NDJSON}; charset=utf-8")] == [{"a": 1}]
+    with pytest.raises(BodyError):
+        [v async for v in iter_records(chunks(), "application/json")]
+    assert ndjson_line({"名": 1}) == '{"名":1}\n'.encode()
+
+
+def test_bulk_route_reports_each_record_and_the_body_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    routes = importlib.import_module("02_route_and_request")
+    repo = MemoryRepository()
+    monkeypatch.setattr(routes, "repo", repo)
+    client = TestClient(routes.app)
+
+    body = b'[{"name":"pen","price":1}, {"name":"ink"}, {"op":"delete","id":9}, {"name":"pad","price":'
+    resp = client.post("/items/bulk", content=body, headers={"content-type": "application/json"})
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert resp.status_code == 200
+    assert [line.get("ok") for line in lines[:4]] == [True, False, False, False]
+    assert lines[3]["index"] == 3
+    assert lines[4] == {"error": "invalid or truncated JSON array element"}
+    assert lines[5] == {"summary": {"ok": 1, "failed": 3}}
+    assert repo.get(1)["name"] == "pen"
+
+    resp = client.post("/items/bulk", content=b"[,]", headers={"content-type": "application/json"})
+    assert resp.status_code == 400
+
+
+def test_bulk_ids_must_be_integers_not_booleans(monkeypatch: pytest.MonkeyPatch) -> None:
+    routes = importlib.import_module("02_route_and_request")
+    repo = MemoryRepository()
+    monkeypatch.setattr(routes, "repo", repo)
+    repo.create({"name": "pen", "price": 1})
+
+    body = b"".join(
+        ndjson_line(record)
+        for record in (
+            {"op": "update", "id": True, "name": "ink", "price": 2},
+            {"op": "delete", "id": True},
+            {"op": "delete", "id": "1"},
+        )
+    )
+    resp = TestClient(routes.app).post("/items/bulk", content=body, headers={"content-type": NDJSON})
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["error"] for line in lines[:3]] == ["Field 'id' must be an integer"] * 3
+    assert repo.get(1)["name"] == "pen"
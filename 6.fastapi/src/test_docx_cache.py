@@ -0,0 +1,89 @@
+import asyncio
+import hashlib
+import os
+import pathlib
+import sys
+
+import docx
+import pytest
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from docx_cache import RenderCache, Rendered  # noqa: E402
+
+
+def make_docx(path: pathlib.Path, text: str) -> bytes:
+    document = docx.Document()
+    table = document.add_table(rows=1, cols=2)
+    table.cell(0, 0).text, table.cell(0, 1).text = "名称", text
+    document.save(path)
+    return path.read_bytes()
+
+
+def page(digest: str, size: int) -> Rendered:
+    return Rendered(digest, b"h" * size, b"g" * size)
+
+
+@pytest.fixture
+def cache():
+    cache = RenderCache(workers=1)
+    yield cache
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_same_content_is_converted_once(cache: RenderCache, tmp_path: pathlib.Path) -> None:
+    data = make_docx(tmp_path / "a.docx", "骨干人员")
+    (tmp_path / "copy.docx").write_bytes(data)
+
+    # 同时来的三个请求只转换一次
+    pages = await asyncio.gather(*(cache.render_bytes(data) for _ in range(3)))
+    assert pages[0] is pages[1] is pages[2]
+    assert pages[0].digest == hashlib.sha256(data).hexdigest()
+    assert "骨干人员" in pages[0].html.decode()
+    assert (cache.misses, cache.hits) == (1, 2)
+
+    # 按路径读的、换了名字的同一份内容都命中同一条缓存
+    assert await cache.render_path(tmp_path / "a.docx") is pages[0]
+    assert await cache.render_path(tmp_path / "copy.docx") is pages[0]
+    assert await cache.render_path(tmp_path / "a.docx") is pages[0]
+    stats = cache.stats()
+    assert (stats["documents"], stats["misses"], stats["hits"], stats["converting"]) == (1, 1, 5, 0)
+
+
+@pytest.mark.asyncio
+async def test_changed_file_is_rendered_again(cache: RenderCache, tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "a.docx"
+    make_docx(path, "旧")
+    old = await cache.render_path(path)
+    make_docx(path, "新的内容")
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000))
+    new = await cache.render_path(path)
+    assert new.digest != old.digest and "新的内容" in new.html.decode()
+    assert cache.misses == 2
+
+    with pytest.raises(FileNotFoundError):
+        await cache.render_path(tmp_path / "missing.docx")
+
+
+def test_lru_evicts_by_bytes_and_skips_oversized_pages() -> None:
+    cache = RenderCache(workers=1, max_bytes=300)
+    try:
+        for digest in "abc":
+            cache._store(page(digest, 50))  # 每条 100 字节
+        cache._hit("a")  # a 变成最近用过的
+        cache._store(page("d", 50))
+        assert list(cache._pages) == ["c", "a", "d"]
+        assert (cache.stats()["bytes"], cache.evictions) == (300, 1)
+
+        # 比整个缓存还大的页面不放进来，也不把现有的挤掉
+        cache._store(page("huge", 200))
+        assert list(cache._pages) == ["c", "a", "d"]
+        cache._store(page("e", 100))
+        assert list(cache._pages) == ["d", "e"]
+        assert (cache.stats()["bytes"], cache.evictions) == (300, 3)
+    finally:
+        cache.close()
@@ -0,0 +1,112 @@
+import base64
+import importlib
+import json
+import pathlib
+import random
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from item_repository import (  # noqa: E402
+    ItemFilter,
+    MemoryRepository,
+    SqliteRepository,
+    decode_cursor,
+    encode_cursor,
+    iter_all,
+)
+
+
+FILTERS = [
+    ItemFilter(),
+    ItemFilter(name="pen"),
+    ItemFilter(name="pen", max_price=5),
+    ItemFilter(min_price=2.5),
+    ItemFilter(min_price=1, max_price=6),
+    ItemFilter(max_price=3),
+]
+
+
+def raw(key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+@pytest.fixture
+def repos(tmp_path: pathlib.Path):
+    memory, sqlite = MemoryRepository(), SqliteRepository(str(tmp_path / "items.db"))
+    rng = random.Random(7)
+    for i in range(240):
+        # 价格有大量重复，翻页要靠 (price, id) 区分
+        price = rng.choice([1, 2.5, 2.5, 4, 6, 9])
+        item = {"name": rng.choice(["pen", "ink", "pad"]), "price": price, "description": str(i)}
+        assert memory.create(item) == sqlite.create(item)
+    for item_id in range(1, 240, 9):
+        assert memory.delete(item_id) and sqlite.delete(item_id)
+    for item_id in range(2, 240, 11):
+        memory.patch(item_id, {"price": 3.0})
+        sqlite.patch(item_id, {"price": 3.0})
+    return memory, sqlite
+
+
+def expected(repo: MemoryRepository, filters: ItemFilter) -> list[int]:
+    rows = [repo.get(i) for i in repo._ids]
+    rows = [r for r in rows if filters.match(r["name"], r["price"])]
+    if filters.by_price:
+        rows.sort(key=lambda r: (r["price"], r["id"]))
+    return [r["id"] for r in rows]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_both_backends_page_through_the_same_results(repos, filters: ItemFilter) -> None:
+    memory, sqlite = repos
+    want = expected(memory, filters)
+    for repo in (memory, sqlite):
+        got, cursor, pages = [], None, 0
+        while True:
+            items, cursor = repo.list(filters, 7, cursor)
+            assert len(items) <= 7
+            got += [item["id"] for item in items]
+            pages += 1
+            if cursor is None:
+                break
+        assert got == want
+        assert pages == len(want) // 7 + 1
+        assert [i["id"] for page in iter_all(repo, filters, page_size=50) for i in page] == want
+
+
+def test_cursor_shape_must_match_the_query() -> None:
+    assert decode_cursor(encode_cursor((12,))) == (12,)
+    assert decode_cursor(encode_cursor((2.5, 12)), by_price=True) == (2.5, 12)
+    for key, by_price in [
+        ([2], True),
+        ([{}], False),
+        ([2.5, 12], False),
+        (["1"], False),
+        ([True], False),
+        ([2.5, 1.5], True),
+        ([], False),
+        ({"id": 1}, False),
+    ]:
+        with pytest.raises(ValueError):
+            decode_cursor(raw(key), by_price)
+    with pytest.raises(ValueError):
+        decode_cursor("not base64!")
+    with pytest.raises(ValueError):
+        decode_cursor(base64.urlsafe_b64encode(b"[NaN, 1]").decode(), by_price=True)
+
+
+def test_malformed_cursor_is_a_bad_request(monkeypatch: pytest.MonkeyPatch) -> None:
+    routes = importlib.import_module("02_route_and_request")
+    monkeypatch.setattr(routes, "repo", MemoryRepository())
+    client = TestClient(routes.app)
+    client.post("/items", json={"name": "pen", "price": 1})
+
+    for params in ({"min_price": 0, "cursor": "WzJd"}, {"cursor": raw([{}])}, {"cursor": "%%%"}):
+        assert client.get("/items", params=params).status_code == 400
+    assert client.get("/items", params={"min_price": 0}).json()["items"][0]["name"] == "pen"
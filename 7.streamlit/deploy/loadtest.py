@@ -0,0 +1,247 @@
+"""压测 + 每次重跑的分阶段耗时报告，报告可以在不同提交之间对比。
+
+    python deploy/loadtest.py run src/9.finance_assistant_app.py --users 50 --duration 60 --out base.json
+    python deploy/loadtest.py run ../Color/financial-agent/app.py --pages :1 --users 50 --out fa.json
+    python deploy/loadtest.py compare base.json head.json --threshold 0.10
+
+``run`` 启动应用（``--workers`` 大于 1 时经 ``serve.py`` 的粘性代理），设置 ``STREAMLIT_PERF_LOG``，
+用 locust 无界面模式开 ``--users`` 个 WebSocket 会话压 ``--duration`` 秒（爬坡阶段不计入），
+再把两类数据汇总成一个 JSON 报告：
+
+- ``client``：locust 看到的一次完整重跑的延迟（含网络和前端协议开销）
+- ``server``：应用里 ``perf.rerun`` / ``perf.phase`` 记下的每次重跑总耗时和 fetch / frame / figure /
+  serialize 各阶段耗时，``other`` 是没有归到任何阶段的部分（控件、markdown 等）
+
+``compare`` 逐项比较两个报告的分位数（默认 p95），变慢超过阈值且绝对值超过 ``--min-ms`` 的算回归，
+有回归时退出码为 1，可以直接放进 CI。
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from serve import start_worker, wait_healthy
+
+
+DEPLOY_DIR = Path(__file__).resolve().parent
+PERCENTILES = (50, 90, 95, 99)
+PHASES = ("fetch", "frame", "figure", "serialize")
+ENV_LOG = "STREAMLIT_PERF_LOG"
+
+
+def stats(values: list[float] | np.ndarray) -> dict[str, float]:
+    data = np.asarray(values, dtype=np.float64)
+    if data.size == 0:
+        return {"count": 0}
+    summary = {f"p{p}": round(float(v), 3) for p, v in zip(PERCENTILES, np.percentile(data, PERCENTILES))}
+    summary.update(mean=round(float(data.mean()), 3), max=round(float(data.max()), 3), count=int(data.size))
+    return summary
+
+
+def load_records(path: Path, since: float = 0.0) -> list[dict]:
+    """读应用写的 JSONL；``since`` 之前（爬坡阶段）的记录丢掉。"""
+    if not path.exists():
+        return []
+    with path.open(encoding="utf-8") as fh:
+        records = [json.loads(line) for line in fh if line.strip()]
+    return [r for r in records if r["ts"] >= since]
+
+
+def summarize_server(records: list[dict]) -> dict[str, dict]:
+    """按重跑名字分组：总耗时和每个阶段的分位数。某次重跑没有经过的阶段按 0 计，分位数才可比。"""
+    grouped: dict[str, list[dict]] = {}
+    for record in records:
+        grouped.setdefault(record["name"], []).append(record)
+
+    report = {}
+    for name, rows in sorted(grouped.items()):
+        names = list(PHASES) + sorted({p for r in rows for p in r["phases"]} - set(PHASES))
+        totals = np.array([r["total_ms"] for r in rows])
+        matrix = np.array([[r["phases"].get(p, 0.0) for p in names] for r in rows])
+        phases = {p: stats(matrix[:, i]) for i, p in enumerate(names)}
+        phases["other"] = stats(np.maximum(totals - matrix.sum(axis=1), 0.0))
+        report[name] = {"total": stats(totals), "phases": phases}
+    return report
+
+
+def summarize_client(stats_csv: Path) -> dict[str, dict]:
+    """locust ``--csv`` 的 ``*_stats.csv``：每种请求的计数、失败数和延迟分位数（毫秒）。"""
+    if not stats_csv.exists():
+        return {}
+    report = {}
+    with stats_csv.open(encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            name = "all" if row["Name"] == "Aggregated" else row["Name"]
+            count = int(row["Request Count"])
+            entry: dict[str, float] = {"count": count, "failures": int(row["Failure Count"])}
+            if count:
+                entry.update({f"p{p}": float(row[f"{p}%"]) for p in PERCENTILES})
+                entry["mean"] = round(float(row["Average Response Time"]), 3)
+                entry["max"] = float(row["Max Response Time"])
+            report[name] = entry
+    return report
+
+
+def git_revision(cwd: Path) -> str:
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=cwd, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain"], cwd=cwd, capture_output=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return sha + ("-dirty" if dirty.strip() else "")
+
+
+def start_app(app: Path, args: argparse.Namespace, env: dict[str, str]) -> subprocess.Popen:
+    if args.workers <= 1:
+        return start_worker(app, args.port, env)
+    cmd = [
+        sys.executable, str(DEPLOY_DIR / "serve.py"), str(app),
+        "--workers", str(args.workers), "--port", str(args.port), "--host", "127.0.0.1",
+    ]
+    if args.no_publisher:
+        cmd.append("--no-publisher")
+    return subprocess.Popen(cmd, env=env)
+
+
+def stop(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def run(args: argparse.Namespace) -> int:
+    app = args.app.resolve()
+    workdir = Path(tempfile.mkdtemp(prefix="loadtest-"))
+    perf_log = workdir / "perf.jsonl"
+    env = dict(os.environ, **{ENV_LOG: str(perf_log), "LOAD_PAGES": args.pages})
+
+    server = start_app(app, args, env)
+    try:
+        if not wait_healthy(args.port):
+            print(f"app did not become healthy on port {args.port}", file=sys.stderr)
+            return 2
+        ramp = args.users / args.spawn_rate
+        started = time.time()
+        cmd = [
+            sys.executable, "-m", "locust", "-f", str(DEPLOY_DIR / "locustfile.py"),
+            "--headless", "--only-summary", "--reset-stats", "--loglevel", "WARNING",
+            "-u", str(args.users), "-r", str(args.spawn_rate), "-t", f"{ramp + args.duration:.0f}s",
+            "--host", f"http://127.0.0.1:{args.port}", "--csv", str(workdir / "locust"),
+        ]
+        # 有失败请求时 locust 退出码非 0，失败数会写进报告，这里不当作出错
+        subprocess.run(cmd, env=env, check=False)
+    finally:
+        stop(server)
+
+    report = {
+        "meta": {
+            "app": str(args.app),
+            "revision": git_revision(app.parent),
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "users": args.users,
+            "spawn_rate": args.spawn_rate,
+            "duration_s": args.duration,
+            "workers": args.workers,
+            "pages": args.pages,
+        },
+        "client": summarize_client(workdir / "locust_stats.csv"),
+        "server": summarize_server(load_records(perf_log, since=started + ramp)),
+    }
+    out = args.out or Path(f"loadtest-{report['meta']['revision']}.json")
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print_report(report)
+    print(f"\nreport written to {out}")
+    return 0
+
+
+def print_report(report: dict) -> None:
+    meta = report["meta"]
+    print(f"{meta['app']} @ {meta['revision']}  users={meta['users']} workers={meta['workers']} {meta['duration_s']}s")
+    print(f"\n{'client (ms)':32}{'count':>8}{'fail':>6}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, s in report["client"].items():
+        print(f"{name:32}{s['count']:>8}{s['failures']:>6}{s.get('p50', 0):>9.1f}{s.get('p95', 0):>9.1f}{s.get('p99', 0):>9.1f}")
+    print(f"\n{'server p95 (ms)':24}{'count':>8}{'total':>9}" + "".join(f"{p:>11}" for p in (*PHASES, "other")))
+    for name, s in report["server"].items():
+        phases = "".join(f"{s['phases'].get(p, {}).get('p95', 0):>11.1f}" for p in (*PHASES, "other"))
+        print(f"{name:24}{s['total']['count']:>8}{s['total']['p95']:>9.1f}{phases}")
+
+
+def flatten(report: dict, metric: str) -> dict[str, float]:
+    """报告摊平成 ``"server/panel:market/figure" -> 毫秒``，两个报告按同样的键对比。"""
+    flat = {}
+    for name, s in report.get("client", {}).items():
+        if metric in s:
+            flat[f"client/{name}"] = s[metric]
+    for name, s in report.get("server", {}).items():
+        if metric in s["total"]:
+            flat[f"server/{name}/total"] = s["total"][metric]
+        for phase, p in s["phases"].items():
+            if metric in p:
+                flat[f"server/{name}/{phase}"] = p[metric]
+    return flat
+
+
+def compare(args: argparse.Namespace) -> int:
+    base = json.loads(args.base.read_text(encoding="utf-8"))
+    head = json.loads(args.head.read_text(encoding="utf-8"))
+    old, new = flatten(base, args.metric), flatten(head, args.metric)
+    print(f"{args.metric} (ms): {base['meta']['revision']} -> {head['meta']['revision']}")
+    print(f"{'':48}{'base':>10}{'head':>10}{'change':>10}")
+    regressions = 0
+    for key in sorted(old.keys() | new.keys()):
+        if key not in old or key not in new:
+            print(f"{key:48}{old.get(key, float('nan')):>10.1f}{new.get(key, float('nan')):>10.1f}{'n/a':>10}")
+            continue
+        a, b = old[key], new[key]
+        change = (b - a) / a if a else (0.0 if b == a else float("inf"))
+        worse = change > args.threshold and b - a >= args.min_ms
+        regressions += worse
+        print(f"{key:48}{a:>10.1f}{b:>10.1f}{change:>+10.1%}" + ("  REGRESSION" if worse else ""))
+    print(f"\n{regressions} regression(s) over {args.threshold:.0%} / {args.min_ms} ms")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Streamlit 应用压测与分阶段耗时报告")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="压测一个应用并写出报告")
+    p_run.add_argument("app", type=Path)
+    p_run.add_argument("--pages", default="market_board:3,sentiment_board:2,:1", help="页面和权重，空名字是首页")
+    p_run.add_argument("--users", type=int, default=20)
+    p_run.add_argument("--spawn-rate", type=float, default=5.0)
+    p_run.add_argument("--duration", type=int, default=60, help="爬坡结束后计入报告的秒数")
+    p_run.add_argument("--workers", type=int, default=1)
+    p_run.add_argument("--no-publisher", action="store_true")
+    p_run.add_argument("--port", type=int, default=8701)
+    p_run.add_argument("--out", type=Path)
+    p_run.set_defaults(func=run)
+
+    p_cmp = sub.add_parser("compare", help="对比两个报告")
+    p_cmp.add_argument("base", type=Path)
+    p_cmp.add_argument("head", type=Path)
+    p_cmp.add_argument("--metric", default="p95", choices=[f"p{p}" for p in PERCENTILES] + ["mean"])
+    p_cmp.add_argument("--threshold", type=float, default=0.10, help="相对变慢多少算回归")
+    p_cmp.add_argument("--min-ms", type=float, default=1.0, help="绝对变化小于这个值不算回归")
+    p_cmp.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""压测多进程部署：每个虚拟用户模拟一个浏览器会话。
+
+    pip install locust websocket-client
+    python deploy/serve.py src/9.finance_assistant_app.py --workers 4
+    locust -f deploy/locustfile.py --host http://127.0.0.1:8501 -u 200 -r 20
+
+每个用户先 ``GET /`` 拿到代理的粘性 cookie，再打开 ``/_stcore/stream`` 的 WebSocket，
+按 Streamlit 前端的协议发送 ``BackMsg.rerun_script``，读 ``ForwardMsg`` 直到 ``script_finished``；
+一次完整重跑记为一个请求。分别用 ``--workers 1/2/4`` 启动 serve.py，比较 p95 延迟不超标时
+单机能承载的并发会话数。
+
+``LOAD_PAGES`` 指定要重跑的页面和权重，如 ``market_board:3,sentiment_board:2,:1``（空名字是首页）；
+压 financial-agent 这类单页应用时设为 ``:1``。``loadtest.py`` 会替你设置它并汇总服务端分阶段耗时。
+"""
+from __future__ import annotations
+
+import os
+import random
+import time
+
+import websocket
+from locust import HttpUser, between, task
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+
+DEFAULT_PAGES = "market_board:3,sentiment_board:2,:1"
+
+
+def parse_pages(spec: str) -> tuple[list[str], list[float]]:
+    """``"market_board:3,:1"`` -> (["market_board", ""], [3.0, 1.0])；不写权重时为 1。"""
+    names, weights = [], []
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition(":")
+        names.append(name.strip())
+        weights.append(float(weight) if weight.strip() else 1.0)
+    return names, weights
+
+
+PAGES, WEIGHTS = parse_pages(os.getenv("LOAD_PAGES", DEFAULT_PAGES))
+
+
+def rerun_message(page_name: str = "", query_string: str = "") -> bytes:
+    """浏览器打开页面、切换页面或操作控件时发送的重跑请求（这里不带控件状态）。"""
+    msg = BackMsg()
+    msg.rerun_script.query_string = query_string
+    msg.rerun_script.page_name = page_name
+    return msg.SerializeToString()
+
+
+def read_until_finished(ws: websocket.WebSocket) -> int:
+    """读取服务端推送的 ForwardMsg 直到脚本跑完，返回收到的总字节数。"""
+    received = 0
+    while True:
+        data = ws.recv()
+        received += len(data)
+        msg = ForwardMsg()
+        msg.ParseFromString(data)
+        if msg.WhichOneof("type") == "script_finished":
+            if msg.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                raise RuntimeError("script failed to compile")
+            return received
+
+
+class StreamlitSession(HttpUser):
+    wait_time = between(1, 3)
+
+    def on_start(self) -> None:
+        self.client.get("/", name="GET /")
+        cookie = "; ".join(f"{k}={v}" for k, v in self.client.cookies.items())
+        url = self.host.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream"
+        self.ws = websocket.create_connection(
+            url,
+            subprotocols=["streamlit"],
+            header=[f"Cookie: {cookie}"],
+            origin=self.host.rstrip("/"),
+        )
+
+    def on_stop(self) -> None:
+        self.ws.close()
+
+    def _rerun(self, page_name: str) -> None:
+        start = time.perf_counter()
+        received, error = 0, None
+        try:
+            self.ws.send_binary(rerun_message(page_name))
+            received = read_until_finished(self.ws)
+        except Exception as exc:  # noqa: BLE001 - 交给 locust 记为失败
+            error = exc
+        self.environment.events.request.fire(
+            request_type="WS",
+            name=f"rerun {page_name or 'home'}",
+            response_time=(time.perf_counter() - start) * 1000,
+            response_length=received,
+            exception=error,
+            context={},
+        )
+
+    @task
+    def rerun_page(self) -> None:
+        self._rerun(random.choices(PAGES, WEIGHTS)[0])
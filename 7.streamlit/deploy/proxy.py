@@ -0,0 +1,183 @@
+"""带会话粘性的本地反向代理（asyncio，只用标准库）。
+
+Streamlit 的会话状态、上传文件和媒体文件都保存在某一个工作进程里，同一浏览器的所有请求
+（包括 ``/_stcore/stream`` 的 WebSocket 和断线重连）必须落到同一个进程。代理第一次见到浏览器时
+选连接数最少的工作进程，并用 ``Set-Cookie: st_worker=<编号>`` 记住；之后按 cookie 转发。
+WebSocket 握手完成后直接双向转发字节；普通 HTTP 请求改成 ``Connection: close``，一个连接一个请求，
+不需要解析响应体的分帧。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+
+
+logger = logging.getLogger("proxy")
+
+COOKIE = "st_worker"
+MAX_HEAD = 64 * 1024
+_COOKIE_RE = re.compile(rf"(?:^|;\s*){COOKIE}=(\d+)")
+
+
+@dataclass
+class Backend:
+    host: str
+    port: int
+    active: int = 0
+    total: int = 0
+    failures: int = 0
+    healthy: bool = True
+
+
+@dataclass
+class Request:
+    line: bytes
+    headers: list[tuple[bytes, bytes]] = field(default_factory=list)
+
+    def get(self, name: bytes) -> bytes | None:
+        for key, value in self.headers:
+            if key.lower() == name:
+                return value
+        return None
+
+    def set(self, name: bytes, value: bytes) -> None:
+        self.headers = [(k, v) for k, v in self.headers if k.lower() != name.lower()]
+        self.headers.append((name, value))
+
+    @property
+    def is_websocket(self) -> bool:
+        upgrade = (self.get(b"upgrade") or b"").lower()
+        connection = (self.get(b"connection") or b"").lower()
+        return upgrade == b"websocket" and b"upgrade" in connection
+
+    def encode(self) -> bytes:
+        lines = [self.line] + [k + b": " + v for k, v in self.headers]
+        return b"\r\n".join(lines) + b"\r\n\r\n"
+
+
+def parse_head(head: bytes) -> Request:
+    line, *rest = head.rstrip(b"\r\n").split(b"\r\n")
+    request = Request(line)
+    for raw in rest:
+        key, _, value = raw.partition(b":")
+        request.headers.append((key.strip(), value.strip()))
+    return request
+
+
+def sticky_index(request: Request, count: int) -> int | None:
+    cookie = (request.get(b"cookie") or b"").decode("latin-1")
+    match = _COOKIE_RE.search(cookie)
+    if match is None:
+        return None
+    index = int(match.group(1))
+    return index if 0 <= index < count else None
+
+
+async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while data := await reader.read(64 * 1024):
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        try:
+            if writer.can_write_eof():
+                writer.write_eof()
+        except (OSError, RuntimeError):
+            pass
+
+
+class StickyProxy:
+    def __init__(self, backends: list[tuple[str, int]], connect_timeout: float = 3.0) -> None:
+        self.backends = [Backend(host, port) for host, port in backends]
+        self.connect_timeout = connect_timeout
+
+    def _pick(self, exclude: set[int]) -> int:
+        candidates = [i for i, b in enumerate(self.backends) if i not in exclude and b.healthy]
+        if not candidates:
+            candidates = [i for i in range(len(self.backends)) if i not in exclude]
+        return min(candidates, key=lambda i: (self.backends[i].active, self.backends[i].total))
+
+    async def _connect(self, request: Request) -> tuple[int, bool, asyncio.StreamReader, asyncio.StreamWriter]:
+        index = sticky_index(request, len(self.backends))
+        assign = index is None
+        tried: set[int] = set()
+        while True:
+            if index is None or index in tried:
+                index, assign = self._pick(tried), True
+            backend = self.backends[index]
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(backend.host, backend.port), self.connect_timeout
+                )
+                backend.healthy, backend.failures = True, 0
+                return index, assign, reader, writer
+            except (OSError, asyncio.TimeoutError):
+                backend.failures += 1
+                backend.healthy = False
+                tried.add(index)
+                logger.warning("worker %d (%s:%d) unreachable", index, backend.host, backend.port)
+                if len(tried) == len(self.backends):
+                    raise
+
+    async def handle(self, client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter) -> None:
+        try:
+            head = await client_reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            client_writer.close()
+            return
+
+        request = parse_head(head)
+        if not request.is_websocket:
+            request.set(b"Connection", b"close")
+        peer = client_writer.get_extra_info("peername")
+        if peer:
+            request.set(b"X-Forwarded-For", str(peer[0]).encode())
+
+        try:
+            index, assign, upstream_reader, upstream_writer = await self._connect(request)
+        except (OSError, asyncio.TimeoutError):
+            client_writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await client_writer.drain()
+            client_writer.close()
+            return
+
+        backend = self.backends[index]
+        backend.active += 1
+        backend.total += 1
+        try:
+            upstream_writer.write(request.encode())
+            await upstream_writer.drain()
+            if assign:
+                # 在响应头里加上粘性 cookie，之后这个浏览器的所有请求都会回到这个工作进程
+                response_head = await upstream_reader.readuntil(b"\r\n\r\n")
+                cookie = f"Set-Cookie: {COOKIE}={index}; Path=/; HttpOnly; SameSite=Lax\r\n".encode()
+                client_writer.write(response_head[:-2] + cookie + b"\r\n")
+                await client_writer.drain()
+            # 以上游的响应流为准：它结束（HTTP 响应发完或 WebSocket 关闭）就结束整个连接
+            upload = asyncio.create_task(_pipe(client_reader, upstream_writer))
+            try:
+                await _pipe(upstream_reader, client_writer)
+            finally:
+                upload.cancel()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            backend.active -= 1
+            for writer in (upstream_writer, client_writer):
+                writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEAD)
+        logger.info("proxy listening on http://%s:%d -> %d workers", host, port, len(self.backends))
+        async with server:
+            await server.serve_forever()
+
+    def stats(self) -> list[dict[str, object]]:
+        return [
+            {"worker": i, "port": b.port, "active": b.active, "total": b.total, "healthy": b.healthy}
+            for i, b in enumerate(self.backends)
+        ]
@@ -0,0 +1,75 @@
+"""发布进程：全机只推进一份行情/舆情、维护一份销售立方体，定时把快照写进共享内存。
+
+一般由 ``serve.py`` 启动；单独运行：
+
+    STREAMLIT_SNAPSHOT_DIR=/dev/shm/streamlit-snapshots python deploy/publisher.py
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from lib import snapshots  # noqa: E402
+from lib.mock_data import HISTORY_POINTS, TickGenerator, history_snapshot, market_snapshot, sentiment_snapshot  # noqa: E402
+from lib.rollup import SalesCube, cube_snapshot  # noqa: E402
+
+
+logger = logging.getLogger("publisher")
+
+DEFAULT_SYMBOLS = ["AAPL", "MSFT", "NVDA", "TSLA", "BTC-USD"]
+DEFAULT_TOPICS = ["AI", "半导体", "美联储", "新能源", "加密"]
+
+
+def publish_once(gen: TickGenerator, cube: SalesCube, first: bool) -> None:
+    gen.market(sorted(set(DEFAULT_SYMBOLS) | snapshots.subscriptions("market")))
+    gen.sentiment(sorted(set(DEFAULT_TOPICS) | snapshots.subscriptions("sentiment")))
+    gen.tick()
+    snapshots.publish("market", market_snapshot(gen))
+    snapshots.publish("sentiment", sentiment_snapshot(gen))
+    snapshots.publish("market_history", history_snapshot(gen, gen.market_history))
+    snapshots.publish("sentiment_history", history_snapshot(gen, gen.sentiment_history))
+    if cube.refresh() or first:
+        snapshots.publish("sales_cube", cube_snapshot(cube))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", default=os.getenv(snapshots.ENV_DIR, "/dev/shm/streamlit-snapshots"))
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--history", type=int, default=HISTORY_POINTS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    os.environ[snapshots.ENV_DIR] = args.dir
+    running = True
+
+    def stop(*_: object) -> None:
+        nonlocal running
+        running = False
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    gen = TickGenerator(history_points=args.history, min_interval=float("inf"))
+    cube = SalesCube()
+    logger.info("publishing snapshots to %s every %.1fs", args.dir, args.interval)
+    first = True
+    while running:
+        started = time.monotonic()
+        try:
+            publish_once(gen, cube, first)
+            first = False
+        except Exception:
+            logger.exception("publish failed")
+        time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""多进程部署：N 个 Streamlit 工作进程 + 一个发布进程 + 一个带会话粘性的反向代理。
+
+    python deploy/serve.py src/9.finance_assistant_app.py --workers 4 --port 8501
+    python deploy/serve.py ../Color/financial-agent/app.py --workers 4 --no-publisher
+
+每个工作进程有自己的 GIL，pandas 计算和 Plotly 序列化不再互相排队；行情、舆情和销售立方体
+由发布进程写进共享内存（``lib/snapshots.py``），工作进程内存映射读取，不重复计算、不复制。
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from proxy import StickyProxy
+
+
+logger = logging.getLogger("serve")
+DEPLOY_DIR = Path(__file__).resolve().parent
+
+
+def default_snapshot_dir() -> str:
+    shm = Path("/dev/shm")
+    base = shm if shm.is_dir() else Path(tempfile.gettempdir())
+    return str(base / "streamlit-snapshots")
+
+
+def start_worker(app: Path, port: int, env: dict[str, str]) -> subprocess.Popen:
+    cmd = [
+        sys.executable, "-m", "streamlit", "run", str(app),
+        f"--server.port={port}",
+        "--server.address=127.0.0.1",
+        "--server.headless=true",
+        "--browser.gatherUsageStats=false",
+    ]
+    return subprocess.Popen(cmd, cwd=app.parent, env=env)
+
+
+def wait_healthy(port: int, timeout: float = 60.0) -> bool:
+    deadline = time.monotonic() + timeout
+    url = f"http://127.0.0.1:{port}/_stcore/health"
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1.0) as resp:
+                if resp.status == 200:
+                    return True
+        except OSError:
+            time.sleep(0.3)
+    return False
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="多进程 Streamlit 部署")
+    parser.add_argument("app", type=Path)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8501)
+    parser.add_argument("--base-port", type=int, default=8600, help="工作进程监听 base-port、base-port+1 ...")
+    parser.add_argument("--snapshot-dir", default=default_snapshot_dir())
+    parser.add_argument("--no-publisher", action="store_true", help="应用不读共享快照时（如 financial-agent）不启动发布进程")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    # 被 SIGTERM 停掉时也要走 finally，把子进程一起关掉
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    app = args.app.resolve()
+    env = dict(os.environ)
+    children: list[subprocess.Popen] = []
+
+    if not args.no_publisher:
+        env["STREAMLIT_SNAPSHOT_DIR"] = args.snapshot_dir
+        children.append(
+            subprocess.Popen([sys.executable, str(DEPLOY_DIR / "publisher.py"), "--dir", args.snapshot_dir], env=env)
+        )
+
+    ports = [args.base_port + i for i in range(args.workers)]
+    try:
+        children.extend(start_worker(app, port, env) for port in ports)
+        for port in ports:
+            if not wait_healthy(port):
+                logger.warning("worker on port %d is not healthy yet", port)
+        proxy = StickyProxy([("127.0.0.1", port) for port in ports])
+        asyncio.run(proxy.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for child in children:
+            child.terminate()
+        for child in children:
+            try:
+                child.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                child.kill()
+
+
+if __name__ == "__main__":
+    main()
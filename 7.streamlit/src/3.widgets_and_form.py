@@ -1,6 +1,11 @@
 import pandas as pd
 import streamlit as st
 
+from lib.ingest import CsvIngest, for_upload
+
+PAGE_SIZE = 50
+MB = 1 << 20
+
 st.set_page_config(page_title="交互控件", page_icon="🎛️", layout="wide")
 
 st.title("交互控件与表单")
@@ -26,6 +31,42 @@ if submitted:
     st.success(f"建议：{symbol} 目标仓位约 {position:,}（{style}）")
 
 uploaded = st.file_uploader("上传 CSV（可选）", type=["csv"])
-if uploaded is not None:
-    up_df = pd.read_csv(uploaded)
-    st.dataframe(up_df.head(20), width="stretch")
+# 在后台线程里分块解析成临时 Parquet；脚本线程只显示进度和预览，大文件也不会卡住页面
+job = for_upload(st.session_state, uploaded)
+
+
+@st.fragment(run_every=0.5 if job is not None and job.running else None)
+def upload_panel(job: CsvIngest, polling: bool) -> None:
+    if job.running:
+        text = f"解析 {job.name}：{job.bytes_read / MB:,.0f} / {job.size / MB:,.0f} MB，{job.rows:,} 行"
+        st.progress(job.progress, text=text)
+        if st.button("取消解析"):
+            job.cancel()
+        preview = job.preview()
+        if not preview.empty:
+            st.dataframe(preview, width="stretch")
+        return
+    if polling:
+        # 解析刚结束：整页重跑一次，停掉定时刷新
+        st.rerun()
+
+    if not job.ok:
+        st.error(f"解析失败：{job.error}")
+        return
+    st.success(
+        f"{job.name}：{job.rows:,} 行 × {len(job.schema)} 列，用时 {job.elapsed:.1f}s，"
+        f"临时 Parquet {job.parquet_bytes / MB:,.1f} MB"
+    )
+    if job.relaxed:
+        st.caption("样本推断的列类型与后面的数据不符，已把整数列放宽为浮点、日期列按字符串重新解析。")
+    with st.expander("推断的列类型"):
+        types = pd.DataFrame({"列": job.schema.names, "类型": [str(t) for t in job.schema.types]})
+        st.dataframe(types, hide_index=True)
+    pages = max(1, -(-job.rows // PAGE_SIZE))
+    page = st.number_input(f"页码（共 {pages} 页）", min_value=1, max_value=pages, value=1, step=1, key="upload_page")
+    frame, _ = job.page(int(page) - 1, PAGE_SIZE)
+    st.dataframe(frame, width="stretch")
+
+
+if job is not None:
+    upload_panel(job, job.running)
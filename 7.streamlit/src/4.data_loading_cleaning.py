@@ -1,28 +1,30 @@
-from pathlib import Path
-
-import pandas as pd
 import streamlit as st
 
+from lib.datasets import cached_clean, cached_distinct, read_page, row_count
+
 st.set_page_config(page_title="数据处理", page_icon="🧹", layout="wide")
 st.title("数据加载与清洗")
 
-base = Path(__file__).resolve().parent / "sample_data" / "sales.csv"
-df = pd.read_csv(base)
+PAGE_SIZE = 50
 
-default_regions = sorted(df["region"].unique().tolist())
+# 取值列表和清洗结果都按文件 mtime 缓存；文件没变，重跑不会再读一遍
+default_regions = cached_distinct("region")
 
 with st.sidebar:
     regions = st.multiselect("地区", default_regions, default=default_regions)
     min_revenue = st.slider("最小收入", 50, 500, 100)
 
-cleaned = (
-    df.dropna(subset=["date", "region", "revenue", "orders"])
-    .query("region in @regions and revenue >= @min_revenue")
-    .sort_values("date")
-)
+# 逐块读取，每块先按地区/收入过滤、去掉缺失值，只保留满足条件的行
+cleaned = cached_clean(regions, min_revenue)
 
 st.subheader("原始数据")
-st.dataframe(df, width="stretch", hide_index=True)
+# 只把当前这一页发给浏览器
+total = row_count()
+pages = max(1, -(-total // PAGE_SIZE))
+raw_page = st.number_input(f"页码（共 {pages} 页）", min_value=1, max_value=pages, value=1, step=1)
+raw, _ = read_page(int(raw_page) - 1, PAGE_SIZE)
+st.dataframe(raw, width="stretch")
+st.caption(f"共 {total:,} 行，每页 {PAGE_SIZE} 行")
 
 st.subheader("清洗后数据")
 st.dataframe(cleaned, width="stretch", hide_index=True)
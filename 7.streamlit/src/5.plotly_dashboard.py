@@ -1,25 +1,31 @@
-from pathlib import Path
-
-import pandas as pd
 import plotly.express as px
 import streamlit as st
 
+from lib.rollup import SalesCube, open_cube
+
 st.set_page_config(page_title="可视化", page_icon="📈", layout="wide")
 st.title("Plotly 交互看板")
 
-base = Path(__file__).resolve().parent / "sample_data" / "sales.csv"
-df = pd.read_csv(base)
-df["date"] = pd.to_datetime(df["date"])
+
+@st.cache_resource
+def get_cube() -> SalesCube:
+    return open_cube()
+
+
+# 所有筛选都从预聚合立方体回答；refresh 只读入 CSV 新追加的行
+cube = get_cube()
+cube.refresh()
 
 with st.sidebar:
-    region = st.selectbox("地区", ["全部"] + sorted(df["region"].unique().tolist()))
+    region = st.selectbox("地区", ["全部"] + cube.regions())
+    product = st.selectbox("产品", ["全部"] + cube.products())
 
-if region != "全部":
-    show = df[df["region"] == region]
-else:
-    show = df.copy()
+filters = dict(
+    region=None if region == "全部" else region,
+    product=None if product == "全部" else product,
+)
 
-show_daily = show.groupby("date", as_index=False).agg(revenue=("revenue", "sum"), orders=("orders", "sum"))
+show_daily = cube.rollup("date", **filters)
 
 c1, c2 = st.columns(2)
 with c1:
@@ -27,8 +33,11 @@ with c1:
     st.plotly_chart(line, width="stretch")
 
 with c2:
-    bar = px.bar(show.groupby("region", as_index=False)["revenue"].sum(), x="region", y="revenue", title="地区收入")
+    bar = px.bar(cube.rollup("region", **filters), x="region", y="revenue", title="地区收入")
     st.plotly_chart(bar, width="stretch")
 
-scatter = px.scatter(show, x="orders", y="revenue", color="region", title="订单与收入关系")
+# 每个点是一天 × 一个地区 × 一个产品的合计，点数与原始行数无关
+scatter = px.scatter(cube.slice(**filters), x="orders", y="revenue", color="region", title="订单与收入关系")
 st.plotly_chart(scatter, width="stretch")
+
+st.caption(f"原始记录 {cube.raw_rows:,} 行，汇总单元格 {len(cube.cells):,} 个")
@@ -1,28 +1,38 @@
 import streamlit as st
 
+from lib.session_store import IDLE_SECONDS, Slot, render_session_stats, session_state
+
 st.set_page_config(page_title="状态管理", page_icon="🧠", layout="centered")
 st.title("Session State 示例")
 
-if "count" not in st.session_state:
-    st.session_state.count = 0
-
-if "todos" not in st.session_state:
-    st.session_state.todos = []
+# 受管字段：写入时检查类型并记账；todos 是历史类字段，超出上限或会话预算时丢掉最早的任务
+state = session_state(
+    count=Slot(int),
+    todos=Slot(list, history=True, max_items=500),
+)
+if state.reaped:
+    st.info(f"会话闲置超过 {IDLE_SECONDS / 60:.0f} 分钟，状态已被回收，已重置为默认值。")
 
 col1, col2, col3 = st.columns(3)
 if col1.button("+1"):
-    st.session_state.count += 1
+    state.count += 1
 if col2.button("-1"):
-    st.session_state.count -= 1
+    state.count -= 1
 if col3.button("重置"):
-    st.session_state.count = 0
+    state.count = 0
 
-st.metric("当前计数", st.session_state.count)
+st.metric("当前计数", state.count)
 
 st.subheader("Todo 列表")
 item = st.text_input("新增任务")
 if st.button("添加任务") and item.strip():
-    st.session_state.todos.append(item.strip())
+    state.append("todos", item.strip())
 
-for idx, todo in enumerate(st.session_state.todos, start=1):
+dropped = state.dropped.get("todos", 0)
+if dropped:
+    st.caption(f"更早的 {dropped} 条任务已丢弃")
+for idx, todo in enumerate(state.todos, start=dropped + 1):
     st.write(f"{idx}. {todo}")
+
+with st.expander("会话内存"):
+    render_session_stats(state)
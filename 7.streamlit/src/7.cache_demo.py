@@ -4,11 +4,14 @@ import numpy as np
 import pandas as pd
 import streamlit as st
 
+from lib.cache import bounded_cache, render_cache_stats
+
 st.set_page_config(page_title="缓存", page_icon="⚡", layout="wide")
 st.title("缓存机制示例")
 
 
-@st.cache_data(ttl=60)
+# 按返回值实际占用的字节数做 LRU 淘汰：滑块拖遍所有位置，内存也不会超过 2 MB
+@bounded_cache(max_bytes=2 << 20, ttl=60)
 def heavy_dataframe(rows: int) -> pd.DataFrame:
     time.sleep(1.5)
     return pd.DataFrame(
@@ -25,6 +28,9 @@ def load_resource() -> dict:
     return {"model_name": "demo-model", "version": "1.0"}
 
 
+# 进程启动后第一次打开页面时，在后台把常用的滑块取值先算好
+heavy_dataframe.warm([(5000,), (10000,), (20000,)])
+
 rows = st.slider("数据量", min_value=1000, max_value=20000, value=5000, step=1000)
 
 with st.spinner("加载数据中..."):
@@ -35,3 +41,6 @@ resource = load_resource()
 st.success(f"resource loaded: {resource['model_name']}@{resource['version']}")
 st.line_chart(df.set_index("x"), y="y", width="stretch")
 st.dataframe(df.head(20), width="stretch")
+
+with st.expander("缓存统计"):
+    render_cache_stats([heavy_dataframe])
@@ -1,35 +1,40 @@
 import random
-import time
 from datetime import datetime
 
 import pandas as pd
 import streamlit as st
 
+from lib.session_store import Slot, session_state
+
 st.set_page_config(page_title="实时面板", page_icon="📡", layout="wide")
 st.title("实时刷新面板")
 
-if "prices" not in st.session_state:
-    st.session_state.prices = {"AAPL": 195.0, "NVDA": 720.0, "TSLA": 200.0}
+# 价格放在受管字段里：闲置的会话由后台线程回收，不会一直占着内存
+PRICES = Slot(dict, default=lambda: {"AAPL": 195.0, "NVDA": 720.0, "TSLA": 200.0})
 
 with st.sidebar:
     auto = st.toggle("自动刷新", value=True)
     interval = st.slider("刷新间隔（秒）", 2, 10, 3)
 
-rows = []
-for symbol, price in st.session_state.prices.items():
-    next_price = max(1.0, price * (1 + random.gauss(0, 0.004)))
-    st.session_state.prices[symbol] = next_price
-    rows.append({"symbol": symbol, "price": round(next_price, 2)})
 
-df = pd.DataFrame(rows)
+# 只有这个 fragment 按 run_every 定时重跑：两次刷新之间不占用脚本线程，标题和侧边栏也不会重跑
+@st.fragment(run_every=interval if auto else None)
+def price_panel() -> None:
+    # 在 fragment 里取：定时刷新只重跑这个函数，也要刷新会话的最后活跃时间
+    state = session_state(prices=PRICES)
+    prices = {symbol: max(1.0, price * (1 + random.gauss(0, 0.004))) for symbol, price in state.prices.items()}
+    # 整体赋值而不是原地修改，字节数才会重新计算
+    state.prices = prices
+    rows = [{"symbol": symbol, "price": round(price, 2)} for symbol, price in prices.items()]
+
+    df = pd.DataFrame(rows)
+
+    cols = st.columns(len(df))
+    for i, row in df.iterrows():
+        cols[i].metric(row["symbol"], f"{row['price']:.2f}")
 
-cols = st.columns(len(df))
-for i, row in df.iterrows():
-    cols[i].metric(row["symbol"], f"{row['price']:.2f}")
+    st.dataframe(df, width="stretch", hide_index=True)
+    st.caption(f"更新时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-st.dataframe(df, width="stretch", hide_index=True)
-st.caption(f"更新时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-if auto:
-    time.sleep(interval)
-    st.rerun()
+price_panel()
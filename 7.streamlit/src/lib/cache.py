@@ -0,0 +1,228 @@
+"""按字节数限额的 LRU 缓存，带命中统计和预热。
+
+``st.cache_data`` 只能按条目数（``max_entries``）或 TTL 限制，看不到每个函数到底占了多少内存；
+这里按返回值的实际字节数淘汰，并记录命中/未命中/耗时，方便评估上线需要多少内存：
+
+    @bounded_cache(max_bytes=64 << 20)
+    def heavy_dataframe(rows: int) -> pd.DataFrame: ...
+
+    heavy_dataframe.warm([(5000,), (10000,)])   # 启动时在后台预热常用参数
+    render_cache_stats()                        # 在页面上显示统计
+
+缓存是进程级的，所有会话共用；返回值是共享对象，调用方不要原地修改。
+"""
+from __future__ import annotations
+
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import update_wrapper
+from typing import Any, Callable, Hashable, Iterable
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+
+def sizeof(value: Any) -> int:
+    """估算返回值占用的字节数。"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+@dataclass
+class CacheStats:
+    name: str
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    oversized: int = 0
+    entries: int = 0
+    bytes: int = 0
+    max_bytes: int = 0
+    hit_seconds: float = 0.0
+    miss_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def row(self) -> dict[str, Any]:
+        return {
+            "function": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+            "entries": self.entries,
+            "MB": round(self.bytes / 2**20, 2),
+            "limit_MB": round(self.max_bytes / 2**20, 2),
+            "evictions": self.evictions,
+            "avg_hit_ms": round(self.hit_seconds / self.hits * 1000, 3) if self.hits else None,
+            "avg_miss_ms": round(self.miss_seconds / self.misses * 1000, 1) if self.misses else None,
+        }
+
+
+class BoundedCache:
+    """一个函数的缓存：按 LRU 淘汰，直到总字节数不超过 max_bytes。
+
+    同一个 key 同时未命中时只计算一次（其余调用等它算完），避免大量会话同时打到慢函数上。
+    """
+
+    def __init__(
+        self,
+        func: Callable[..., Any],
+        max_bytes: int,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.func = func
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: OrderedDict[Hashable, tuple[Any, int, float]] = OrderedDict()
+        self._inflight: dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._warmed = False
+        self.stats = CacheStats(name=func.__qualname__, max_bytes=max_bytes)
+        update_wrapper(self, func)
+
+    @staticmethod
+    def make_key(args: tuple, kwargs: dict) -> Hashable:
+        return args, tuple(sorted(kwargs.items()))
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        key = self.make_key(args, kwargs)
+        start = time.perf_counter()
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and (self.ttl is None or self.clock() - entry[2] < self.ttl):
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    self.stats.hit_seconds += time.perf_counter() - start
+                    return entry[0]
+                if entry is not None:
+                    self._drop(key)
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    break
+            event.wait()
+
+        try:
+            value = self.func(*args, **kwargs)
+            self._store(key, value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self.stats.misses += 1
+                self.stats.miss_seconds += time.perf_counter() - start
+            event.set()
+        return value
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        size = sizeof(value)
+        with self._lock:
+            if size > self.max_bytes:
+                self.stats.oversized += 1
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, self.clock())
+            self.stats.bytes += size
+            while self.stats.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.stats.evictions += 1
+            self.stats.entries = len(self._entries)
+
+    def _drop(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.stats.bytes -= size
+        self.stats.entries = len(self._entries)
+
+    def warm(self, arg_list: Iterable[tuple], background: bool = True) -> None:
+        """用常用参数预先填充缓存；每个进程只做一次。"""
+        with self._lock:
+            if self._warmed:
+                return
+            self._warmed = True
+
+        def run() -> None:
+            for args in arg_list:
+                self(*args)
+
+        if background:
+            threading.Thread(target=run, name=f"warm-{self.stats.name}", daemon=True).start()
+        else:
+            run()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.stats = CacheStats(name=self.stats.name, max_bytes=self.max_bytes)
+
+
+_REGISTRY: dict[str, BoundedCache] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _identity(func: Callable[..., Any]) -> tuple[str, str]:
+    # Streamlit 每次重跑都会重新执行页面脚本里的装饰器，按“文件 + 函数名”找回同一个缓存
+    name = f"{func.__code__.co_filename}:{func.__qualname__}"
+    code = hashlib.sha1(func.__code__.co_code + repr(func.__code__.co_consts).encode()).hexdigest()
+    return name, code
+
+
+def bounded_cache(max_bytes: int = 256 << 20, ttl: float | None = None) -> Callable[[Callable[..., Any]], BoundedCache]:
+    def decorate(func: Callable[..., Any]) -> BoundedCache:
+        name, code = _identity(func)
+        with _REGISTRY_LOCK:
+            cache = _REGISTRY.get(name)
+            if cache is None or getattr(cache, "_code", None) != code:
+                cache = BoundedCache(func, max_bytes=max_bytes, ttl=ttl)
+                cache._code = code
+                _REGISTRY[name] = cache
+            cache.max_bytes = cache.stats.max_bytes = max_bytes
+            cache.ttl = ttl
+            return cache
+
+    return decorate
+
+
+def cache_stats() -> list[CacheStats]:
+    with _REGISTRY_LOCK:
+        return [cache.stats for cache in _REGISTRY.values()]
+
+
+def render_cache_stats(caches: Iterable[BoundedCache] | None = None) -> None:
+    """小型统计面板：每个被缓存函数的命中率、条目数、占用内存和平均耗时。"""
+    stats = [c.stats for c in caches] if caches is not None else cache_stats()
+    if not stats:
+        st.caption("暂无缓存统计")
+        return
+    total = sum(s.bytes for s in stats)
+    hits = sum(s.hits for s in stats)
+    calls = hits + sum(s.misses for s in stats)
+    c1, c2, c3 = st.columns(3)
+    c1.metric("缓存占用", f"{total / 2**20:.1f} MB")
+    c2.metric("命中率", f"{hits / calls:.0%}" if calls else "-")
+    c3.metric("条目数", sum(s.entries for s in stats))
+    st.dataframe(pd.DataFrame([s.row() for s in stats]), width="stretch", hide_index=True)
@@ -0,0 +1,223 @@
+"""销售数据的列式缓存层。
+
+第一次读取 CSV 时按块流式转换成 Parquet（几 GB 的导出也不会整份读进内存），之后都从 Parquet
+内存映射读取，只读需要的列；``region``、``product`` 存成字典编码，读出来就是 pandas category。
+Parquet 里记录了源 CSV 的 mtime 和大小，CSV 一变就重新转换。
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterator, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import streamlit as st
+
+
+SAMPLE_DIR = Path(__file__).resolve().parent.parent / "sample_data"
+SALES_CSV = SAMPLE_DIR / "sales.csv"
+CACHE_DIR = Path(os.getenv("DATASET_CACHE_DIR", SAMPLE_DIR / ".cache"))
+
+CATEGORICAL = ("region", "product")
+REQUIRED = ("date", "region", "revenue", "orders")
+SALES_TYPES = {
+    "date": pa.date32(),
+    "region": pa.dictionary(pa.int32(), pa.string()),
+    "product": pa.dictionary(pa.int32(), pa.string()),
+    "revenue": pa.float64(),
+    "orders": pa.int64(),
+}
+BLOCK_SIZE = 16 << 20
+# 边读边过滤时用小块：CSV 读取器会预读若干块，块越大峰值内存越高
+SCAN_BLOCK_SIZE = 1 << 20
+
+
+def _source_tag(csv_path: Path) -> dict[bytes, bytes]:
+    stat = csv_path.stat()
+    return {b"source_mtime_ns": str(stat.st_mtime_ns).encode(), b"source_size": str(stat.st_size).encode()}
+
+
+def _open_csv(
+    csv_path: Path,
+    column_types: dict[str, pa.DataType] | None = None,
+    block_size: int = BLOCK_SIZE,
+) -> pacsv.CSVStreamingReader:
+    convert = pacsv.ConvertOptions(
+        column_types=column_types if column_types is not None else SALES_TYPES,
+        auto_dict_encode=True,
+        strings_can_be_null=True,
+    )
+    return pacsv.open_csv(csv_path, read_options=pacsv.ReadOptions(block_size=block_size), convert_options=convert)
+
+
+def parquet_path(csv_path: Path = SALES_CSV) -> Path:
+    return CACHE_DIR / (csv_path.stem + ".parquet")
+
+
+def _is_fresh(target: Path, csv_path: Path) -> bool:
+    if not target.exists():
+        return False
+    metadata = pq.read_schema(target).metadata or {}
+    tag = _source_tag(csv_path)
+    return all(metadata.get(k) == v for k, v in tag.items())
+
+
+def ensure_parquet(
+    csv_path: Path = SALES_CSV,
+    column_types: dict[str, pa.DataType] | None = None,
+) -> Path:
+    """CSV 没变就直接返回已有的 Parquet；否则按块流式转换，写完再原子替换。"""
+    target = parquet_path(csv_path)
+    if _is_fresh(target, csv_path):
+        return target
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # 临时文件名每次调用都不同：会话是同一进程里的线程，两个会话同时遇到冷缓存也不会写同一个文件
+    with tempfile.NamedTemporaryFile(dir=target.parent, prefix=f"{target.stem}.", suffix=".tmp", delete=False) as f:
+        tmp = Path(f.name)
+    reader = _open_csv(csv_path, column_types)
+    schema = reader.schema.with_metadata(_source_tag(csv_path))
+    try:
+        with pq.ParquetWriter(tmp, schema, compression="zstd") as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+        os.replace(tmp, target)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return target
+
+
+def read_table(
+    csv_path: Path = SALES_CSV,
+    columns: Sequence[str] | None = None,
+    filters: list[tuple] | None = None,
+) -> pa.Table:
+    """内存映射读取 Parquet，只解码需要的列（以及满足 filters 的行组）。"""
+    path = ensure_parquet(csv_path)
+    return pq.read_table(path, columns=list(columns) if columns else None, filters=filters, memory_map=True)
+
+
+def sales_filter(regions: Sequence[str], min_revenue: float) -> ds.Expression:
+    """清洗条件：必填列非空、地区在所选范围内、收入不低于阈值。"""
+    # 值集合显式给 string 类型：空选择时 isin([]) 推断成 null 类型会报 ArrowTypeError
+    expr = ds.field("region").isin(pa.array(list(regions), pa.string())) & (ds.field("revenue") >= min_revenue)
+    for col in REQUIRED:
+        expr &= ds.field(col).is_valid()
+    return expr
+
+
+def scan(csv_path: Path, expr: ds.Expression) -> tuple[pa.Schema, Iterator[pa.RecordBatch]]:
+    """按块扫描并在每块上先过滤，只产出满足条件的行。
+
+    Parquet 缓存可用时把条件下推给 dataset 扫描（按行组统计跳过整块）；否则逐块读 CSV 再过滤。
+    """
+    target = parquet_path(csv_path)
+    if _is_fresh(target, csv_path):
+        dataset = ds.dataset(target, format="parquet")
+        return dataset.schema, dataset.to_batches(filter=expr)
+
+    reader = _open_csv(csv_path, block_size=SCAN_BLOCK_SIZE)
+
+    def batches() -> Iterator[pa.RecordBatch]:
+        for batch in reader:
+            yield from pa.Table.from_batches([batch]).filter(expr).to_batches()
+
+    return reader.schema, batches()
+
+
+def clean_sales(regions: Sequence[str], min_revenue: float, csv_path: Path = SALES_CSV) -> pd.DataFrame:
+    """流式清洗：峰值内存与结果大小成正比，而不是与整个文件成正比。"""
+    schema, batches = scan(csv_path, sales_filter(regions, min_revenue))
+    table = pa.Table.from_batches(list(batches), schema=schema.remove_metadata())
+    return to_frame(table.sort_by("date"))
+
+
+def distinct(column: str, csv_path: Path = SALES_CSV) -> list[str]:
+    """某个字典编码列的全部取值；只逐块读这一列的字典，不解码整列。"""
+    values: set[str] = set()
+    parquet = pq.ParquetFile(ensure_parquet(csv_path), memory_map=True)
+    for batch in parquet.iter_batches(columns=[column]):
+        array = batch.column(0)
+        if pa.types.is_dictionary(array.type):
+            array = array.dictionary
+        values.update(v for v in array.unique().to_pylist() if v is not None)
+    return sorted(values)
+
+
+def row_count(csv_path: Path = SALES_CSV) -> int:
+    """总行数，直接取 Parquet 元数据。"""
+    return pq.ParquetFile(ensure_parquet(csv_path)).metadata.num_rows
+
+
+def parquet_page(path: Path, page: int, page_size: int) -> tuple[pa.Table, int]:
+    """读 Parquet 文件第 page 页（从 0 开始）和总行数，只解码覆盖这一页的行组。"""
+    parquet = pq.ParquetFile(path, memory_map=True)
+    total = parquet.metadata.num_rows
+    start = page * page_size
+    groups, first_row, row = [], None, 0
+    for i in range(parquet.num_row_groups):
+        n = parquet.metadata.row_group(i).num_rows
+        if row + n > start and row < start + page_size:
+            if first_row is None:
+                first_row = row
+            groups.append(i)
+        row += n
+    if not groups:
+        return parquet.schema_arrow.empty_table(), total
+    return parquet.read_row_groups(groups).slice(start - first_row, page_size), total
+
+
+def read_page(page: int, page_size: int, csv_path: Path = SALES_CSV) -> tuple[pd.DataFrame, int]:
+    """读第 page 页（从 0 开始）的原始记录和总行数。"""
+    table, total = parquet_page(ensure_parquet(csv_path), page, page_size)
+    frame = to_frame(table)
+    frame.index = pd.RangeIndex(page * page_size, page * page_size + len(frame))
+    return frame, total
+
+
+def to_frame(table: pa.Table) -> pd.DataFrame:
+    df = table.to_pandas()
+    if "date" in df:
+        df["date"] = pd.to_datetime(df["date"])
+    for col in CATEGORICAL:
+        if col in df and df[col].dtype != "category":
+            df[col] = df[col].astype("category")
+    return df
+
+
+def load_sales(csv_path: Path = SALES_CSV, columns: Sequence[str] | None = None) -> pd.DataFrame:
+    return to_frame(read_table(csv_path, columns))
+
+
+@st.cache_data(show_spinner="读取数据…")
+def _cached_sales(path: str, mtime_ns: int, columns: tuple[str, ...] | None) -> pd.DataFrame:
+    # mtime_ns 只参与缓存键：文件没变，重跑就不会再解析
+    return load_sales(Path(path), columns)
+
+
+def cached_sales(csv_path: Path = SALES_CSV, columns: Sequence[str] | None = None) -> pd.DataFrame:
+    """页面用的入口：按文件 mtime 缓存，重跑时只做一次 stat。"""
+    return _cached_sales(str(csv_path), csv_path.stat().st_mtime_ns, tuple(columns) if columns else None)
+
+
+@st.cache_data(show_spinner="清洗数据…")
+def _cached_clean(path: str, mtime_ns: int, regions: tuple[str, ...], min_revenue: float) -> pd.DataFrame:
+    return clean_sales(regions, min_revenue, Path(path))
+
+
+def cached_clean(regions: Sequence[str], min_revenue: float, csv_path: Path = SALES_CSV) -> pd.DataFrame:
+    return _cached_clean(str(csv_path), csv_path.stat().st_mtime_ns, tuple(sorted(regions)), float(min_revenue))
+
+
+@st.cache_data(show_spinner=False)
+def _cached_distinct(path: str, mtime_ns: int, column: str) -> list[str]:
+    return distinct(column, Path(path))
+
+
+def cached_distinct(column: str, csv_path: Path = SALES_CSV) -> list[str]:
+    return _cached_distinct(str(csv_path), csv_path.stat().st_mtime_ns, column)
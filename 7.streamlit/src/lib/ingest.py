@@ -0,0 +1,271 @@
+"""上传 CSV 的后台分块解析。
+
+``pd.read_csv(uploaded)`` 在脚本线程里一次解析完整个文件，大文件会卡住这个会话，解析出的 DataFrame
+也整份留在内存里。这里改成：
+
+1. 先读开头一小段（``SAMPLE_BYTES``）推断列类型，低基数的字符串列用字典编码；
+2. 在后台线程池里用 pyarrow 按块流式解析（pyarrow 解析时释放 GIL，页面照常响应），
+   每块直接写进临时目录里的 Parquet，内存里只留前几行预览；
+3. 页面轮询 ``bytes_read`` / ``rows`` 显示进度，解析完后按页从 Parquet 读取预览。
+
+样本推断的类型和后面的数据对不上时（例如整数列后面出现小数），放宽类型重新解析；放宽后仍对不上的列
+（例如数值列后面出现文本）改按字符串读，所以格式正确的 CSV 总能解析成功。
+临时文件在换了上传文件、取消或会话结束（任务对象被回收）时删除。
+"""
+from __future__ import annotations
+
+import io
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, MutableMapping
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from lib.datasets import SCAN_BLOCK_SIZE, parquet_page
+
+
+SAMPLE_BYTES = 1 << 20
+PREVIEW_ROWS = 20
+# 样本里不同值占比低于这个比例的字符串列存成字典编码
+DICT_RATIO = 0.5
+SPILL_DIR = os.getenv("INGEST_SPILL_DIR") or None
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+SESSION_KEY = "csv_ingest"
+# pyarrow 转换失败时的报错形如 "In CSV column #3: CSV conversion error to double: invalid value 'foo'"
+_BAD_COLUMN = re.compile(r"In CSV column #(\d+)")
+
+_pool = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="csv-ingest")
+
+
+class Cancelled(Exception):
+    pass
+
+
+class _Progress(io.RawIOBase):
+    """包一层源文件，记录 pyarrow 已经读走的字节数；取消时让下一次读取直接报错退出。"""
+
+    def __init__(self, fh: BinaryIO, cancelled: threading.Event) -> None:
+        self._fh = fh
+        self._cancelled = cancelled
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._cancelled.is_set():
+            raise Cancelled()
+        data = self._fh.read(len(buffer))
+        buffer[: len(data)] = data
+        self.bytes_read += len(data)
+        return len(data)
+
+
+def _sample(fh: BinaryIO, size: int) -> bytes:
+    """文件开头的一段，截到最后一个完整行；文件比样本还小时就是整个文件。"""
+    fh.seek(0)
+    data = fh.read(size)
+    fh.seek(0)
+    if len(data) == size and b"\n" in data:
+        data = data[: data.rindex(b"\n") + 1]
+    return data
+
+
+def infer_schema(fh: BinaryIO, sample_bytes: int = SAMPLE_BYTES) -> dict[str, pa.DataType]:
+    """按文件开头的样本推断列类型：低基数字符串列用字典编码，样本里全空的列按字符串处理。"""
+    sample = pacsv.read_csv(pa.BufferReader(_sample(fh, sample_bytes)))
+    types: dict[str, pa.DataType] = {}
+    for name, column in zip(sample.column_names, sample.columns):
+        dtype = column.type
+        if pa.types.is_null(dtype):
+            dtype = pa.string()
+        elif pa.types.is_string(dtype) and len(column) and len(column.unique()) < DICT_RATIO * len(column):
+            dtype = pa.dictionary(pa.int32(), pa.string())
+        types[name] = dtype
+    return types
+
+
+def relax(types: dict[str, pa.DataType]) -> dict[str, pa.DataType]:
+    """样本推断失败后的兜底类型：整数放宽成 float64，日期时间和布尔按字符串读。"""
+    relaxed = {}
+    for name, dtype in types.items():
+        if pa.types.is_integer(dtype):
+            dtype = pa.float64()
+        elif pa.types.is_temporal(dtype) or pa.types.is_boolean(dtype):
+            dtype = pa.string()
+        relaxed[name] = dtype
+    return relaxed
+
+
+def _is_text(dtype: pa.DataType) -> bool:
+    return pa.types.is_string(dtype) or pa.types.is_dictionary(dtype)
+
+
+def as_text(types: dict[str, pa.DataType], error: pa.ArrowInvalid) -> dict[str, pa.DataType]:
+    """放宽后仍然转换失败：报错的那一列改按字符串读；认不出是哪一列时所有列都按字符串读。
+
+    所有列都已经是字符串还失败，说明文件本身格式不对（例如某行列数不对），原样抛出。
+    """
+    names = list(types)
+    match = _BAD_COLUMN.search(str(error))
+    column = int(match.group(1)) if match else len(names)
+    if column < len(names) and not _is_text(types[names[column]]):
+        return {**types, names[column]: pa.string()}
+    if all(_is_text(dtype) for dtype in types.values()):
+        raise error
+    return dict.fromkeys(types, pa.string())
+
+
+class CsvIngest:
+    """一个上传文件的后台解析任务；页面读 ``progress`` / ``rows`` 等属性，不需要加锁。"""
+
+    def __init__(self, fh: BinaryIO, size: int, name: str = "upload.csv", block_size: int = SCAN_BLOCK_SIZE) -> None:
+        self.name = name
+        self.size = size
+        self.block_size = block_size
+        self.workdir = Path(tempfile.mkdtemp(prefix="csv-ingest-", dir=SPILL_DIR))
+        self.path = self.workdir / (Path(name).stem + ".parquet")
+        self.schema: pa.Schema | None = None
+        self.rows = 0
+        self.relaxed = False
+        self.error: str | None = None
+        self.started = time.monotonic()
+        self.finished: float | None = None
+        self._fh = fh
+        self._reader: _Progress | None = None
+        self._head: pa.Table | None = None
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        # 会话结束、任务对象被回收时删掉临时文件
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.workdir, True)
+
+    # ---- 后台线程 ----
+
+    def _convert(self, types: dict[str, pa.DataType]) -> None:
+        self._fh.seek(0)
+        self._reader = _Progress(self._fh, self._cancelled)
+        convert = pacsv.ConvertOptions(column_types=types, strings_can_be_null=True)
+        reader = pacsv.open_csv(
+            self._reader, read_options=pacsv.ReadOptions(block_size=self.block_size), convert_options=convert
+        )
+        self.schema = reader.schema
+        self.rows = 0
+        tmp = self.path.with_suffix(".tmp")
+        with pq.ParquetWriter(tmp, reader.schema, compression="zstd") as writer:
+            for batch in reader:
+                if self._cancelled.is_set():
+                    raise Cancelled()
+                writer.write_batch(batch)
+                if self._head is None or self._head.num_rows < PREVIEW_ROWS:
+                    head = pa.Table.from_batches([batch.slice(0, PREVIEW_ROWS)])
+                    self._head = head if self._head is None else pa.concat_tables([self._head, head])
+                self.rows += batch.num_rows
+        os.replace(tmp, self.path)
+
+    def run(self) -> None:
+        try:
+            types = infer_schema(self._fh)
+            try:
+                self._convert(types)
+            except pa.ArrowInvalid:
+                if self._cancelled.is_set():
+                    raise
+                self.relaxed, types = True, relax(types)
+                while True:
+                    self._head = None
+                    try:
+                        self._convert(types)
+                        break
+                    except pa.ArrowInvalid as exc:
+                        if self._cancelled.is_set():
+                            raise
+                        types = as_text(types, exc)
+        except Exception as exc:  # noqa: BLE001 - 后台线程里的异常要交给页面显示
+            # 取消时 pyarrow 可能把 Cancelled 包成自己的异常类型，以取消标记为准
+            self.error = "已取消" if self._cancelled.is_set() else (str(exc).splitlines() or [type(exc).__name__])[0]
+        finally:
+            self.finished = time.monotonic()
+            self._fh = None  # 解析完就不再引用上传的原始字节
+            self._done.set()
+
+    # ---- 页面读取 ----
+
+    @property
+    def running(self) -> bool:
+        return not self._done.is_set()
+
+    @property
+    def ok(self) -> bool:
+        return self._done.is_set() and self.error is None
+
+    @property
+    def bytes_read(self) -> int:
+        return min(self._reader.bytes_read, self.size) if self._reader is not None else 0
+
+    @property
+    def progress(self) -> float:
+        return 1.0 if self.ok else (self.bytes_read / self.size if self.size else 0.0)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def parquet_bytes(self) -> int:
+        return self.path.stat().st_size if self.ok else 0
+
+    def preview(self) -> pd.DataFrame:
+        """解析过程中就能看的前几行（来自第一个块）。"""
+        head = self._head
+        return head.slice(0, PREVIEW_ROWS).to_pandas() if head is not None else pd.DataFrame()
+
+    def page(self, page: int, page_size: int) -> tuple[pd.DataFrame, int]:
+        """解析完成后按页从 Parquet 读原始记录（只解码覆盖这一页的行组）和总行数。"""
+        table, total = parquet_page(self.path, page, page_size)
+        frame = table.to_pandas()
+        frame.index = pd.RangeIndex(page * page_size, page * page_size + len(frame))
+        return frame, total
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def close(self) -> None:
+        """取消（如果还在跑）并删掉临时文件。"""
+        self.cancel()
+        if self._done.wait(timeout=5):
+            self._finalizer()
+
+
+def start_ingest(fh: BinaryIO, size: int, name: str = "upload.csv") -> CsvIngest:
+    job = CsvIngest(fh, size, name)
+    _pool.submit(job.run)
+    return job
+
+
+def for_upload(state: MutableMapping[str, Any], uploaded: Any) -> CsvIngest | None:
+    """页面入口：同一个上传文件只解析一次；换了文件或清空上传时，取消旧任务并删除临时文件。"""
+    current: tuple[str, CsvIngest] | None = state.get(SESSION_KEY)
+    file_id = None if uploaded is None else getattr(uploaded, "file_id", None) or f"{uploaded.name}:{uploaded.size}"
+    if current is not None and current[0] == file_id:
+        return current[1]
+    if current is not None:
+        current[1].close()
+        state.pop(SESSION_KEY, None)
+    if uploaded is None:
+        return None
+    job = start_ingest(uploaded, uploaded.size, uploaded.name)
+    state[SESSION_KEY] = (file_id, job)
+    return job
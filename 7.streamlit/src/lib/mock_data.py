@@ -0,0 +1,389 @@
+"""多页面金融助手共用的模拟数据。
+
+行情和舆情都用 NumPy 整列推进，历史存在定长的 float32 环形数组里；整个进程共享一个生成器
+（``shared_generator``），各页面、各会话读同一份数据，聊天页不会把行情页算过的再模拟一遍。
+超过 ``MOCK_IDLE_SECONDS``（默认 300）秒没人读的标的/主题连同历史一起删掉，不会一直推进下去。
+多进程部署（``deploy/serve.py``）时改由发布进程统一推进，各工作进程通过 ``SnapshotFeed`` 读共享内存里的快照。
+不依赖 Streamlit，可以直接压测：
+
+    python -m lib.mock_data --symbols 500 --topics 50 --ticks 2000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from lib import snapshots
+
+
+# 每条序列保留的历史点数；页面每秒最多推进一步，默认约一小时
+HISTORY_POINTS = int(os.getenv("HISTORY_POINTS", "3600"))
+IDLE_SECONDS = float(os.getenv("MOCK_IDLE_SECONDS", "300"))
+
+
+class SeriesHistory:
+    """按列存放多条序列的环形历史；每个值同时写在 pos 和 pos+capacity，最后 n 个点总是一段连续视图。"""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.names: list[str] = []
+        self._times = np.zeros(2 * capacity, dtype=np.int64)
+        self._values = np.full((2 * capacity, 0), np.nan, dtype=np.float32)
+        self._pos = 0
+        self._size = 0
+
+    def add(self, names: list[str]) -> None:
+        if not names:
+            return
+        pad = np.full((2 * self.capacity, len(names)), np.nan, dtype=np.float32)
+        self._values = np.hstack([self._values, pad])
+        self.names.extend(names)
+
+    def keep(self, mask: np.ndarray) -> None:
+        """只保留 mask 为 True 的序列，其余的历史列释放掉。"""
+        self._values = self._values[:, mask]
+        self.names = [name for name, kept in zip(self.names, mask) if kept]
+
+    def append(self, ts_ms: int, values: np.ndarray) -> None:
+        for row in (self._pos, self._pos + self.capacity):
+            self._times[row] = ts_ms
+            self._values[row] = values
+        self._pos = (self._pos + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def last(self, n: int) -> tuple[np.ndarray, np.ndarray]:
+        n = min(n, self._size)
+        end = self._pos + self.capacity
+        return self._times[end - n : end], self._values[end - n : end]
+
+    def frame(self, n: int, idx: np.ndarray, names: list[str]) -> pd.DataFrame:
+        times, values = self.last(n)
+        index = pd.DatetimeIndex(times.astype("datetime64[ms]"), name="time")
+        return pd.DataFrame(values[:, idx], index=index, columns=names)
+
+
+def sentiment_labels(scores: np.ndarray) -> np.ndarray:
+    return np.select(
+        [scores >= 0.35, scores >= 0.1, scores > -0.1, scores > -0.35],
+        ["明显偏多", "偏多", "中性", "偏空"],
+        default="明显偏空",
+    )
+
+
+class TickGenerator:
+    """线程安全的共享行情/舆情生成器。
+
+    ``min_interval`` 内的重复调用直接返回当前值，不会因为多个页面或会话同时读取而多推进几步；
+    ``tick()`` 则无条件推进一步，给压测和测试用。
+    每个标的/主题记下最近一次被读取的时间，超过 ``idle_ttl`` 秒没人读的在下次读取时删掉。
+    """
+
+    def __init__(
+        self,
+        seed: int = 42,
+        history_points: int = HISTORY_POINTS,
+        min_interval: float = 1.0,
+        volatility: float = 0.004,
+        idle_ttl: float = IDLE_SECONDS,
+    ) -> None:
+        self.rng = np.random.default_rng(seed)
+        self.min_interval = min_interval
+        self.volatility = volatility
+        self.idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        self._last_tick = float("-inf")
+        self.ticks = 0
+
+        self.symbols: list[str] = []
+        self._symbol_idx: dict[str, int] = {}
+        self.opens = np.empty(0)
+        self.prices = np.empty(0)
+        self.volumes = np.empty(0, dtype=np.int64)
+        self._symbol_read = np.empty(0)
+        self.market_history = SeriesHistory(history_points)
+
+        self.topics: list[str] = []
+        self._topic_idx: dict[str, int] = {}
+        self.scores = np.empty(0)
+        self.mentions = np.empty(0, dtype=np.int64)
+        self._topic_read = np.empty(0)
+        self.sentiment_history = SeriesHistory(history_points)
+
+    def _ensure_symbols(self, symbols: list[str]) -> np.ndarray:
+        """登记并返回这些标的的下标，同时记为刚被读取；先清掉闲置的，返回的下标才不会失效。"""
+        now = time.monotonic()
+        self._expire_symbols(now)
+        new = [s for s in dict.fromkeys(symbols) if s not in self._symbol_idx]
+        if new:
+            start = self.rng.uniform(50, 500, len(new))
+            for s in new:
+                self._symbol_idx[s] = len(self.symbols)
+                self.symbols.append(s)
+            self.opens = np.concatenate([self.opens, start])
+            self.prices = np.concatenate([self.prices, start])
+            self.volumes = np.concatenate([self.volumes, self.rng.integers(100_000, 5_000_000, len(new))])
+            self._symbol_read = np.concatenate([self._symbol_read, np.zeros(len(new))])
+            self.market_history.add(new)
+        idx = np.fromiter((self._symbol_idx[s] for s in symbols), dtype=np.intp, count=len(symbols))
+        self._symbol_read[idx] = now
+        return idx
+
+    def _ensure_topics(self, topics: list[str]) -> np.ndarray:
+        now = time.monotonic()
+        self._expire_topics(now)
+        new = [t for t in dict.fromkeys(topics) if t not in self._topic_idx]
+        if new:
+            for t in new:
+                self._topic_idx[t] = len(self.topics)
+                self.topics.append(t)
+            self.scores = np.concatenate([self.scores, self.rng.uniform(-0.3, 0.3, len(new))])
+            self.mentions = np.concatenate([self.mentions, self.rng.integers(200, 3_000, len(new))])
+            self._topic_read = np.concatenate([self._topic_read, np.zeros(len(new))])
+            self.sentiment_history.add(new)
+        idx = np.fromiter((self._topic_idx[t] for t in topics), dtype=np.intp, count=len(topics))
+        self._topic_read[idx] = now
+        return idx
+
+    def _expire_symbols(self, now: float) -> None:
+        keep = self._symbol_read >= now - self.idle_ttl
+        if keep.all():
+            return
+        self.symbols = [s for s, kept in zip(self.symbols, keep) if kept]
+        self._symbol_idx = {s: i for i, s in enumerate(self.symbols)}
+        self.opens, self.prices = self.opens[keep], self.prices[keep]
+        self.volumes, self._symbol_read = self.volumes[keep], self._symbol_read[keep]
+        self.market_history.keep(keep)
+
+    def _expire_topics(self, now: float) -> None:
+        keep = self._topic_read >= now - self.idle_ttl
+        if keep.all():
+            return
+        self.topics = [t for t, kept in zip(self.topics, keep) if kept]
+        self._topic_idx = {t: i for i, t in enumerate(self.topics)}
+        self.scores, self.mentions = self.scores[keep], self.mentions[keep]
+        self._topic_read = self._topic_read[keep]
+        self.sentiment_history.keep(keep)
+
+    def tick(self) -> None:
+        with self._lock:
+            self._step()
+
+    def _step(self) -> None:
+        now_ms = time.time_ns() // 1_000_000
+        n, m = len(self.symbols), len(self.topics)
+        self.prices *= np.exp(self.rng.normal(0.0, self.volatility, n))
+        np.maximum(self.prices, 1.0, out=self.prices)
+        self.volumes = np.maximum(0, self.volumes + self.rng.integers(-80_000, 120_000, n))
+        self.scores = np.clip(self.scores * 0.85 + self.rng.normal(0.0, 0.15, m), -1.0, 1.0)
+        self.mentions = np.maximum(0, self.mentions + self.rng.integers(-120, 220, m))
+        self.market_history.append(now_ms, self.prices)
+        self.sentiment_history.append(now_ms, self.scores)
+        self._last_tick = time.monotonic()
+        self.ticks += 1
+
+    def _maybe_step(self) -> None:
+        if time.monotonic() - self._last_tick >= self.min_interval:
+            self._step()
+
+    def market(self, symbols: Iterable[str]) -> list[dict[str, Any]]:
+        symbols = list(symbols)
+        with self._lock:
+            idx = self._ensure_symbols(symbols)
+            self._maybe_step()
+            prices = self.prices[idx]
+            change = (prices / self.opens[idx] - 1.0) * 100.0
+            volumes = self.volumes[idx]
+        now = datetime.now().strftime("%H:%M:%S")
+        return [
+            {"symbol": s, "price": round(p, 2), "change_pct": round(c, 2), "volume": v, "time": now}
+            for s, p, c, v in zip(symbols, prices.tolist(), change.tolist(), volumes.tolist())
+        ]
+
+    def sentiment(self, topics: Iterable[str]) -> list[dict[str, Any]]:
+        topics = list(topics)
+        with self._lock:
+            idx = self._ensure_topics(topics)
+            self._maybe_step()
+            scores = self.scores[idx]
+            mentions = self.mentions[idx]
+        labels = sentiment_labels(scores)
+        now = datetime.now().strftime("%H:%M:%S")
+        return [
+            {"topic": t, "score": round(s, 3), "mentions": m, "label": str(label), "time": now}
+            for t, s, m, label in zip(topics, scores.tolist(), mentions.tolist(), labels)
+        ]
+
+    def price_history(self, symbols: Iterable[str], n: int = 40) -> pd.DataFrame:
+        """最近 n 个 tick 的价格宽表：索引是时间，每个标的一列。"""
+        symbols = list(dict.fromkeys(symbols))
+        with self._lock:
+            idx = self._ensure_symbols(symbols)
+            return self.market_history.frame(n, idx, symbols)
+
+    def sentiment_trend(self, topics: Iterable[str], n: int = 40) -> pd.DataFrame:
+        topics = list(dict.fromkeys(topics))
+        with self._lock:
+            idx = self._ensure_topics(topics)
+            return self.sentiment_history.frame(n, idx, topics)
+
+
+def market_snapshot(gen: TickGenerator) -> pa.Table:
+    """发布进程写入共享内存的行情表（字段与 ``TickGenerator.market`` 的行一致）。"""
+    with gen._lock:
+        change = (gen.prices / gen.opens - 1.0) * 100.0
+        table = pa.table(
+            {
+                "symbol": pa.array(gen.symbols, pa.string()),
+                "price": np.round(gen.prices, 2),
+                "change_pct": np.round(change, 2),
+                "volume": gen.volumes.copy(),
+            }
+        )
+    return table.replace_schema_metadata({"time": datetime.now().strftime("%H:%M:%S")})
+
+
+def sentiment_snapshot(gen: TickGenerator) -> pa.Table:
+    with gen._lock:
+        table = pa.table(
+            {
+                "topic": pa.array(gen.topics, pa.string()),
+                "score": np.round(gen.scores, 3),
+                "mentions": gen.mentions.copy(),
+                "label": pa.array(sentiment_labels(gen.scores).tolist(), pa.string()),
+            }
+        )
+    return table.replace_schema_metadata({"time": datetime.now().strftime("%H:%M:%S")})
+
+
+def history_snapshot(gen: TickGenerator, history: SeriesHistory) -> pa.Table:
+    """最近 capacity 个点的宽表：``time``（毫秒时间戳）加每条序列一列 float32。"""
+    with gen._lock:
+        times, values = history.last(history.capacity)
+        columns = {"time": times.copy()}
+        columns.update({name: values[:, i].copy() for i, name in enumerate(history.names)})
+    return pa.table(columns)
+
+
+def _scalar(value: Any) -> Any:
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class SnapshotFeed:
+    """多进程部署下的数据源：读发布进程放在共享内存里的快照，本进程不再模拟。
+
+    快照里还没有的标的/主题会登记给发布进程，在它们出现之前先用本地生成器顶上。
+    """
+
+    def __init__(self, fallback: TickGenerator) -> None:
+        self.fallback = fallback
+        self._readers = {
+            name: snapshots.SnapshotReader(name)
+            for name in ("market", "sentiment", "market_history", "sentiment_history")
+        }
+        self._indexes: dict[str, tuple[int, dict[str, int]]] = {}
+
+    def _table(self, name: str, key: str) -> tuple[pa.Table | None, dict[str, int]]:
+        table = self._readers[name].read()
+        if table is None:
+            return None, {}
+        cached = self._indexes.get(name)
+        if cached is None or cached[0] != id(table):
+            cached = (id(table), {v: i for i, v in enumerate(table.column(key).to_pylist())})
+            self._indexes[name] = cached
+        return table, cached[1]
+
+    def _rows(self, name: str, key: str, names: list[str], fields: list[str], local) -> list[dict[str, Any]]:
+        snapshots.subscribe(name, names)
+        table, index = self._table(name, key)
+        missing = [n for n in names if n not in index]
+        rows = {row[key]: row for row in local(missing)} if missing else {}
+        if table is not None:
+            stamp = (table.schema.metadata or {}).get(b"time", b"").decode()
+            columns = {f: table.column(f).to_numpy(zero_copy_only=False) for f in fields}
+            for n in names:
+                i = index.get(n)
+                if i is not None:
+                    rows[n] = {key: n, **{f: _scalar(columns[f][i]) for f in fields}, "time": stamp}
+        return [rows[n] for n in names]
+
+    def market(self, symbols: Iterable[str]) -> list[dict[str, Any]]:
+        return self._rows("market", "symbol", list(symbols), ["price", "change_pct", "volume"], self.fallback.market)
+
+    def sentiment(self, topics: Iterable[str]) -> list[dict[str, Any]]:
+        return self._rows("sentiment", "topic", list(topics), ["score", "mentions", "label"], self.fallback.sentiment)
+
+    def _history(self, name: str, names: Iterable[str], n: int) -> pd.DataFrame:
+        names = list(dict.fromkeys(names))
+        table = self._readers[name].read()
+        if table is None:
+            return pd.DataFrame(columns=names, index=pd.DatetimeIndex([], name="time"), dtype=np.float32)
+        present = [c for c in names if c in table.schema.names]
+        tail = table.slice(max(0, table.num_rows - n)).select(["time", *present])
+        frame = tail.to_pandas().set_index("time")
+        frame.index = pd.DatetimeIndex(frame.index.to_numpy().astype("datetime64[ms]"), name="time")
+        return frame.reindex(columns=names)
+
+    def price_history(self, symbols: Iterable[str], n: int = 40) -> pd.DataFrame:
+        return self._history("market_history", symbols, n)
+
+    def sentiment_trend(self, topics: Iterable[str], n: int = 40) -> pd.DataFrame:
+        return self._history("sentiment_history", topics, n)
+
+
+@lru_cache(maxsize=1)
+def shared_generator() -> TickGenerator | SnapshotFeed:
+    """进程内唯一的数据源，所有页面和会话共用；多进程部署时读共享内存快照。"""
+    local = TickGenerator()
+    return SnapshotFeed(local) if snapshots.enabled() else local
+
+
+def next_market(symbols: Iterable[str], generator: TickGenerator | SnapshotFeed | None = None) -> list[dict[str, Any]]:
+    return (generator or shared_generator()).market(symbols)
+
+
+def next_sentiment(topics: Iterable[str], generator: TickGenerator | SnapshotFeed | None = None) -> list[dict[str, Any]]:
+    return (generator or shared_generator()).sentiment(topics)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="压测模拟数据生成器")
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=2000)
+    args = parser.parse_args()
+
+    gen = TickGenerator(min_interval=float("inf"))
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    topics = [f"topic-{i}" for i in range(args.topics)]
+    gen.market(symbols)
+    gen.sentiment(topics)
+
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        gen.tick()
+    tick_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(200):
+        gen.market(symbols)
+        gen.sentiment(topics)
+    read_s = time.perf_counter() - start
+
+    print(f"symbols={args.symbols} topics={args.topics}")
+    print(f"tick: {args.ticks / tick_s:,.0f} ticks/s ({tick_s / args.ticks * 1e6:.1f} us/tick)")
+    print(f"read rows: {read_s / 200 * 1e3:.2f} ms per market+sentiment call")
+    nbytes = gen.market_history._values.nbytes + gen.sentiment_history._values.nbytes
+    print(f"history: {nbytes / 1024:.0f} KiB for {gen.market_history.capacity} points")
+
+
+if __name__ == "__main__":
+    main()
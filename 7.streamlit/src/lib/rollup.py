@@ -0,0 +1,240 @@
+"""销售数据的预聚合立方体。
+
+按 (date, region, product) 预先汇总 revenue / orders / 行数，看板的所有筛选组合都从这些单元格
+回答：单元格数量只取决于天数 × 地区 × 产品，与原始行数无关，所以原始数据到上亿行切片也是毫秒级。
+CSV 追加了新行时，从上次读到的字节偏移继续读，只聚合新增部分再并入立方体；文件被替换或原地重写
+（inode 变了，或已读部分的首尾字节对不上）时整体重建。
+多进程部署时由发布进程维护立方体并写进共享内存，工作进程用 ``SharedSalesCube`` 只读。
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from lib import snapshots
+from lib.datasets import BLOCK_SIZE, SALES_CSV
+
+
+KEYS = ["date", "region", "product"]
+MEASURES = ["revenue", "orders", "rows"]
+CUBE_TYPES = {
+    "date": pa.date32(),
+    "region": pa.string(),
+    "product": pa.string(),
+    "revenue": pa.float64(),
+    "orders": pa.float64(),
+}
+MISSING_PRODUCT = "(未知)"
+# 判断已读部分有没有被改写时，对比表头之后和已读末尾各这么多字节
+FINGERPRINT_BYTES = 1 << 16
+
+
+class _Window(io.RawIOBase):
+    """只暴露文件 [start, end) 这一段，给 pyarrow 流式读取用。"""
+
+    def __init__(self, fh, start: int, end: int) -> None:
+        fh.seek(start)
+        self._fh = fh
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = min(len(buffer), self._remaining)
+        if n <= 0:
+            return 0
+        data = self._fh.read(n)
+        buffer[: len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+def _last_line_end(fh, size: int) -> int:
+    """文件里最后一个完整行的结束位置；正在写入的半行留到下次再读。"""
+    pos = size
+    while pos > 0:
+        step = min(1 << 16, pos)
+        fh.seek(pos - step)
+        chunk = fh.read(step)
+        cut = chunk.rfind(b"\n")
+        if cut >= 0:
+            return pos - step + cut + 1
+        pos -= step
+    return 0
+
+
+def _fingerprint(fh, start: int, end: int) -> bytes:
+    """[start, end) 这段已读内容开头和结尾各 ``FINGERPRINT_BYTES`` 字节的摘要；纯追加不会改变它。"""
+    digest = hashlib.blake2b(digest_size=16)
+    head_end = min(end, start + FINGERPRINT_BYTES)
+    fh.seek(start)
+    digest.update(fh.read(head_end - start))
+    tail_start = max(head_end, end - FINGERPRINT_BYTES)
+    fh.seek(tail_start)
+    digest.update(fh.read(end - tail_start))
+    return digest.digest()
+
+
+def _aggregate(table: pa.Table) -> pa.Table:
+    table = table.filter(pc.and_(pc.is_valid(table["date"]), pc.is_valid(table["region"])))
+    product = pc.fill_null(table["product"], MISSING_PRODUCT)
+    table = table.set_column(table.schema.get_field_index("product"), "product", product)
+    out = table.group_by(KEYS).aggregate([("revenue", "sum"), ("orders", "sum"), ([], "count_all")])
+    return out.select(KEYS + ["revenue_sum", "orders_sum", "count_all"]).rename_columns(KEYS + MEASURES)
+
+
+class SalesCube:
+    """可增量追加的 (date, region, product) 汇总立方体，线程安全。"""
+
+    def __init__(self, csv_path: Path = SALES_CSV, block_size: int = BLOCK_SIZE) -> None:
+        self.csv_path = Path(csv_path)
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.header: bytes | None = None
+        self.inode: int | None = None
+        self.fingerprint = b""
+        self.offset = 0
+        self.raw_rows = 0
+        self.cells = pd.DataFrame(columns=KEYS + MEASURES)
+
+    def refresh(self) -> int:
+        """读入上次之后追加的行，返回新增的原始行数。
+
+        文件被截断、表头变化、被替换（inode 不同）或已读部分被原地改写（重新导出成同样大小甚至更大）时，
+        不能把偏移之后的字节当成追加的行，整体重建。
+        """
+        with self._lock:
+            with open(self.csv_path, "rb") as fh:
+                stat = os.fstat(fh.fileno())
+                size = stat.st_size
+                header = fh.readline()
+                if (
+                    header != self.header
+                    or stat.st_ino != self.inode
+                    or size < self.offset
+                    or _fingerprint(fh, len(header), self.offset) != self.fingerprint
+                ):
+                    self._reset()
+                    self.header = header
+                    self.inode = stat.st_ino
+                    self.offset = len(header)
+                    self.fingerprint = _fingerprint(fh, self.offset, self.offset)
+                end = _last_line_end(fh, size)
+                if end <= self.offset:
+                    return 0
+                added = self._ingest(fh, end)
+                self.offset = end
+                self.fingerprint = _fingerprint(fh, len(header), end)
+            return added
+
+    def _ingest(self, fh, end: int) -> int:
+        names = self.header.decode("utf-8-sig").strip().split(",")
+        reader = pacsv.open_csv(
+            io.BufferedReader(_Window(fh, self.offset, end), buffer_size=1 << 20),
+            read_options=pacsv.ReadOptions(column_names=names, block_size=self.block_size),
+            convert_options=pacsv.ConvertOptions(
+                column_types=CUBE_TYPES, include_columns=list(CUBE_TYPES), strings_can_be_null=True
+            ),
+        )
+        parts, added = [], 0
+        for batch in reader:
+            added += batch.num_rows
+            parts.append(_aggregate(pa.Table.from_batches([batch])))
+        if not parts:
+            return 0
+
+        fresh = _aggregate_cells(pa.concat_tables(parts))
+        merged = pd.concat([self.cells, fresh], ignore_index=True) if len(self.cells) else fresh
+        self.cells = _categorize(merged.groupby(KEYS, as_index=False, observed=True)[MEASURES].sum())
+        self.raw_rows += added
+        return added
+
+    def regions(self) -> list[str]:
+        return sorted(self.cells["region"].unique().tolist())
+
+    def products(self) -> list[str]:
+        return sorted(self.cells["product"].unique().tolist())
+
+    def slice(
+        self,
+        region: str | None = None,
+        product: str | None = None,
+        start: pd.Timestamp | None = None,
+        end: pd.Timestamp | None = None,
+    ) -> pd.DataFrame:
+        """满足筛选条件的单元格（每行是一天 × 一个地区 × 一个产品的合计）。"""
+        cells = self.cells
+        mask = pd.Series(True, index=cells.index)
+        if region is not None:
+            mask &= cells["region"] == region
+        if product is not None:
+            mask &= cells["product"] == product
+        if start is not None:
+            mask &= cells["date"] >= start
+        if end is not None:
+            mask &= cells["date"] <= end
+        return cells[mask]
+
+    def rollup(self, by: str | list[str], **filters) -> pd.DataFrame:
+        """在切片上再按 by 汇总，例如 ``rollup("date", region="华东")``。"""
+        return self.slice(**filters).groupby(by, as_index=False, observed=True)[MEASURES].sum()
+
+
+def _aggregate_cells(table: pa.Table) -> pd.DataFrame:
+    # 各批次的部分结果再合并一次：同一天同一地区产品可能跨批次
+    out = table.group_by(KEYS).aggregate([(m, "sum") for m in MEASURES])
+    df = out.select(KEYS + [f"{m}_sum" for m in MEASURES]).rename_columns(KEYS + MEASURES).to_pandas()
+    df["date"] = pd.to_datetime(df["date"])
+    return df[KEYS + MEASURES]
+
+
+def _categorize(cells: pd.DataFrame) -> pd.DataFrame:
+    for col in ("region", "product"):
+        cells[col] = cells[col].astype("category")
+    cells["rows"] = cells["rows"].astype("int64")
+    return cells
+
+
+def cube_snapshot(cube: SalesCube) -> pa.Table:
+    """发布进程写入共享内存的立方体快照。"""
+    with cube._lock:
+        table = pa.Table.from_pandas(cube.cells, preserve_index=False)
+        return table.replace_schema_metadata({"raw_rows": str(cube.raw_rows)})
+
+
+class SharedSalesCube(SalesCube):
+    """多进程部署下的只读立方体：单元格来自发布进程的快照，本进程不读 CSV。"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._reader = snapshots.SnapshotReader("sales_cube")
+        self._seen: tuple[int, int] | None = None
+
+    def refresh(self) -> int:
+        table = self._reader.read()
+        if table is None:
+            return super().refresh()
+        with self._lock:
+            if self._reader.version == self._seen:
+                return 0
+            before = self.raw_rows
+            self.cells = _categorize(table.to_pandas())
+            self.raw_rows = int((table.schema.metadata or {}).get(b"raw_rows", b"0"))
+            self._seen = self._reader.version
+            return max(0, self.raw_rows - before)
+
+
+def open_cube() -> SalesCube:
+    return SharedSalesCube() if snapshots.enabled() else SalesCube()
@@ -0,0 +1,292 @@
+"""带内存记账的会话状态：有类型的字段、每个会话的内存预算、历史类字段压缩和闲置会话回收。
+
+直接往 ``st.session_state`` 里放的列表、字典没有上限也不会过期：浏览器标签页一直开着，
+会话就一直占着内存。这里把受管字段放在进程级的登记表里，按 session_id 区分：
+
+    state = session_state(count=Slot(int), todos=Slot(list, history=True, max_items=500))
+    state.count += 1                # 写入时检查类型、重新计算这个字段的字节数
+    state.append("todos", "买入")   # 历史类字段追加，只按新增元素记账
+
+- 每个会话的受管字段合计超过 ``SESSION_BUDGET_KB`` 时，先从占用最大的历史类字段丢掉最早的元素，
+  直到回到预算的 3/4；``state.dropped`` 记录每个字段丢了多少条
+- 后台回收线程把超过 ``SESSION_IDLE_SECONDS`` 没有重跑的会话整个删掉（已断开的会话也一样）；
+  这个会话下次重跑时拿到默认值，第一次读 ``state.reaped`` 为 True。只重跑 fragment 的页面要在 fragment 里
+  调用 ``session_state``，否则定时刷新不算活跃
+- ``session_stats()`` / ``render_session_stats()`` 给出全进程的会话数、总字节数、压缩和回收次数
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from lib.cache import sizeof
+
+
+SESSION_BUDGET = int(os.getenv("SESSION_BUDGET_KB", "1024")) * 1024
+IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "1800"))
+# 只在 st.session_state 里留一个标记：有标记却不在登记表里，说明这个会话被回收过
+_MARKER = "_session_store"
+_ITEM_OVERHEAD = 8  # 列表里每个元素的指针
+
+
+@dataclass(frozen=True)
+class Slot:
+    """一个受管字段：值的类型、默认值工厂（默认就是类型本身，``int()`` -> 0、``list()`` -> []），
+    以及是否是可以丢弃最早元素的历史类列表。"""
+
+    type: type
+    default: Callable[[], Any] | None = None
+    history: bool = False
+    max_items: int | None = None
+
+    def new(self) -> Any:
+        return (self.default or self.type)()
+
+
+class SessionState:
+    """一个会话的受管字段，按属性读写。
+
+    写入和字节数统计都在这个会话自己的锁里做，统计线程读 ``nbytes`` 时不会撞上正在修改的字段。
+    """
+
+    def __init__(self, session_id: str, registry: SessionRegistry, reaped: bool = False) -> None:
+        object.__setattr__(self, "_values", {})
+        object.__setattr__(self, "_slots", {})
+        object.__setattr__(self, "_sizes", {})
+        object.__setattr__(self, "session_id", session_id)
+        object.__setattr__(self, "_reaped", reaped)
+        object.__setattr__(self, "_lock", threading.RLock())
+        object.__setattr__(self, "dropped", {})
+        object.__setattr__(self, "last_seen", time.monotonic())
+        object.__setattr__(self, "_registry", registry)
+
+    @property
+    def reaped(self) -> bool:
+        """这个会话是否被回收过；只在回收后第一次读取时为 True，之后的重跑不再提示。"""
+        with self._lock:
+            reaped = self._reaped
+            object.__setattr__(self, "_reaped", False)
+        return reaped
+
+    def declare(self, slots: dict[str, Slot]) -> None:
+        with self._lock:
+            for name, slot in slots.items():
+                known = self._slots.get(name)
+                if known is not None and (known.type, known.history) != (slot.type, slot.history):
+                    raise TypeError(f"slot {name!r} is already declared as {known}")
+                if known is None:
+                    self._slots[name] = slot
+                    self._values[name] = slot.new()
+                    self._sizes[name] = sizeof(self._values[name])
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        slot = self._slots.get(name)
+        if slot is None:
+            raise AttributeError(f"undeclared session slot {name!r}")
+        if not isinstance(value, slot.type):
+            raise TypeError(f"slot {name!r} expects {slot.type.__name__}, got {type(value).__name__}")
+        size = sizeof(value)
+        with self._lock:
+            self._values[name] = value
+            self._sizes[name] = size
+            if slot.history:
+                self._trim(name, slot.max_items)
+            self._enforce()
+
+    def append(self, name: str, item: Any) -> None:
+        """往历史类字段追加一个元素；超过 max_items 时丢掉最早的。"""
+        slot = self._slots[name]
+        if not slot.history:
+            raise TypeError(f"slot {name!r} is not a history slot")
+        size = sizeof(item) + _ITEM_OVERHEAD
+        with self._lock:
+            self._values[name].append(item)
+            self._sizes[name] += size
+            self._trim(name, slot.max_items)
+            self._enforce()
+
+    def reset(self, name: str) -> None:
+        setattr(self, name, self._slots[name].new())
+        self.dropped.pop(name, None)
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def sizes(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._sizes)
+
+    def _trim(self, name: str, keep: int | None) -> int:
+        items = self._values[name]
+        if keep is None or len(items) <= keep:
+            return 0
+        cut = len(items) - keep
+        freed = sum(sizeof(v) + _ITEM_OVERHEAD for v in items[:cut])
+        del items[:cut]
+        self._sizes[name] -= freed
+        self.dropped[name] = self.dropped.get(name, 0) + cut
+        self._registry._record_drop(cut)
+        return cut
+
+    def _enforce(self) -> None:
+        """超出预算时压缩历史类字段：从占用最大的开始丢最早的元素，直到回到预算的 3/4。"""
+        budget = self._registry.budget
+        if self.nbytes <= budget:
+            return
+        target = budget * 3 // 4
+        histories = sorted(
+            (n for n, s in self._slots.items() if s.history and self._values[n]),
+            key=lambda n: self._sizes[n],
+            reverse=True,
+        )
+        for name in histories:
+            items = self._values[name]
+            excess, cut = self.nbytes - target, 0
+            while cut < len(items) and excess > 0:
+                excess -= sizeof(items[cut]) + _ITEM_OVERHEAD
+                cut += 1
+            self._trim(name, len(items) - cut)
+            if self.nbytes <= target:
+                break
+        self._registry._record_compaction(over=self.nbytes > budget)
+
+
+@dataclass
+class SessionStats:
+    sessions: int = 0
+    bytes: int = 0
+    largest: int = 0
+    budget: int = 0
+    compactions: int = 0
+    over_budget: int = 0
+    dropped_items: int = 0
+    reaped: int = 0
+    per_session: list[dict[str, Any]] = field(default_factory=list)
+
+
+class SessionRegistry:
+    """进程级登记表：session_id -> SessionState，外加一个回收闲置会话的后台线程。"""
+
+    def __init__(self, budget: int = SESSION_BUDGET, idle_seconds: float = IDLE_SECONDS) -> None:
+        self.budget = budget
+        self.idle_seconds = idle_seconds
+        self._sessions: dict[str, SessionState] = {}
+        self._lock = threading.Lock()
+        self._compactions = 0
+        self._over_budget = 0
+        self._dropped = 0
+        self._reaped = 0
+        self._reaper: threading.Thread | None = None
+
+    def get(self, session_id: str, slots: dict[str, Slot], was_seen: bool = False) -> SessionState:
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = SessionState(session_id, self, reaped=was_seen)
+                self._sessions[session_id] = state
+            self._start_reaper()
+        object.__setattr__(state, "last_seen", time.monotonic())
+        state.declare(slots)
+        return state
+
+    def reap(self, now: float | None = None) -> int:
+        """删除闲置超过 idle_seconds 的会话，返回删除个数。"""
+        cutoff = (time.monotonic() if now is None else now) - self.idle_seconds
+        with self._lock:
+            idle = [sid for sid, s in self._sessions.items() if s.last_seen < cutoff]
+            for sid in idle:
+                del self._sessions[sid]
+            self._reaped += len(idle)
+        return len(idle)
+
+    def _start_reaper(self) -> None:
+        if self._reaper is None:
+            interval = max(1.0, min(60.0, self.idle_seconds / 4))
+            self._reaper = threading.Thread(target=self._reap_forever, args=(interval,), name="session-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_forever(self, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            self.reap()
+
+    def _record_drop(self, items: int) -> None:
+        with self._lock:
+            self._dropped += items
+
+    def _record_compaction(self, over: bool) -> None:
+        with self._lock:
+            self._compactions += 1
+            self._over_budget += over
+
+    def stats(self) -> SessionStats:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            stats = SessionStats(
+                budget=self.budget,
+                compactions=self._compactions,
+                over_budget=self._over_budget,
+                dropped_items=self._dropped,
+                reaped=self._reaped,
+            )
+        now = time.monotonic()
+        # 每个会话的字节数在它自己的锁里读，读到的是某次写入前后的完整值
+        sizes = [s.nbytes for s in sessions]
+        stats.sessions = len(sessions)
+        stats.bytes = sum(sizes)
+        stats.largest = max(sizes, default=0)
+        stats.per_session = [
+            {"session": s.session_id[:8], "KB": round(n / 1024, 1), "idle_s": round(now - s.last_seen)}
+            for s, n in sorted(zip(sessions, sizes), key=lambda p: p[1], reverse=True)
+        ]
+        return stats
+
+
+@lru_cache(maxsize=1)
+def registry() -> SessionRegistry:
+    return SessionRegistry()
+
+
+def session_state(**slots: Slot) -> SessionState:
+    """当前会话的受管字段；每次重跑都调用，同时刷新这个会话的最后活跃时间。"""
+    ctx = get_script_run_ctx()
+    session_id = ctx.session_id if ctx is not None else "local"
+    was_seen = bool(st.session_state.get(_MARKER))
+    st.session_state[_MARKER] = True
+    return registry().get(session_id, slots, was_seen=was_seen)
+
+
+def session_stats() -> SessionStats:
+    return registry().stats()
+
+
+def render_session_stats(state: SessionState | None = None) -> None:
+    """小型统计面板：全进程的会话数和占用，以及当前会话各字段的字节数。"""
+    stats = session_stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("会话数", stats.sessions)
+    c2.metric("会话状态总占用", f"{stats.bytes / 1024:.1f} KB")
+    c3.metric("已回收会话", stats.reaped)
+    c4.metric("压缩 / 丢弃条数", f"{stats.compactions} / {stats.dropped_items}")
+    if state is not None:
+        st.caption(f"当前会话 {state.nbytes / 1024:.1f} KB / 预算 {stats.budget / 1024:.0f} KB")
+        sizes = pd.DataFrame({"字段": list(state.sizes()), "字节": list(state.sizes().values())})
+        st.dataframe(sizes, width="stretch", hide_index=True)
+    if stats.per_session:
+        st.dataframe(pd.DataFrame(stats.per_session), width="stretch", hide_index=True)
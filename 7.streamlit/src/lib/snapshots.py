@@ -0,0 +1,126 @@
+"""多进程部署时的共享只读快照。
+
+发布进程把行情、舆情、销售汇总写成 Arrow IPC 文件放进共享内存目录（默认 ``/dev/shm``），
+写完用 ``os.replace`` 原子替换；各 Streamlit 工作进程内存映射读取，数值列直接引用映射的内存，
+不复制也不反序列化。替换后旧文件仍被已有映射引用，读到一半的进程不会受影响。
+
+没有设置 ``STREAMLIT_SNAPSHOT_DIR`` 时 ``enabled()`` 为 False，各页面照常在本进程内计算。
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterable
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+
+ENV_DIR = "STREAMLIT_SNAPSHOT_DIR"
+
+
+def snapshot_dir() -> Path | None:
+    value = os.getenv(ENV_DIR)
+    return Path(value) if value else None
+
+
+def enabled() -> bool:
+    return snapshot_dir() is not None
+
+
+def publish(name: str, table: pa.Table, root: Path | None = None) -> Path:
+    """把 table 写成 ``<root>/<name>.arrow``；先写临时文件再原子替换，读者永远看到完整的快照。"""
+    root = root or snapshot_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    target = root / f"{name}.arrow"
+    tmp = root / f".{name}.{os.getpid()}.tmp"
+    with pa.OSFile(str(tmp), "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, target)
+    return target
+
+
+class SnapshotReader:
+    """读取某个快照的最新版本；文件没被替换时直接返回上次映射出的表。"""
+
+    def __init__(self, name: str, root: Path | None = None) -> None:
+        self.path = (root or snapshot_dir()) / f"{name}.arrow"
+        self._lock = threading.Lock()
+        self._version: tuple[int, int] | None = None
+        self._table: pa.Table | None = None
+
+    def read(self) -> pa.Table | None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        version = (stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            if version != self._version:
+                source = pa.memory_map(str(self.path), "r")
+                self._table = ipc.open_file(source).read_all()
+                self._version = version
+            return self._table
+
+    @property
+    def version(self) -> tuple[int, int] | None:
+        return self._version
+
+
+SUBSCRIPTION_TTL = float(os.getenv("STREAMLIT_SUBSCRIPTION_TTL", "300"))
+
+_SUBSCRIBED: dict[str, dict[str, float]] = {}
+_WRITTEN: dict[str, float] = {}
+_SUBSCRIBE_LOCK = threading.Lock()
+
+
+def subscribe(kind: str, names: Iterable[str], root: Path | None = None, now: float | None = None) -> bool:
+    """登记本进程需要的标的/主题，发布进程下一轮会把它们加进快照；有新名字时返回 True。
+
+    每个名字记录最后一次被读的时间，超过 ``SUBSCRIPTION_TTL`` 没再读就从登记里删掉。
+    只有出现新名字、删掉旧名字或距上次写入超过 TTL/4 时才重写登记文件，平时的重跑不碰磁盘。
+    """
+    now = time.time() if now is None else now
+    with _SUBSCRIBE_LOCK:
+        known = _SUBSCRIBED.setdefault(kind, {})
+        new = set(names) - known.keys()
+        known.update(dict.fromkeys(names, now))
+        stale = [n for n, seen in known.items() if now - seen > SUBSCRIPTION_TTL]
+        for n in stale:
+            del known[n]
+        if not new and not stale and now - _WRITTEN.get(kind, float("-inf")) < SUBSCRIPTION_TTL / 4:
+            return False
+        folder = (root or snapshot_dir()) / "subscriptions"
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"{kind}-{os.getpid()}.txt"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text("".join(f"{n}\t{known[n]:.3f}\n" for n in sorted(known)), encoding="utf-8")
+        os.replace(tmp, path)
+        _WRITTEN[kind] = now
+        return bool(new)
+
+
+def subscriptions(kind: str, root: Path | None = None, now: float | None = None) -> set[str]:
+    """所有仍在运行的工作进程登记过、且 ``SUBSCRIPTION_TTL`` 内还被读过的名字。
+
+    进程退出后它的登记文件直接删掉；没人再读的名字不再返回，发布进程随之停止模拟它们。
+    """
+    now = time.time() if now is None else now
+    root = (root or snapshot_dir()) / "subscriptions"
+    names: set[str] = set()
+    for path in root.glob(f"{kind}-*.txt"):
+        pid = int(path.stem.rsplit("-", 1)[1])
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            path.unlink(missing_ok=True)
+            continue
+        except PermissionError:
+            pass
+        for line in path.read_text(encoding="utf-8").splitlines():
+            name, _, seen = line.partition("\t")
+            if name and (not seen or now - float(seen) <= SUBSCRIPTION_TTL):
+                names.add(name)
+    return names
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import numpy as np
+
+from lib.cache import BoundedCache, bounded_cache
+
+
+def block(n: int) -> np.ndarray:
+    return np.zeros(n, dtype=np.uint8)
+
+
+def test_least_recently_used_entries_are_evicted_by_bytes() -> None:
+    cache = BoundedCache(block, max_bytes=350)
+    for n in (100, 101, 102):
+        cache(n)
+    cache(100)  # 刷新 100 的位置，下次先淘汰 101
+    cache(103)
+
+    assert [key[0][0] for key in cache._entries] == [102, 100, 103]
+    assert cache.stats.bytes == 305
+    assert cache.stats.evictions == 1
+    assert (cache.stats.hits, cache.stats.misses) == (1, 4)
+
+
+def test_oversized_values_are_returned_but_not_kept() -> None:
+    cache = BoundedCache(block, max_bytes=50)
+    assert len(cache(80)) == 80
+    assert cache.stats.oversized == 1
+    assert cache.stats.entries == cache.stats.bytes == 0
+
+
+def test_expired_entries_are_recomputed() -> None:
+    now = [0.0]
+    calls = []
+    cache = BoundedCache(lambda x: calls.append(x) or x, max_bytes=1 << 20, ttl=10, clock=lambda: now[0])
+    cache("a")
+    now[0] = 5
+    cache("a")
+    now[0] = 11
+    cache("a")
+    assert calls == ["a", "a"]
+    assert cache.stats.entries == 1
+
+
+def test_concurrent_misses_compute_once() -> None:
+    release = threading.Event()
+    calls = []
+
+    def slow(x: int) -> int:
+        calls.append(x)
+        release.wait(2)
+        return x * 2
+
+    cache = BoundedCache(slow, max_bytes=1 << 20)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache(21))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert calls == [21]
+    assert results == [42] * 4
+
+
+def test_decorator_reuses_the_cache_across_reruns_and_warms_once() -> None:
+    def build():
+        @bounded_cache(max_bytes=1 << 20)
+        def squares(n: int) -> list[int]:
+            return [i * i for i in range(n)]
+
+        return squares
+
+    first = build()
+    first.warm([(3,), (4,)], background=False)
+    second = build()
+    assert second is first
+    second.warm([(5,)], background=False)
+    assert second.stats.entries == 2
+    assert second(3) == [0, 1, 4]
+    assert second.stats.hits == 1
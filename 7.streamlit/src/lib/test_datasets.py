@@ -0,0 +1,87 @@
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from lib import datasets
+
+
+ROWS = [
+    "2026-01-01,华北,120,870,A",
+    "2026-01-02,华北,132,900,A",
+    "2026-01-01,华东,156,960,B",
+    "2026-01-02,华东,,940,B",
+    "2026-01-03,华南,98,700,A",
+]
+
+
+def write_csv(path: Path, rows: list[str]) -> Path:
+    path.write_text("date,region,revenue,orders,product\n" + "\n".join(rows) + "\n", encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def sales_csv(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setattr(datasets, "CACHE_DIR", tmp_path / "cache")
+    return write_csv(tmp_path / "sales.csv", ROWS)
+
+
+def test_csv_is_converted_once_and_reconverted_when_it_changes(sales_csv: Path) -> None:
+    target = datasets.ensure_parquet(sales_csv)
+    converted_at = target.stat().st_mtime_ns
+    assert datasets.ensure_parquet(sales_csv).stat().st_mtime_ns == converted_at
+    assert datasets.row_count(sales_csv) == 5
+
+    write_csv(sales_csv, ROWS + ["2026-01-04,华南,101,720,B"])
+    os.utime(sales_csv, ns=(converted_at + 10**9, converted_at + 10**9))
+    assert datasets.row_count(sales_csv) == 6
+
+
+def test_concurrent_cold_builds_do_not_share_a_temp_file(sales_csv: Path) -> None:
+    write_csv(sales_csv, ROWS * 2000)
+    barrier = threading.Barrier(4)
+    errors = []
+
+    def build() -> None:
+        barrier.wait()
+        try:
+            datasets.ensure_parquet(sales_csv)
+        except Exception as exc:  # pragma: no cover - 失败时在下面的断言里报出来
+            errors.append(exc)
+
+    threads = [threading.Thread(target=build) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert datasets.row_count(sales_csv) == len(ROWS) * 2000
+    assert [p.name for p in datasets.parquet_path(sales_csv).parent.iterdir()] == ["sales.parquet"]
+
+
+def test_load_sales_reads_categoricals_and_selected_columns(sales_csv: Path) -> None:
+    df = datasets.load_sales(sales_csv, columns=["date", "region", "revenue"])
+    assert df.columns.tolist() == ["date", "region", "revenue"]
+    assert df["region"].dtype == "category"
+    assert str(df["date"].dtype).startswith("datetime64")
+    assert datasets.distinct("region", sales_csv) == ["华东", "华北", "华南"]
+
+
+def test_read_page_returns_absolute_row_numbers(sales_csv: Path) -> None:
+    page, total = datasets.read_page(1, 2, sales_csv)
+    assert total == 5
+    assert page.index.tolist() == [2, 3]
+    assert page["region"].tolist() == ["华东", "华东"]
+
+    empty, _ = datasets.read_page(9, 2, sales_csv)
+    assert empty.empty
+
+
+def test_empty_region_selection_yields_an_empty_frame(sales_csv: Path) -> None:
+    # 先走逐块读 CSV 的路径，再走 Parquet 下推的路径
+    assert datasets.clean_sales([], 0, sales_csv).empty
+    datasets.ensure_parquet(sales_csv)
+    assert datasets.clean_sales([], 0, sales_csv).empty
+    assert len(datasets.clean_sales(["华北"], 0, sales_csv)) == 2
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from lib.downsample import compact_values, downsample, lttb, minmax, ohlc, series_figure, target_points
+
+
+def walk(n: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return np.arange(n, dtype=np.float64) * 2000.0, np.cumsum(rng.normal(size=n))
+
+
+def test_lttb_keeps_endpoints_and_the_spike() -> None:
+    x, y = walk(10_000)
+    y[4321] = 1e6
+    keep = lttb(x, y, 200)
+    assert len(keep) == 200
+    assert keep[0] == 0 and keep[-1] == len(y) - 1
+    assert np.all(np.diff(keep) > 0)
+    assert 4321 in keep
+
+
+def test_minmax_keeps_global_extremes_in_time_order() -> None:
+    x, y = walk(50_000, seed=1)
+    keep = minmax(x, y, 300)
+    assert len(keep) <= 300
+    assert np.all(np.diff(keep) > 0)
+    assert y[keep].max() == y.max() and y[keep].min() == y.min()
+
+
+def test_ohlc_buckets_cover_the_whole_series() -> None:
+    x, y = walk(1_003, seed=2)
+    bars = ohlc(x, y, 10)
+    assert len(bars.x) == 10
+    assert bars.open[0] == y[0] and bars.close[-1] == y[-1]
+    assert bars.high.max() == y.max() and bars.low.min() == y.min()
+    assert np.all(bars.low <= bars.open) and np.all(bars.open <= bars.high)
+
+
+@pytest.mark.parametrize("size", [1_000, 100_000])
+def test_point_count_is_bounded_by_chart_width(size: int) -> None:
+    budget = target_points(1200, "lttb")
+    x, y = walk(size)
+    for method in ("lttb", "minmax"):
+        tx, ty = downsample(x, y, budget, method)
+        assert len(tx) == len(ty) <= budget
+
+
+def test_short_series_and_leading_nans_stay_raw() -> None:
+    x, y = walk(50)
+    y[:10] = np.nan
+    tx, ty = downsample(x, y, 600)
+    assert len(ty) == 40 and not np.isnan(ty).any()
+
+
+def test_series_figure_sends_at_most_the_budget_and_keeps_precision() -> None:
+    x, y = walk(20_000)
+    frame = pd.DataFrame(
+        {"BTC-USD": np.round(67_000 + y, 4), "AAPL": y[::-1].copy()},
+        index=pd.DatetimeIndex((x + 1.7e12).astype("datetime64[ms]"), name="time"),
+    )
+    btc, aapl = series_figure(frame, 400).data
+    assert len(btc.x) == len(aapl.x) == 400
+    assert btc.y.dtype == np.float64 and aapl.y.dtype == np.float32
+    assert np.isin(btc.y, frame["BTC-USD"].to_numpy()).all()
+    candles = series_figure(frame, 150, "ohlc").data
+    assert [len(trace.open) for trace in candles] == [150, 150]
+
+
+def test_compact_values_falls_back_only_when_precision_is_lost() -> None:
+    assert compact_values(np.array([0.125, -0.4, np.nan])).dtype == np.float32
+    assert compact_values(np.array([np.nan, np.nan])).dtype == np.float32
+    assert compact_values(np.array([131_234.57])).dtype == np.float64
@@ -0,0 +1,78 @@
+import io
+
+import pyarrow as pa
+import pytest
+
+from lib.ingest import CsvIngest, as_text, for_upload
+
+
+def ingest(data: bytes, block_size: int = 1 << 16) -> CsvIngest:
+    job = CsvIngest(io.BytesIO(data), len(data), "upload.csv", block_size=block_size)
+    job.run()
+    return job
+
+
+@pytest.fixture
+def jobs():
+    created = []
+    yield created
+    for job in created:
+        job.close()
+
+
+def test_small_file_keeps_sampled_types_and_pages(jobs) -> None:
+    job = ingest(b"id,region,amount\n" + b"".join(b"%d,r%d,%d.5\n" % (i, i % 2, i) for i in range(100)))
+    jobs.append(job)
+    assert job.ok and not job.relaxed
+    assert job.rows == 100
+    assert job.schema.field("region").type == pa.dictionary(pa.int32(), pa.string())
+    assert job.progress == 1.0
+    assert len(job.preview()) == 20
+
+    page, total = job.page(2, 30)
+    assert total == 100
+    assert page.index.tolist() == list(range(60, 90))
+    assert page["id"].tolist() == list(range(60, 90))
+
+
+def test_values_after_the_sample_widen_the_column(jobs) -> None:
+    # 样本（1 MB）里全是整数，后面先出现小数、再出现文本
+    body = b"".join(b"%d,%d\n" % (i, i) for i in range(300_000))
+    job = ingest(b"id,value\n" + body + b"300000,1.5\n300001,foo\n")
+    jobs.append(job)
+
+    assert job.ok, job.error
+    assert job.relaxed
+    assert job.rows == 300_002
+    assert job.schema.field("id").type == pa.float64()
+    assert job.schema.field("value").type == pa.string()
+    page, _ = job.page(300_001, 1)
+    assert page["value"].tolist() == ["foo"]
+
+
+def test_unknown_column_falls_back_to_all_strings_and_malformed_files_fail(jobs) -> None:
+    types = {"a": pa.float64(), "b": pa.int64()}
+    assert as_text(types, pa.ArrowInvalid("In CSV column #1: bad")) == {"a": pa.float64(), "b": pa.string()}
+    assert as_text(types, pa.ArrowInvalid("other")) == {"a": pa.string(), "b": pa.string()}
+
+    job = ingest(b"a,b\n1,2\n3\n")
+    jobs.append(job)
+    assert not job.ok
+    assert "Expected 2 columns" in job.error
+
+
+def test_new_upload_replaces_the_previous_job() -> None:
+    class Upload(io.BytesIO):
+        def __init__(self, name: str, data: bytes) -> None:
+            super().__init__(data)
+            self.name, self.size, self.file_id = name, len(data), name
+
+    state: dict = {}
+    first = for_upload(state, Upload("a.csv", b"x\n1\n"))
+    assert for_upload(state, Upload("a.csv", b"x\n1\n")) is first
+    first.wait(5)
+    second = for_upload(state, Upload("b.csv", b"y\n2\n"))
+    assert second is not first
+    assert not first.workdir.exists()
+    assert for_upload(state, None) is None
+    assert not second.workdir.exists()
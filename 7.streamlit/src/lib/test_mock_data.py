@@ -0,0 +1,52 @@
+import numpy as np
+
+from lib.mock_data import TickGenerator, next_market, next_sentiment
+
+
+def test_ticks_move_every_symbol_and_fill_history() -> None:
+    gen = TickGenerator(seed=1, history_points=8, min_interval=float("inf"))
+    rows = gen.market(["AAPL", "NVDA"])
+    assert [r["symbol"] for r in rows] == ["AAPL", "NVDA"]
+    before = gen.prices.copy()
+
+    for _ in range(10):
+        gen.tick()
+    assert (gen.prices != before).all()
+    hist = gen.price_history(["NVDA", "AAPL"], n=20)
+    assert hist.columns.tolist() == ["NVDA", "AAPL"]
+    assert len(hist) == 8
+    assert hist["AAPL"].iloc[-1] == np.float32(gen.prices[0])
+
+
+def test_rows_are_served_from_one_shared_step_within_min_interval() -> None:
+    gen = TickGenerator(seed=2, min_interval=60)
+    first = next_market(["AAPL"], gen)
+    assert next_market(["AAPL"], gen) == first
+    assert gen.ticks == 1
+    assert [r["topic"] for r in next_sentiment(["AI", "美联储"], gen)] == ["AI", "美联储"]
+
+
+def test_idle_symbols_and_topics_are_dropped_with_their_history() -> None:
+    gen = TickGenerator(seed=3, history_points=4, min_interval=float("inf"), idle_ttl=60)
+    gen.market(["AAPL", "MSFT", "TSLA"])
+    gen.sentiment(["AI", "EV"])
+    gen.tick()
+    tsla = gen.prices[gen._symbol_idx["TSLA"]]
+
+    # MSFT / EV 很久没人读了
+    gen._symbol_read[gen._symbol_idx["MSFT"]] -= 120
+    gen._topic_read[gen._topic_idx["EV"]] -= 120
+    rows = gen.market(["TSLA"])
+    gen.sentiment(["AI"])
+
+    assert gen.symbols == ["AAPL", "TSLA"]
+    assert gen.market_history.names == ["AAPL", "TSLA"]
+    assert gen.market_history._values.shape[1] == len(gen.prices) == len(gen.volumes) == 2
+    assert rows[0]["price"] == round(tsla, 2)
+    assert gen.topics == ["AI"]
+    assert gen.sentiment_history.names == ["AI"]
+
+    # 再被读到时重新开始模拟，历史从空开始
+    gen.market(["MSFT"])
+    assert gen.symbols == ["AAPL", "TSLA", "MSFT"]
+    assert gen.price_history(["MSFT"])["MSFT"].isna().all()
@@ -0,0 +1,51 @@
+import json
+import pathlib
+import time
+
+import pytest
+
+from lib import perf
+
+
+def read(path: pathlib.Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_rerun_records_accumulated_phases(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    log = tmp_path / "perf.jsonl"
+    monkeypatch.setenv(perf.ENV_LOG, str(log))
+
+    with perf.rerun("panel:market"):
+        with perf.phase("fetch"):
+            time.sleep(0.01)
+        for _ in range(2):
+            with perf.phase("figure"):
+                time.sleep(0.005)
+
+    (record,) = read(log)
+    assert record["name"] == "panel:market"
+    assert set(record["phases"]) == {"fetch", "figure"}
+    assert record["phases"]["figure"] >= 10
+    assert record["total_ms"] >= record["phases"]["fetch"] + record["phases"]["figure"]
+
+
+def test_nested_rerun_counts_into_the_outer_one(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    log = tmp_path / "perf.jsonl"
+    monkeypatch.setenv(perf.ENV_LOG, str(log))
+
+    @perf.rerun("app")
+    def main() -> None:
+        with perf.rerun("panel:signal"), perf.phase("frame"):
+            pass
+
+    main()
+    main()
+    assert [r["name"] for r in read(log)] == ["app", "app"]
+    assert all("frame" in r["phases"] for r in read(log))
+
+
+def test_disabled_without_log_path(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(perf.ENV_LOG, raising=False)
+    with perf.rerun("app"), perf.phase("fetch"):
+        pass
+    assert list(tmp_path.iterdir()) == []
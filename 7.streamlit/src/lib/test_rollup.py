@@ -0,0 +1,105 @@
+from pathlib import Path
+
+import pandas as pd
+
+from lib.rollup import MISSING_PRODUCT, SalesCube
+
+
+HEADER = "date,region,revenue,orders,product\n"
+
+
+def append(path: Path, text: str) -> None:
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(text)
+
+
+def rows(n: int, start: int = 0) -> str:
+    regions, products = ["华北", "华东", "华南"], ["A", "B"]
+    return "".join(
+        f"2026-01-{1 + i % 5:02d},{regions[i % 3]},{10 + i % 7},{i % 11},{products[i % 2]}\n" for i in range(start, start + n)
+    )
+
+
+def test_appended_rows_are_merged_into_existing_cells(tmp_path: Path) -> None:
+    csv = tmp_path / "sales.csv"
+    csv.write_text(HEADER + rows(500), encoding="utf-8")
+    # 小块读取，让同一个单元格跨多个批次
+    cube = SalesCube(csv, block_size=1 << 10)
+    assert cube.refresh() == 500
+    cells = len(cube.cells)
+
+    append(csv, rows(700, start=500))
+    assert cube.refresh() == 700
+    assert cube.refresh() == 0
+    assert len(cube.cells) == cells
+    assert cube.raw_rows == 1200
+
+    raw = pd.read_csv(csv, parse_dates=["date"])
+    expected = raw[raw["region"] == "华东"].groupby("date")[["revenue", "orders"]].sum()
+    got = cube.rollup("date", region="华东").set_index("date")[["revenue", "orders"]]
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False, check_names=False, check_index_type=False)
+    assert cube.slice(product="B")["rows"].sum() == (raw["product"] == "B").sum()
+
+
+def test_half_written_line_waits_for_the_next_refresh(tmp_path: Path) -> None:
+    csv = tmp_path / "sales.csv"
+    csv.write_text(HEADER + rows(3), encoding="utf-8")
+    cube = SalesCube(csv)
+    cube.refresh()
+
+    append(csv, "2026-01-09,华北,5")
+    assert cube.refresh() == 0
+    append(csv, "0,7,A\n")
+    assert cube.refresh() == 1
+    assert cube.rollup("date", start=pd.Timestamp("2026-01-09"))["revenue"].tolist() == [50.0]
+
+
+def test_missing_keys_are_dropped_and_missing_product_is_labelled(tmp_path: Path) -> None:
+    csv = tmp_path / "sales.csv"
+    csv.write_text(HEADER + "2026-01-01,华北,10,1,\n,华北,99,1,A\n2026-01-01,,99,1,A\n", encoding="utf-8")
+    cube = SalesCube(csv)
+    assert cube.refresh() == 3
+    assert cube.products() == [MISSING_PRODUCT]
+    assert cube.cells["revenue"].sum() == 10
+
+
+def test_truncated_file_rebuilds_the_cube(tmp_path: Path) -> None:
+    csv = tmp_path / "sales.csv"
+    csv.write_text(HEADER + rows(50), encoding="utf-8")
+    cube = SalesCube(csv)
+    cube.refresh()
+
+    csv.write_text(HEADER + rows(2), encoding="utf-8")
+    assert cube.refresh() == 2
+    assert cube.raw_rows == 2
+    assert cube.cells["rows"].sum() == 2
+
+
+def test_file_rewritten_in_place_rebuilds_the_cube(tmp_path: Path) -> None:
+    csv = tmp_path / "sales.csv"
+    csv.write_text(HEADER + rows(50), encoding="utf-8")
+    cube = SalesCube(csv)
+    cube.refresh()
+
+    # 重新导出：同样的表头，前 50 行里有改动，还多了 10 行；不能把第 50 行之后的字节当成追加
+    edited = rows(50).replace("2026-01-01,华北,10,", "2026-01-01,华北,1000,", 1)
+    with open(csv, "r+", encoding="utf-8") as fh:
+        fh.write(HEADER + edited + rows(10, start=50))
+    assert cube.refresh() == 60
+    assert cube.raw_rows == 60
+    raw = pd.read_csv(csv)
+    assert cube.cells["revenue"].sum() == raw["revenue"].sum()
+
+
+def test_replaced_file_rebuilds_the_cube(tmp_path: Path) -> None:
+    csv = tmp_path / "sales.csv"
+    csv.write_text(HEADER + rows(50), encoding="utf-8")
+    cube = SalesCube(csv)
+    cube.refresh()
+
+    # 写到新文件再 rename 过来：内容前缀一样，但 inode 换了，照样重读
+    fresh = tmp_path / "sales.new"
+    fresh.write_text(HEADER + rows(50) + rows(5, start=50), encoding="utf-8")
+    fresh.replace(csv)
+    assert cube.refresh() == 55
+    assert cube.raw_rows == 55
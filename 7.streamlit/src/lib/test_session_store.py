@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+from lib.session_store import SessionRegistry, Slot
+
+
+SLOTS = {"count": Slot(int), "todos": Slot(list, history=True, max_items=50)}
+
+
+def test_history_slots_are_capped_and_compacted_to_the_budget() -> None:
+    reg = SessionRegistry(budget=4096, idle_seconds=60)
+    state = reg.get("a", SLOTS)
+    for i in range(60):
+        state.append("todos", f"task-{i}")
+    assert len(state.todos) == 50
+    assert state.todos[0] == "task-10"
+    assert state.dropped["todos"] == 10
+
+    state.todos = ["x" * 100] * 40
+    assert state.nbytes <= reg.budget * 3 // 4
+    assert sum(state.sizes().values()) == state.nbytes
+    stats = reg.stats()
+    assert stats.compactions == 1
+    assert stats.dropped_items > 10
+
+    with pytest.raises(TypeError):
+        state.count = "1"
+
+
+def test_idle_sessions_are_reaped_and_report_it_once() -> None:
+    reg = SessionRegistry(budget=1 << 20, idle_seconds=60)
+    old = reg.get("old", SLOTS)
+    old.count = 5
+    fresh = reg.get("fresh", SLOTS)
+    object.__setattr__(old, "last_seen", fresh.last_seen - 120)
+
+    assert reg.reap(now=fresh.last_seen) == 1
+    assert reg.stats().sessions == 1
+    assert reg.stats().reaped == 1
+
+    # 浏览器还留着标记：回来的会话拿到默认值，提示只出现一次
+    back = reg.get("old", SLOTS, was_seen=True)
+    assert back.count == 0
+    assert back.reaped
+    assert not back.reaped
+    assert not reg.get("old", SLOTS, was_seen=True).reaped
+
+
+def test_stats_read_sizes_while_sessions_write() -> None:
+    reg = SessionRegistry(budget=1 << 16, idle_seconds=60)
+    state = reg.get("a", SLOTS)
+    stop = threading.Event()
+
+    def write() -> None:
+        i = 0
+        while not stop.is_set():
+            state.append("todos", "x" * (i % 50))
+            state.declare({f"extra_{i % 200}": Slot(int)})
+            i += 1
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        for _ in range(500):
+            reg.stats()
+    finally:
+        stop.set()
+        writer.join()
+    assert reg.stats().bytes == state.nbytes
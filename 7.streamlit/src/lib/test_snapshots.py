@@ -0,0 +1,56 @@
+import os
+from pathlib import Path
+
+import pyarrow as pa
+import pytest
+
+from lib import snapshots
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(snapshots, "_SUBSCRIBED", {})
+    monkeypatch.setattr(snapshots, "_WRITTEN", {})
+    monkeypatch.setattr(snapshots, "SUBSCRIPTION_TTL", 100.0)
+
+
+def test_reader_maps_the_latest_published_table(tmp_path: Path) -> None:
+    reader = snapshots.SnapshotReader("market", root=tmp_path)
+    assert reader.read() is None
+
+    snapshots.publish("market", pa.table({"symbol": ["AAPL"], "price": [1.0]}), root=tmp_path)
+    first = reader.read()
+    assert first.column("price").to_pylist() == [1.0]
+    assert reader.read() is first
+
+    snapshots.publish("market", pa.table({"symbol": ["AAPL"], "price": [2.0]}), root=tmp_path)
+    assert reader.read().column("price").to_pylist() == [2.0]
+    assert list(tmp_path.glob(".*.tmp")) == []
+
+
+def test_subscriptions_expire_when_nobody_reads_them(tmp_path: Path) -> None:
+    assert snapshots.subscribe("market", ["AAPL", "MSFT"], root=tmp_path, now=1000)
+    path = tmp_path / "subscriptions" / f"market-{os.getpid()}.txt"
+    written = path.stat().st_mtime_ns
+
+    # 已登记的名字在 TTL/4 内不重写文件
+    assert not snapshots.subscribe("market", ["AAPL"], root=tmp_path, now=1010)
+    assert path.stat().st_mtime_ns == written
+    assert snapshots.subscriptions("market", root=tmp_path, now=1050) == {"AAPL", "MSFT"}
+
+    # 只剩 AAPL 还在被读：MSFT 超过 TTL 后从文件和结果里消失
+    snapshots.subscribe("market", ["AAPL"], root=tmp_path, now=1090)
+    assert snapshots.subscriptions("market", root=tmp_path, now=1105) == {"AAPL"}
+    snapshots.subscribe("market", ["AAPL"], root=tmp_path, now=1105)
+    assert "MSFT" not in path.read_text(encoding="utf-8")
+    assert snapshots.subscriptions("market", root=tmp_path, now=1300) == set()
+
+
+def test_registrations_of_exited_processes_are_removed(tmp_path: Path) -> None:
+    folder = tmp_path / "subscriptions"
+    folder.mkdir()
+    dead = folder / "sentiment-999999999.txt"
+    dead.write_text("AI\t1000.000\n", encoding="utf-8")
+
+    assert snapshots.subscriptions("sentiment", root=tmp_path, now=1000) == set()
+    assert not dead.exists()
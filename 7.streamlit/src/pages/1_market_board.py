@@ -1,31 +1,50 @@
 from __future__ import annotations
 
 import pandas as pd
-import plotly.express as px
 import streamlit as st
 
-from lib.mock_data import next_market
+from lib import perf
+from lib.downsample import series_figure, target_points
+from lib.mock_data import HISTORY_POINTS, next_market, shared_generator
 
-st.title("行情看板")
-
-watch = st.text_input("标的列表（逗号分隔）", value="AAPL,MSFT,NVDA,TSLA,BTC-USD")
-symbols = [s.strip().upper() for s in watch.split(",") if s.strip()]
-
-market = next_market(st.session_state, symbols)
-df = pd.DataFrame(market)
+# 降采样按多宽的图表计算目标点数；历史再长，每条曲线发给浏览器的点数也不超过它
+CHART_WIDTH_PX = 1200
+ZOOM_WINDOWS = {"全部": None, "15 分钟": 900, "5 分钟": 300, "1 分钟": 60}
+DOWNSAMPLING = {"LTTB": "lttb", "Min/Max": "minmax", "OHLC": "ohlc"}
 
-cols = st.columns(min(4, len(df)))
-for i, row in df.head(4).iterrows():
-    cols[i].metric(row["symbol"], f"{row['price']:.2f}", f"{row['change_pct']:+.2f}%")
-
-hist_rows = []
-for symbol, row in st.session_state.market_store.items():
-    for p in row["history"][-40:]:
-        hist_rows.append({"symbol": symbol, "time": p["time"], "price": p["price"]})
-
-hist = pd.DataFrame(hist_rows)
-if not hist.empty:
-    fig = px.line(hist, x="time", y="price", color="symbol", title="价格轨迹")
-    st.plotly_chart(fig, width="stretch")
+st.title("行情看板")
 
-st.dataframe(df.sort_values("change_pct", ascending=False), width="stretch", hide_index=True)
+with perf.rerun("market_board"):
+    watch = st.text_input("标的列表（逗号分隔）", value="AAPL,MSFT,NVDA,TSLA,BTC-USD")
+    symbols = [s.strip().upper() for s in watch.split(",") if s.strip()]
+
+    with perf.phase("fetch"):
+        market = next_market(symbols)
+    with perf.phase("frame"):
+        df = pd.DataFrame(market)
+
+    cols = st.columns(min(4, len(df)))
+    for i, row in df.head(4).iterrows():
+        cols[i].metric(row["symbol"], f"{row['price']:.2f}", f"{row['change_pct']:+.2f}%")
+
+    left, right = st.columns(2)
+    zoom = left.radio("时间窗口", list(ZOOM_WINDOWS), horizontal=True)
+    mode = right.radio("降采样", list(DOWNSAMPLING), horizontal=True)
+
+    with perf.phase("fetch"):
+        hist = shared_generator().price_history(symbols, HISTORY_POINTS)
+    if ZOOM_WINDOWS[zoom] is not None and not hist.empty:
+        # 放大到短窗口时点数少于目标点数，直接画原始分辨率
+        with perf.phase("frame"):
+            hist = hist[hist.index >= hist.index[-1] - pd.Timedelta(seconds=ZOOM_WINDOWS[zoom])]
+    if not hist.empty:
+        budget = target_points(CHART_WIDTH_PX, DOWNSAMPLING[mode])
+        shown = f"原始 {len(hist):,} 点" if len(hist) <= budget else f"{len(hist):,} 点 → {mode} {budget}"
+        with perf.phase("figure"):
+            fig = series_figure(hist, budget, DOWNSAMPLING[mode], title=f"价格轨迹（{zoom} · {shown}）")
+            fig.update_layout(yaxis_title="price", legend_title_text="symbol")
+        with perf.phase("serialize"):
+            st.plotly_chart(fig, width="stretch")
+
+    with perf.phase("serialize"):
+        st.dataframe(df.sort_values("change_pct", ascending=False), width="stretch", hide_index=True)
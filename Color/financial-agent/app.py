@@ -1,17 +1,23 @@
 from __future__ import annotations
 
 import os
-import random
 import time
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterable, Iterator
 
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-import requests
 import streamlit as st
 
+from chat_history import ChatHistory, ContextEncoder
+from chat_stream import open_chat_stream, paced_chunks, render_stream
+from charts import MARKET_COLORS, TREND_COLORS, line_figure, ohlc_figure, sentiment_bar, sentiment_bubble
+from data_fetcher import DataFetcher
+from downsample import target_points
+from perf import phase, rerun
+from shared_feed import FeedPool, FeedSnapshot, HistorySnapshot, SharedFeed, SnapshotCache
+from signals import SignalIndex
+
 
 PALETTE = {
     "bg": "#0F0F0F",
@@ -23,6 +29,26 @@ PALETTE = {
     "muted": "#A1A1AA",
 }
 
+MAX_SYMBOLS = int(os.getenv("MAX_SYMBOLS", "12"))
+SIM_SEED = int(os.environ["SIM_SEED"]) if os.getenv("SIM_SEED") else None
+HISTORY_POINTS = int(os.getenv("HISTORY_POINTS", "10800"))
+CHART_WIDTH_PX = int(os.getenv("CHART_WIDTH_PX", "1200"))
+ZOOM_WINDOWS = {"全部": None, "1 小时": 3600, "15 分钟": 900, "5 分钟": 300}
+DOWNSAMPLING = {"LTTB": "lttb", "Min/Max": "minmax", "OHLC": "ohlc"}
+MARKET_DEADLINE_S = float(os.getenv("MARKET_API_DEADLINE", "2.0"))
+SENTIMENT_DEADLINE_S = float(os.getenv("SENTIMENT_API_DEADLINE", "2.0"))
+CHAT_TIMEOUT_S = float(os.getenv("CHAT_API_TIMEOUT", "20"))
+API_CACHE_TTL_S = float(os.getenv("API_CACHE_TTL", "2.0"))
+BREAKER_FAILURES = int(os.getenv("API_BREAKER_FAILURES", "3"))
+BREAKER_RESET_S = float(os.getenv("API_BREAKER_RESET", "15"))
+FEED_INTERVAL_S = float(os.getenv("FEED_INTERVAL", "2.0"))
+MAX_FEEDS = int(os.getenv("MAX_FEEDS", "4"))
+STREAM_FPS = float(os.getenv("CHAT_STREAM_FPS", "20"))
+CHAT_MAX_MESSAGES = int(os.getenv("CHAT_MAX_MESSAGES", "200"))
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "1500"))
+CHAT_VISIBLE = 30
+GREETING = "我是你的金融AI助手。你可以问我行情、仓位风险、板块动量和舆论变化。"
+
 
 def inject_theme() -> None:
     st.markdown(
@@ -161,9 +187,9 @@ def inject_theme() -> None:
     )
 
 
-def parse_symbols(value: str) -> list[str]:
+def parse_symbols(value: str, limit: int = MAX_SYMBOLS) -> list[str]:
     symbols = [v.strip().upper() for v in value.split(",") if v.strip()]
-    return symbols[:12] if symbols else ["AAPL", "MSFT", "NVDA", "TSLA", "BTC-USD"]
+    return symbols[:limit] if symbols else ["AAPL", "MSFT", "NVDA", "TSLA", "BTC-USD"]
 
 
 def parse_topics(value: str) -> list[str]:
@@ -172,19 +198,14 @@ def parse_topics(value: str) -> list[str]:
 
 
 def init_state() -> None:
-    if "chat_messages" not in st.session_state:
-        st.session_state.chat_messages = [
-            {
-                "role": "assistant",
-                "content": "我是你的金融AI助手。你可以问我行情、仓位风险、板块动量和舆论变化。",
-            }
-        ]
+    if "chat_history" not in st.session_state:
+        st.session_state.chat_history = ChatHistory(GREETING, max_messages=CHAT_MAX_MESSAGES)
 
-    if "market_store" not in st.session_state:
-        st.session_state.market_store = {}
+    if "chat_context" not in st.session_state:
+        st.session_state.chat_context = ContextEncoder()
 
-    if "sentiment_store" not in st.session_state:
-        st.session_state.sentiment_store = {}
+    if "chat_visible" not in st.session_state:
+        st.session_state.chat_visible = CHAT_VISIBLE
 
     if "warned_market_endpoint" not in st.session_state:
         st.session_state.warned_market_endpoint = False
@@ -193,153 +214,99 @@ def init_state() -> None:
         st.session_state.warned_sentiment_endpoint = False
 
 
-def _initial_price(symbol: str) -> float:
-    if "BTC" in symbol:
-        return random.uniform(38000, 72000)
-    if "ETH" in symbol:
-        return random.uniform(1800, 4200)
-    return random.uniform(20, 800)
-
-
-def simulate_market(symbols: list[str]) -> list[dict[str, Any]]:
-    out: list[dict[str, Any]] = []
-    store = st.session_state.market_store
-
-    for symbol in symbols:
-        if symbol not in store:
-            base = _initial_price(symbol)
-            store[symbol] = {
-                "open": base,
-                "price": base,
-                "volume": random.randint(120_000, 5_000_000),
-                "history": [],
-            }
-
-        row = store[symbol]
-        shock = random.gauss(0, 0.0038)
-        row["price"] = max(0.1, row["price"] * (1 + shock))
-        row["volume"] = max(10_000, int(row["volume"] * (1 + random.gauss(0, 0.09))))
-
-        ts = datetime.now().strftime("%H:%M:%S")
-        row["history"].append({"time": ts, "price": round(row["price"], 4)})
-        row["history"] = row["history"][-120:]
-
-        out.append(
-            {
-                "symbol": symbol,
-                "price": round(row["price"], 4),
-                "change_pct": ((row["price"] / row["open"]) - 1) * 100,
-                "volume": int(row["volume"]),
-                "time": ts,
-            }
-        )
+@st.cache_resource
+def get_fetcher() -> DataFetcher:
+    return DataFetcher(
+        cache_ttl=API_CACHE_TTL_S,
+        failure_threshold=BREAKER_FAILURES,
+        reset_timeout=BREAKER_RESET_S,
+    )
 
-    return out
-
-
-def simulate_sentiment(topics: list[str]) -> list[dict[str, Any]]:
-    out: list[dict[str, Any]] = []
-    store = st.session_state.sentiment_store
-
-    for topic in topics:
-        if topic not in store:
-            score = random.uniform(-0.15, 0.25)
-            mentions = random.randint(60, 800)
-            store[topic] = {"score": score, "mentions": mentions, "history": []}
-
-        row = store[topic]
-        row["score"] = max(-1.0, min(1.0, row["score"] + random.gauss(0, 0.08)))
-        row["mentions"] = max(5, int(row["mentions"] + random.gauss(0, 45)))
-
-        ts = datetime.now().strftime("%H:%M:%S")
-        row["history"].append({"time": ts, "score": row["score"]})
-        row["history"] = row["history"][-120:]
-
-        if row["score"] > 0.35:
-            label = "明显偏多"
-        elif row["score"] > 0.05:
-            label = "轻度偏多"
-        elif row["score"] < -0.35:
-            label = "明显偏空"
-        elif row["score"] < -0.05:
-            label = "轻度偏空"
-        else:
-            label = "中性"
-
-        out.append(
-            {
-                "topic": topic,
-                "score": round(row["score"], 3),
-                "mentions": int(row["mentions"]),
-                "label": label,
-                "time": ts,
-            }
-        )
 
-    return out
-
-
-def fetch_market(symbols: list[str], endpoint: str) -> list[dict[str, Any]]:
-    if endpoint:
-        try:
-            resp = requests.get(
-                endpoint,
-                params={"symbols": ",".join(symbols)},
-                timeout=6,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            if isinstance(data, list) and data:
-                return data
-        except Exception:
-            if not st.session_state.warned_market_endpoint:
-                st.sidebar.warning("行情API不可用，已切换到本地模拟数据。")
-                st.session_state.warned_market_endpoint = True
-
-    return simulate_market(symbols)
-
-
-def fetch_sentiment(topics: list[str], endpoint: str) -> list[dict[str, Any]]:
-    if endpoint:
-        try:
-            resp = requests.get(
-                endpoint,
-                params={"topics": ",".join(topics)},
-                timeout=6,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            if isinstance(data, list) and data:
-                return data
-        except Exception:
-            if not st.session_state.warned_sentiment_endpoint:
-                st.sidebar.warning("舆论API不可用，已切换到本地模拟数据。")
-                st.session_state.warned_sentiment_endpoint = True
-
-    return simulate_sentiment(topics)
-
-
-def local_reply(prompt: str, market_df: pd.DataFrame, sentiment_df: pd.DataFrame) -> str:
-    prompt_l = prompt.lower()
-    mover = market_df.iloc[market_df["change_pct"].abs().idxmax()]
-    top_sent = sentiment_df.iloc[sentiment_df["score"].abs().idxmax()]
-
-    mentioned_symbol = None
-    for sym in market_df["symbol"].tolist():
-        if sym.lower() in prompt_l:
-            mentioned_symbol = sym
-            break
-
-    lines = [
-        "以下是基于当前看板的即时解读：",
-        f"- 最大波动标的是 `{mover['symbol']}`，涨跌幅 `{mover['change_pct']:+.2f}%`。",
-        f"- 舆论强度最高主题是 `{top_sent['topic']}`，情绪值 `{top_sent['score']:+.2f}`（{top_sent['label']}）。",
-    ]
-
-    if mentioned_symbol is not None:
-        row = market_df[market_df["symbol"] == mentioned_symbol].iloc[0]
+def new_feed(market_api: str, sentiment_api: str) -> SharedFeed:
+    return SharedFeed(
+        get_fetcher(),
+        market_api=market_api,
+        sentiment_api=sentiment_api,
+        interval=FEED_INTERVAL_S,
+        history_points=HISTORY_POINTS,
+        market_deadline=MARKET_DEADLINE_S,
+        sentiment_deadline=SENTIMENT_DEADLINE_S,
+        seed=SIM_SEED,
+    )
+
+
+# 整个进程只有一个数据源池：端点组合再多，同时轮询的后台线程也不超过 MAX_FEEDS 个
+@st.cache_resource
+def get_feeds() -> FeedPool:
+    return FeedPool(new_feed, max_feeds=MAX_FEEDS)
+
+
+def get_feed(market_api: str, sentiment_api: str) -> SharedFeed:
+    return get_feeds().get(market_api, sentiment_api)
+
+
+@st.cache_resource
+def get_snapshot_cache() -> SnapshotCache:
+    return SnapshotCache()
+
+
+def signal_index(snapshot: FeedSnapshot, market_df: pd.DataFrame, sentiment_df: pd.DataFrame) -> SignalIndex:
+    key = ("signals", snapshot.version, tuple(market_df["symbol"]), tuple(sentiment_df["topic"]))
+    return get_snapshot_cache().get(key, lambda: SignalIndex.build(market_df, sentiment_df))
+
+
+def read_feed(symbols: list[str], topics: list[str], market_api: str, sentiment_api: str) -> FeedSnapshot:
+    feed = get_feed(market_api, sentiment_api)
+    subscribed_new = feed.subscribe(symbols, topics)
+    snapshot = feed.latest()
+    if snapshot is None or subscribed_new:
+        snapshot = feed.wait_for(symbols, topics)
+    # 上游慢、第一帧还没出来：会话不自己 tick（那会和后台线程同时写历史），先渲染空页面，下次刷新再读
+    return snapshot if snapshot is not None else FeedSnapshot.empty()
+
+
+def warn_fallback(snapshot: FeedSnapshot, market_api: str, sentiment_api: str) -> None:
+    if market_api and snapshot.sources.get("market") == "simulated" and not st.session_state.warned_market_endpoint:
+        st.sidebar.warning("行情API不可用或超时，已切换到本地模拟数据。")
+        st.session_state.warned_market_endpoint = True
+    if sentiment_api and snapshot.sources.get("sentiment") == "simulated" and not st.session_state.warned_sentiment_endpoint:
+        st.sidebar.warning("舆论API不可用或超时，已切换到本地模拟数据。")
+        st.session_state.warned_sentiment_endpoint = True
+
+
+def render_data_health(endpoints: dict[str, str]) -> None:
+    stats = get_fetcher().stats()
+    st.markdown("### Data Health")
+    st.caption(
+        f"Cache hit rate {stats['hit_rate']:.0%} · hits {stats['hits']} "
+        f"(stale {stats['stale_hits']}) · misses {stats['misses']}"
+    )
+    for name, url in endpoints.items():
+        if url:
+            state = stats["breakers"].get(url, "closed")
+            st.caption(f"{name}: breaker `{state}`")
+
+
+def local_reply(prompt: str, signals: SignalIndex) -> str:
+    row = signals.mentioned(prompt)
+
+    lines = ["以下是基于当前看板的即时解读："]
+    # 关注列表可能为空，接口返回的数据也可能缺了订阅的标的/主题
+    if signals.movers:
+        mover = signals.movers[0]
+        lines.append(f"- 最大波动标的是 `{mover['symbol']}`，涨跌幅 `{mover['change_pct']:+.2f}%`。")
+    else:
+        lines.append("- 当前没有可用的行情数据，请检查侧边栏的 Watchlist。")
+    if signals.sentiment_extremes:
+        top_sent = signals.sentiment_extremes[0]
+        lines.append(f"- 舆论强度最高主题是 `{top_sent['topic']}`，情绪值 `{top_sent['score']:+.2f}`（{top_sent['label']}）。")
+    else:
+        lines.append("- 当前没有可用的舆情数据，请检查侧边栏的 Sentiment Topics。")
+
+    if row is not None:
         lines.append(
-            f"- 你关注的 `{mentioned_symbol}` 现价 `{row['price']:.2f}`，日内 `{row['change_pct']:+.2f}%`，成交量 `{int(row['volume']):,}`。"
+            f"- 你关注的 `{row['symbol']}` 现价 `{row['price']:.2f}`，日内 `{row['change_pct']:+.2f}%`，成交量 `{int(row['volume']):,}`。"
         )
 
     if any(k in prompt for k in ["风险", "回撤", "止损"]):
@@ -352,33 +319,83 @@ def local_reply(prompt: str, market_df: pd.DataFrame, sentiment_df: pd.DataFrame
     return "\n".join(lines)
 
 
-def call_chat_api(chat_api_url: str, prompt: str, market: list[dict[str, Any]], sentiment: list[dict[str, Any]]) -> str | None:
+def call_chat_api(
+    chat_api_url: str,
+    prompt: str,
+    market: list[dict[str, Any]],
+    sentiment: list[dict[str, Any]],
+) -> Iterator[str] | None:
+    """打开对话接口的流式响应；接口不可用时返回 None，由本地回复兜底。"""
     if not chat_api_url:
         return None
 
+    encoder: ContextEncoder = st.session_state.chat_context
+    if st.session_state.get("chat_api_url") != chat_api_url:
+        encoder.reset()
+        st.session_state.chat_api_url = chat_api_url
     payload = {
         "message": prompt,
-        "messages": st.session_state.chat_messages[-12:],
+        "messages": st.session_state.chat_history.context(CHAT_CONTEXT_TOKENS),
         "context": {
-            "market": market,
-            "sentiment": sentiment,
+            **encoder.encode({"market": market, "sentiment": sentiment}),
             "timestamp": datetime.now().isoformat(),
         },
     }
     try:
-        resp = requests.post(chat_api_url, json=payload, timeout=20)
-        resp.raise_for_status()
-        data = resp.json()
-        if isinstance(data, dict) and isinstance(data.get("reply"), str):
-            return data["reply"]
+        return open_chat_stream(get_fetcher().session, chat_api_url, payload, timeout=CHAT_TIMEOUT_S)
     except Exception:
+        # 对方没收到这次上下文，下一次不能再以它为基准发差量
+        encoder.reset()
         st.sidebar.warning("对话API暂不可用，当前使用本地分析回复。")
 
     return None
 
 
-def render_market_tab(market_df: pd.DataFrame) -> None:
+def history_figure(
+    kind: str,
+    label: str,
+    history: HistorySnapshot,
+    names: tuple[str, ...],
+    version: int,
+    colors: list[str],
+) -> go.Figure | None:
+    """历史曲线：先按所选时间窗口截取，点数超过图表宽度能显示的数量时再降采样。
+
+    发给浏览器的点数只取决于 ``CHART_WIDTH_PX``，与历史长度无关；窗口足够短时直接画原始点。
+    """
+    left, right = st.columns(2)
+    zoom = left.radio("时间窗口", list(ZOOM_WINDOWS), horizontal=True, key=f"{kind}_zoom")
+    mode = right.radio("降采样", list(DOWNSAMPLING), horizontal=True, key=f"{kind}_downsample")
+    method = DOWNSAMPLING[mode]
+
+    points = history.points_since(ZOOM_WINDOWS[zoom])
+    if points == 0 or not names:
+        return None
+    budget = target_points(CHART_WIDTH_PX, method)
+
+    def figure(frame: pd.DataFrame) -> go.Figure:
+        if points <= budget:
+            return line_figure(frame, kind, colors, title=f"{label}（{zoom} · 原始 {points:,} 点）")
+        if method == "ohlc":
+            title = f"{label}（{zoom} · {points:,} 点聚合为 {budget} 根 OHLC）"
+            return ohlc_figure(frame, kind, colors, budget, title=title)
+        title = f"{label}（{zoom} · {points:,} 点 → {mode} {budget} 点）"
+        return line_figure(frame, kind, colors, title=title, max_points=budget, method=method)
+
+    def build() -> go.Figure:
+        with phase("frame"):
+            frame = history.frame(points, list(names))
+        with phase("figure"):
+            return figure(frame)
+
+    return get_snapshot_cache().get((kind, version, names, zoom, method), build)
+
+
+def render_market_tab(market_df: pd.DataFrame, history: HistorySnapshot, version: int) -> None:
     st.markdown('<div class="panel-title">Market Pulse</div>', unsafe_allow_html=True)
+    if market_df.empty:
+        st.info("正在等待行情数据……")
+        return
     cols = st.columns(min(4, len(market_df)))
     for idx, row in market_df.head(4).iterrows():
         cols[idx].metric(
@@ -387,136 +404,116 @@ def render_market_tab(market_df: pd.DataFrame) -> None:
             delta=f"{row['change_pct']:+.2f}%",
         )
 
-    hist_rows = []
-    for symbol, row in st.session_state.market_store.items():
-        for point in row["history"][-50:]:
-            hist_rows.append({"symbol": symbol, "time": point["time"], "price": point["price"]})
-    hist_df = pd.DataFrame(hist_rows)
-
-    if not hist_df.empty:
-        fig = px.line(
-            hist_df,
-            x="time",
-            y="price",
-            color="symbol",
-            color_discrete_sequence=[PALETTE["blue"], PALETTE["purple"], PALETTE["pink"], "#4ADE80", "#38BDF8"],
-        )
-        fig.update_layout(
-            template="plotly_dark",
-            margin=dict(l=12, r=12, t=28, b=12),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(255,255,255,0.03)",
-            legend_title_text="",
-            title="价格轨迹（最近50个采样点）",
+    fig = history_figure("price", "价格轨迹", history, tuple(market_df["symbol"]), version, MARKET_COLORS)
+    with phase("serialize"):
+        if fig is not None:
+            st.plotly_chart(fig, use_container_width=True)
+
+        st.dataframe(
+            market_df.sort_values("change_pct", ascending=False),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "price": st.column_config.NumberColumn("Price", format="%.4f"),
+                "change_pct": st.column_config.NumberColumn("Change %", format="%.2f%%"),
+                "volume": st.column_config.NumberColumn("Volume", format="%d"),
+            },
         )
-        st.plotly_chart(fig, use_container_width=True)
-
-    st.dataframe(
-        market_df.sort_values("change_pct", ascending=False),
-        use_container_width=True,
-        hide_index=True,
-        column_config={
-            "price": st.column_config.NumberColumn("Price", format="%.4f"),
-            "change_pct": st.column_config.NumberColumn("Change %", format="%.2f%%"),
-            "volume": st.column_config.NumberColumn("Volume", format="%d"),
-        },
-    )
 
 
-def render_sentiment_tab(sentiment_df: pd.DataFrame) -> None:
+def render_sentiment_tab(sentiment_df: pd.DataFrame, history: HistorySnapshot, version: int) -> None:
     st.markdown('<div class="panel-title">Sentiment Radar</div>', unsafe_allow_html=True)
-
-    bar = go.Figure(
-        go.Bar(
-            x=sentiment_df["score"],
-            y=sentiment_df["topic"],
-            orientation="h",
-            marker=dict(
-                color=sentiment_df["score"],
-                colorscale=[
-                    [0.0, "#FF0080"],
-                    [0.5, "#6B46C1"],
-                    [1.0, "#84CC16"],
-                ],
-                cmin=-1,
-                cmax=1,
-            ),
+    if sentiment_df.empty:
+        st.info("正在等待舆情数据……")
+        return
+    cache = get_snapshot_cache()
+    topics = tuple(sentiment_df["topic"])
+
+    with phase("figure"):
+        bar = cache.get(("sentiment_bar", version, topics), lambda: sentiment_bar(sentiment_df))
+        bubble = cache.get(("sentiment_bubble", version, topics), lambda: sentiment_bubble(sentiment_df))
+    with phase("serialize"):
+        st.plotly_chart(bar, use_container_width=True)
+        st.plotly_chart(bubble, use_container_width=True)
+
+    trend = history_figure("sentiment_trend", "情绪变化轨迹", history, topics, version, TREND_COLORS)
+    with phase("serialize"):
+        if trend is not None:
+            st.plotly_chart(trend, use_container_width=True)
+
+        st.dataframe(
+            sentiment_df.sort_values("score", ascending=False),
+            use_container_width=True,
+            hide_index=True,
         )
-    )
-    bar.update_layout(
-        template="plotly_dark",
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(255,255,255,0.03)",
-        margin=dict(l=12, r=12, t=20, b=12),
-        title="主题情绪值（-1 到 +1）",
-        xaxis_title="Sentiment Score",
-        yaxis_title="",
-    )
-    st.plotly_chart(bar, use_container_width=True)
-
-    bubble = px.scatter(
-        sentiment_df,
-        x="score",
-        y="mentions",
-        color="topic",
-        size="mentions",
-        hover_data=["label"],
-        color_discrete_sequence=[PALETTE["blue"], PALETTE["purple"], PALETTE["pink"], "#4ADE80", "#22D3EE"],
-    )
-    bubble.update_layout(
-        template="plotly_dark",
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(255,255,255,0.03)",
-        margin=dict(l=12, r=12, t=20, b=12),
-        title="讨论热度 vs 情绪值",
-        xaxis_title="Sentiment Score",
-        yaxis_title="Mentions",
-    )
-    st.plotly_chart(bubble, use_container_width=True)
-
-    trend_rows = []
-    for topic, row in st.session_state.sentiment_store.items():
-        for point in row["history"][-50:]:
-            trend_rows.append({"topic": topic, "time": point["time"], "score": point["score"]})
-
-    trend_df = pd.DataFrame(trend_rows)
-    if not trend_df.empty:
-        trend = px.line(
-            trend_df,
-            x="time",
-            y="score",
-            color="topic",
-            color_discrete_sequence=[PALETTE["lime"], PALETTE["pink"], PALETTE["blue"], PALETTE["purple"], "#F59E0B"],
-        )
-        trend.update_layout(
-            template="plotly_dark",
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(255,255,255,0.03)",
-            margin=dict(l=12, r=12, t=20, b=12),
-            title="情绪变化轨迹",
-            xaxis_title="Time",
-            yaxis_title="Score",
-        )
-        st.plotly_chart(trend, use_container_width=True)
-
-    st.dataframe(
-        sentiment_df.sort_values("score", ascending=False),
-        use_container_width=True,
-        hide_index=True,
-    )
 
 
-def stream_reply(text: str) -> str:
+def render_quick_signal(signals: SignalIndex) -> None:
+    st.markdown('<div class="panel-title">Quick Signal</div>', unsafe_allow_html=True)
+    if not signals.gainers and not signals.hot_topics:
+        st.info("关注列表里暂时没有可用的行情或舆情数据。")
+        return
+
+    if signals.gainers:
+        top_up = signals.gainers[0]
+        top_dn = signals.losers[0]
+        st.metric("Top Gainer", f"{top_up['symbol']} {top_up['price']:.2f}", f"{top_up['change_pct']:+.2f}%")
+        st.metric("Top Loser", f"{top_dn['symbol']} {top_dn['price']:.2f}", f"{top_dn['change_pct']:+.2f}%")
+    else:
+        st.info("暂无行情数据。")
+    if signals.hot_topics:
+        hot_topic = signals.hot_topics[0]
+        sentiment_peak = signals.sentiment_extremes[0]
+        st.metric("Most Discussed", f"{hot_topic['topic']}", f"mentions {int(hot_topic['mentions'])}")
+        st.metric("Strongest Sentiment", sentiment_peak["topic"], f"{sentiment_peak['score']:+.2f}")
+    else:
+        st.info("暂无舆情数据。")
+    st.caption(f"更新于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+def live_panel(panel: str, feed_args: tuple[list[str], list[str], str, str]) -> None:
+    """fragment 的入口：每次只重跑这一个面板，从共享数据源读取最新快照。"""
+    symbols, topics, _, _ = feed_args
+    with rerun(f"panel:{panel}"):
+        with phase("fetch"):
+            snapshot = read_feed(*feed_args)
+        with phase("frame"):
+            market_df = snapshot.market_for(symbols)
+            sentiment_df = snapshot.sentiment_for(topics)
+
+        if panel == "signal":
+            with phase("frame"):
+                signals = signal_index(snapshot, market_df, sentiment_df)
+            render_quick_signal(signals)
+        elif panel == "market":
+            render_market_tab(market_df, snapshot.market_history, snapshot.version)
+        elif panel == "sentiment":
+            render_sentiment_tab(sentiment_df, snapshot.sentiment_history, snapshot.version)
+
+
+def render_chat_history(history: ChatHistory) -> None:
+    """只渲染最后 chat_visible 条消息，长对话每次重跑的渲染量保持不变。"""
+    hidden = len(history) - st.session_state.chat_visible
+    if hidden > 0 and st.button(f"显示更早的消息（还有 {hidden} 条）", key="chat_more"):
+        st.session_state.chat_visible += CHAT_VISIBLE
+        hidden -= CHAT_VISIBLE
+    if hidden <= 0 and history.archived:
+        st.caption(f"更早的 {history.archived} 条消息已归档，只以摘要形式发给对话接口。")
+
+    for msg in history.tail(st.session_state.chat_visible):
+        with st.chat_message(msg["role"]):
+            st.markdown(msg["content"])
+
+
+def stream_reply(chunks: Iterable[str], started: float) -> str:
     holder = st.empty()
-    built = ""
-    for token in text.split(" "):
-        built += token + " "
-        holder.markdown(built + "▌")
-        time.sleep(0.015)
-    holder.markdown(built)
-    return built.strip()
+    stats = render_stream(chunks, holder.markdown, fps=STREAM_FPS, started=started)
+    if stats.ttft is not None:
+        st.caption(f"首字延迟 {stats.ttft * 1000:.0f} ms · 总耗时 {stats.total:.2f}s · {stats.frames} 帧")
+    return stats.text.strip()
 
 
+@rerun("app")
 def main() -> None:
     st.set_page_config(page_title="Financial AI Assistant", page_icon="📈", layout="wide")
     inject_theme()
@@ -524,8 +521,10 @@ def main() -> None:
 
     with st.sidebar:
         st.markdown("### Control Tower")
+        max_symbols = st.number_input("Max Symbols", min_value=1, max_value=5000, value=MAX_SYMBOLS, step=1)
         watchlist = parse_symbols(
-            st.text_input("Watchlist", value="AAPL,MSFT,NVDA,TSLA,BTC-USD,ETH-USD")
+            st.text_input("Watchlist", value="AAPL,MSFT,NVDA,TSLA,BTC-USD,ETH-USD"),
+            limit=int(max_symbols),
         )
         topics = parse_topics(
             st.text_input("Sentiment Topics", value="美联储,AI,半导体,新能源,加密资产")
@@ -539,18 +538,21 @@ def main() -> None:
         chat_api = st.text_input("Chat API URL", value=os.getenv("CHAT_API_URL", ""))
 
         if st.button("Clear Chat", use_container_width=True):
-            st.session_state.chat_messages = [
-                {
-                    "role": "assistant",
-                    "content": "会话已重置。告诉我你现在最关注的资产或策略。",
-                }
-            ]
+            st.session_state.chat_history.reset("会话已重置。告诉我你现在最关注的资产或策略。")
+            st.session_state.chat_context.reset()
+            st.session_state.chat_visible = CHAT_VISIBLE
             st.rerun()
 
-    market = fetch_market(watchlist, market_api)
-    sentiment = fetch_sentiment(topics, sentiment_api)
-    market_df = pd.DataFrame(market)
-    sentiment_df = pd.DataFrame(sentiment)
+    feed_args = (watchlist, topics, market_api, sentiment_api)
+    with phase("fetch"):
+        snapshot = read_feed(*feed_args)
+    warn_fallback(snapshot, market_api, sentiment_api)
+    if market_api or sentiment_api:
+        with st.sidebar:
+            render_data_health({"Market API": market_api, "Sentiment API": sentiment_api})
+    with phase("frame"):
+        market_df = snapshot.market_for(watchlist)
+        sentiment_df = snapshot.sentiment_for(topics)
 
     st.markdown(
         """
@@ -566,6 +568,9 @@ def main() -> None:
         unsafe_allow_html=True,
     )
 
+    # 自动刷新只重跑数据面板（fragment），不再 sleep 占住脚本线程、也不重跑主题注入和对话区
+    run_every = refresh_s if auto_refresh else None
+
     tab_chat, tab_market, tab_sentiment = st.tabs([
         "AI 对话",
         "实时行情看板",
@@ -576,47 +581,44 @@ def main() -> None:
         left, right = st.columns([1.65, 1.0], gap="large")
 
         with left:
-            for msg in st.session_state.chat_messages:
-                with st.chat_message(msg["role"]):
-                    st.markdown(msg["content"])
+            history: ChatHistory = st.session_state.chat_history
+            render_chat_history(history)
 
             prompt = st.chat_input("例如：分析一下 NVDA 和半导体板块当前风险")
             if prompt:
-                st.session_state.chat_messages.append({"role": "user", "content": prompt})
+                history.append("user", prompt)
                 with st.chat_message("user"):
                     st.markdown(prompt)
 
                 with st.chat_message("assistant"):
+                    started = time.perf_counter()
                     with st.spinner("分析中..."):
-                        remote = call_chat_api(chat_api, prompt, market, sentiment)
-                        reply = remote if remote else local_reply(prompt, market_df, sentiment_df)
-                        streamed = stream_reply(reply)
-
-                st.session_state.chat_messages.append({"role": "assistant", "content": streamed})
+                        chunks = call_chat_api(
+                            chat_api,
+                            prompt,
+                            market_df.to_dict(orient="records"),
+                            sentiment_df.to_dict(orient="records"),
+                        )
+                    if chunks is None:
+                        signals = signal_index(snapshot, market_df, sentiment_df)
+                        chunks = paced_chunks(local_reply(prompt, signals))
+                    streamed = stream_reply(chunks, started)
+
+                history.append("assistant", streamed)
 
         with right:
-            st.markdown('<div class="panel-title">Quick Signal</div>', unsafe_allow_html=True)
-            top_up = market_df.sort_values("change_pct", ascending=False).iloc[0]
-            top_dn = market_df.sort_values("change_pct", ascending=True).iloc[0]
-            hot_topic = sentiment_df.sort_values("mentions", ascending=False).iloc[0]
-            sentiment_peak = sentiment_df.iloc[sentiment_df["score"].abs().idxmax()]
-
-            st.metric("Top Gainer", f"{top_up['symbol']} {top_up['price']:.2f}", f"{top_up['change_pct']:+.2f}%")
-            st.metric("Top Loser", f"{top_dn['symbol']} {top_dn['price']:.2f}", f"{top_dn['change_pct']:+.2f}%")
-            st.metric("Most Discussed", f"{hot_topic['topic']}", f"mentions {int(hot_topic['mentions'])}")
-            st.metric("Strongest Sentiment", sentiment_peak["topic"], f"{sentiment_peak['score']:+.2f}")
-            st.caption(f"更新于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            st.fragment(live_panel, run_every=run_every)("signal", feed_args)
 
     with tab_market:
-        render_market_tab(market_df)
+        st.fragment(live_panel, run_every=run_every)("market", feed_args)
 
     with tab_sentiment:
-        render_sentiment_tab(sentiment_df)
+        st.fragment(live_panel, run_every=run_every)("sentiment", feed_args)
 
+    if snapshot.version == 0:
+        st.caption("数据源还在拉取第一帧，面板会在下次刷新时填上。")
     if auto_refresh:
-        st.caption(f"Auto refresh enabled: next update in {refresh_s} seconds")
-        time.sleep(refresh_s)
-        st.rerun()
+        st.caption(f"Auto refresh enabled: data panels update every {refresh_s} seconds")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,93 @@
+"""对比每次刷新发给浏览器的图表字节数和服务端耗时：旧的 plotly express 写法 vs charts.py。
+
+    python bench_charts.py --symbols 6 --topics 5 --ticks 120
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from charts import MARKET_COLORS, TREND_COLORS, figure_bytes, line_figure, sentiment_bar, sentiment_bubble
+from data_fetcher import DataFetcher
+from shared_feed import FeedSnapshot, SharedFeed
+
+
+POINTS = 50
+
+
+def legacy_figures(snapshot: FeedSnapshot, symbols: list[str], topics: list[str]) -> list[go.Figure]:
+    """重构前 render_market_tab / render_sentiment_tab 的图表写法（长表 + px + 完整 plotly_dark 模板）。"""
+    sentiment_df = snapshot.sentiment_for(topics)
+    dark = dict(template="plotly_dark", paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(255,255,255,0.03)")
+
+    hist = snapshot.market_history.frame(POINTS, symbols)
+    hist_long = hist.reset_index().melt(id_vars="time", var_name="symbol", value_name="price")
+    hist_long["time"] = hist_long["time"].dt.strftime("%H:%M:%S")
+    price = px.line(hist_long, x="time", y="price", color="symbol")
+    price.update_layout(**dark, title="价格轨迹")
+
+    bar = go.Figure(go.Bar(x=sentiment_df["score"], y=sentiment_df["topic"], orientation="h"))
+    bar.update_layout(**dark, title="主题情绪值（-1 到 +1）")
+
+    bubble = px.scatter(sentiment_df, x="score", y="mentions", color="topic", size="mentions", hover_data=["label"])
+    bubble.update_layout(**dark, title="讨论热度 vs 情绪值")
+
+    trend = snapshot.sentiment_history.frame(POINTS, topics)
+    trend_long = trend.reset_index().melt(id_vars="time", var_name="topic", value_name="score")
+    trend_long["time"] = trend_long["time"].dt.strftime("%H:%M:%S")
+    trend_fig = px.line(trend_long, x="time", y="score", color="topic")
+    trend_fig.update_layout(**dark, title="情绪变化轨迹")
+    return [price, bar, bubble, trend_fig]
+
+
+def pipeline_figures(snapshot: FeedSnapshot, symbols: list[str], topics: list[str]) -> list[go.Figure]:
+    sentiment_df = snapshot.sentiment_for(topics)
+    return [
+        line_figure(snapshot.market_history.frame(POINTS, symbols), "price", MARKET_COLORS, title="价格轨迹"),
+        sentiment_bar(sentiment_df),
+        sentiment_bubble(sentiment_df),
+        line_figure(snapshot.sentiment_history.frame(POINTS, topics), "sentiment_trend", TREND_COLORS),
+    ]
+
+
+def measure(build, snapshot: FeedSnapshot, symbols: list[str], topics: list[str], repeat: int) -> tuple[int, float]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        figures = build(snapshot, symbols, topics)
+        # 与 st.plotly_chart 相同的序列化路径
+        payload = sum(len(pio.to_json(fig.to_dict(), validate=False).encode("utf-8")) for fig in figures)
+    elapsed_ms = (time.perf_counter() - start) / repeat * 1000
+    return payload, elapsed_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=6)
+    parser.add_argument("--topics", type=int, default=5)
+    parser.add_argument("--ticks", type=int, default=120)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    topics = [f"topic-{i}" for i in range(args.topics)]
+    feed = SharedFeed(DataFetcher(max_workers=1), history_points=max(args.ticks, POINTS), seed=7)
+    feed.subscribe(symbols, topics)
+    for _ in range(args.ticks):
+        snapshot = feed.tick()
+
+    legacy_bytes, legacy_ms = measure(legacy_figures, snapshot, symbols, topics, args.repeat)
+    new_bytes, new_ms = measure(pipeline_figures, snapshot, symbols, topics, args.repeat)
+
+    print(f"symbols={args.symbols} topics={args.topics} points/series={POINTS}")
+    print(f"{'':10}{'bytes/refresh':>16}{'ms/refresh':>14}")
+    print(f"{'before':10}{legacy_bytes:>16,}{legacy_ms:>14.1f}")
+    print(f"{'after':10}{new_bytes:>16,}{new_ms:>14.1f}")
+    print(f"template-only figure: {figure_bytes(go.Figure(layout=dict(template='plotly_dark'))):,} bytes")
+
+
+if __name__ == "__main__":
+    main()
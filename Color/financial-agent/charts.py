@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from downsample import compact_values, downsample, ohlc
+
+
+MARKET_COLORS = ["#2563EB", "#6B46C1", "#FF0080", "#4ADE80", "#38BDF8"]
+TOPIC_COLORS = ["#2563EB", "#6B46C1", "#FF0080", "#4ADE80", "#22D3EE"]
+TREND_COLORS = ["#84CC16", "#FF0080", "#2563EB", "#6B46C1", "#F59E0B"]
+SENTIMENT_SCALE = [[0.0, "#FF0080"], [0.5, "#6B46C1"], [1.0, "#84CC16"]]
+
+
+@lru_cache(maxsize=1)
+def neon_template() -> go.layout.Template:
+    """只包含用到的几项样式的小模板；完整的 plotly_dark 模板序列化后有十几 KB，每次刷新都要发一遍。"""
+    grid = "rgba(255,255,255,0.08)"
+    return go.layout.Template(
+        layout=dict(
+            font=dict(color="#E5E7EB"),
+            paper_bgcolor="rgba(0,0,0,0)",
+            plot_bgcolor="rgba(255,255,255,0.03)",
+            xaxis=dict(gridcolor=grid, zerolinecolor=grid),
+            yaxis=dict(gridcolor=grid, zerolinecolor=grid),
+            hoverlabel=dict(bgcolor="#1F1F23"),
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def base_layout(kind: str) -> go.Layout:
+    """每种图表的布局只构建一次，之后每个 tick 只替换 trace 数据。"""
+    common = dict(template=neon_template(), legend_title_text="", uirevision=kind)
+    layouts = {
+        "price": dict(margin=dict(l=12, r=12, t=28, b=12), xaxis=dict(type="date"), yaxis_title="price"),
+        "sentiment_bar": dict(
+            margin=dict(l=12, r=12, t=20, b=12),
+            title="主题情绪值（-1 到 +1）",
+            xaxis_title="Sentiment Score",
+        ),
+        "sentiment_bubble": dict(
+            margin=dict(l=12, r=12, t=20, b=12),
+            title="讨论热度 vs 情绪值",
+            xaxis_title="Sentiment Score",
+            yaxis_title="Mentions",
+        ),
+        "sentiment_trend": dict(
+            margin=dict(l=12, r=12, t=20, b=12),
+            title="情绪变化轨迹",
+            xaxis=dict(type="date", title="Time"),
+            yaxis_title="Score",
+        ),
+    }
+    return go.Layout(**common, **layouts[kind])
+
+
+def _epoch_ms(index: pd.DatetimeIndex) -> np.ndarray:
+    # 日期轴接受毫秒时间戳，按二进制数组发送比逐点 ISO 字符串小得多
+    return index.as_unit("ms").asi8
+
+
+def line_figure(
+    frame: pd.DataFrame,
+    kind: str,
+    colors: list[str],
+    title: str | None = None,
+    max_points: int | None = None,
+    method: str = "lttb",
+) -> go.Figure:
+    """每列一条折线。给了 max_points 且点数超出时，每条序列各自降采样，各带自己的 x。"""
+    x = _epoch_ms(frame.index)
+    values = frame.to_numpy(dtype=np.float64)
+    reduce = max_points is not None and len(frame) > max_points
+    traces = []
+    for i, name in enumerate(frame.columns):
+        y = compact_values(values[:, i])
+        tx, ty = downsample(x, y, max_points, method) if reduce else (x, y)
+        traces.append(
+            go.Scatter(
+                x=tx,
+                y=ty,
+                mode="lines",
+                name=str(name),
+                line=dict(color=colors[i % len(colors)]),
+            )
+        )
+    fig = go.Figure(data=traces, layout=base_layout(kind))
+    if title is not None:
+        fig.update_layout(title=title)
+    return fig
+
+
+def ohlc_figure(frame: pd.DataFrame, kind: str, colors: list[str], candles: int, title: str | None = None) -> go.Figure:
+    """每列聚合成最多 candles 根 OHLC 线，序列用颜色区分。"""
+    x = _epoch_ms(frame.index)
+    values = frame.to_numpy(dtype=np.float64)
+    traces = []
+    for i, name in enumerate(frame.columns):
+        finite = ~np.isnan(values[:, i])
+        bars = ohlc(x[finite], compact_values(values[finite, i]), candles)
+        color = colors[i % len(colors)]
+        traces.append(
+            go.Ohlc(
+                x=bars.x,
+                open=bars.open,
+                high=bars.high,
+                low=bars.low,
+                close=bars.close,
+                name=str(name),
+                increasing=dict(line=dict(color=color)),
+                decreasing=dict(line=dict(color=color)),
+            )
+        )
+    fig = go.Figure(data=traces, layout=base_layout(kind))
+    fig.update_layout(xaxis_rangeslider_visible=False)
+    if title is not None:
+        fig.update_layout(title=title)
+    return fig
+
+
+def sentiment_bar(sentiment_df: pd.DataFrame) -> go.Figure:
+    scores = sentiment_df["score"].to_numpy(dtype=np.float32)
+    return go.Figure(
+        go.Bar(
+            x=scores,
+            y=sentiment_df["topic"].tolist(),
+            orientation="h",
+            marker=dict(color=scores, colorscale=SENTIMENT_SCALE, cmin=-1, cmax=1),
+        ),
+        layout=base_layout("sentiment_bar"),
+    )
+
+
+def sentiment_bubble(sentiment_df: pd.DataFrame) -> go.Figure:
+    mentions = sentiment_df["mentions"].to_numpy(dtype=np.float32)
+    sizeref = 2.0 * float(mentions.max(initial=1.0)) / 20**2
+    traces = [
+        go.Scatter(
+            x=[row.score],
+            y=[row.mentions],
+            mode="markers",
+            name=row.topic,
+            text=[row.label],
+            hovertemplate="%{x:+.2f} · %{y} mentions · %{text}<extra>%{fullData.name}</extra>",
+            marker=dict(
+                size=[row.mentions],
+                sizemode="area",
+                sizeref=sizeref,
+                color=TOPIC_COLORS[i % len(TOPIC_COLORS)],
+            ),
+        )
+        for i, row in enumerate(sentiment_df.itertuples(index=False))
+    ]
+    return go.Figure(data=traces, layout=base_layout("sentiment_bubble"))
+
+
+def figure_bytes(fig: go.Figure) -> int:
+    """Streamlit 发给浏览器的图表 JSON 大小（字节）。"""
+    return len(pio.to_json(fig, validate=False).encode("utf-8"))
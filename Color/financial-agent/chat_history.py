@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import math
+import uuid
+from collections import deque
+from typing import Any, Iterable
+
+
+Message = dict[str, str]
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中日韩字符按 1 个算，其余按 4 个字符 1 个算，不依赖分词器。"""
+    wide = sum(1 for ch in text if ch >= "⺀")
+    return wide + math.ceil((len(text) - wide) / 4)
+
+
+def clip_to_tokens(text: str, budget: int) -> str:
+    """把过长的单条消息截到预算以内，保留开头。"""
+    if estimate_tokens(text) <= budget:
+        return text
+    used = 0
+    for i, ch in enumerate(text):
+        used += 4 if ch >= "⺀" else 1
+        if used > budget * 4:
+            return text[:i] + "…"
+    return text
+
+
+class ChatHistory:
+    """有上限的对话记录：只保留最近 max_messages 条，更早的用户提问折叠成一段摘要。"""
+
+    def __init__(self, greeting: str, max_messages: int = 200, summary_items: int = 8) -> None:
+        self.max_messages = max_messages
+        self.messages: deque[Message] = deque(maxlen=max_messages)
+        self.archived = 0
+        self._archived_questions: deque[str] = deque(maxlen=summary_items)
+        self.reset(greeting)
+
+    def reset(self, greeting: str) -> None:
+        self.messages.clear()
+        self.archived = 0
+        self._archived_questions.clear()
+        self.messages.append({"role": "assistant", "content": greeting})
+
+    def append(self, role: str, content: str) -> None:
+        if len(self.messages) == self.max_messages:
+            self._archive(self.messages[0])
+        self.messages.append({"role": role, "content": content})
+
+    def _archive(self, message: Message) -> None:
+        self.archived += 1
+        if message["role"] == "user":
+            self._archived_questions.append(clip_to_tokens(message["content"], 24))
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def tail(self, n: int) -> list[Message]:
+        """最后 n 条，渲染时只物化可见部分。"""
+        start = max(0, len(self.messages) - n)
+        return [self.messages[i] for i in range(start, len(self.messages))]
+
+    def summary(self, dropped: Iterable[Message] = ()) -> str:
+        questions = list(self._archived_questions)
+        count = self.archived
+        for message in dropped:
+            count += 1
+            if message["role"] == "user":
+                questions.append(clip_to_tokens(message["content"], 24))
+        if not count:
+            return ""
+        recent = "；".join(questions[-(self._archived_questions.maxlen or 1) :])
+        text = f"此前还有 {count} 条消息未附上。"
+        return text + (f"用户较早问过：{recent}" if recent else "")
+
+    def context(self, budget_tokens: int = 1500, per_message_tokens: int = 400) -> list[Message]:
+        """按 token 预算从最新往回取消息；放不下的旧消息并入开头的一条摘要。"""
+        picked: list[Message] = []
+        used = 0
+        messages = list(self.messages)
+        cut = 0
+        for i in range(len(messages) - 1, -1, -1):
+            content = clip_to_tokens(messages[i]["content"], per_message_tokens)
+            cost = estimate_tokens(content)
+            if picked and used + cost > budget_tokens:
+                cut = i + 1
+                break
+            picked.append({"role": messages[i]["role"], "content": content})
+            used += cost
+        picked.reverse()
+        summary = self.summary(messages[:cut])
+        if summary:
+            picked.insert(0, {"role": "system", "content": summary})
+        return picked
+
+
+def _compact(row: dict[str, Any], digits: int) -> dict[str, Any]:
+    # 行里的 time 由请求体的 timestamp 统一给出；浮点数按精度取整，微小抖动不算变化
+    return {k: round(v, digits) if isinstance(v, float) else v for k, v in row.items() if k != "time"}
+
+
+class ContextEncoder:
+    """把行情/舆情上下文相对上一次发出的内容做差量编码。
+
+    第一次（以及每 keyframe_every 次、或 reset 之后）发送完整表 ``{"mode": "full"}``；
+    其余只发送有变化的行和字段 ``{"mode": "delta", "base": 上一次的 seq}``。
+    """
+
+    KEYS = {"market": "symbol", "sentiment": "topic"}
+
+    def __init__(self, keyframe_every: int = 20, digits: int = 3) -> None:
+        self.keyframe_every = keyframe_every
+        self.digits = digits
+        self.stream_id = uuid.uuid4().hex
+        self.seq = 0
+        self._sent: dict[str, dict[Any, dict[str, Any]]] | None = None
+
+    def reset(self) -> None:
+        """下一次强制发送完整上下文（会话清空、接口切换或请求失败时调用）。"""
+        self._sent = None
+
+    def encode(self, tables: dict[str, list[dict[str, Any]]]) -> dict[str, Any]:
+        current = {
+            name: {row[self.KEYS[name]]: _compact(row, self.digits) for row in rows}
+            for name, rows in tables.items()
+        }
+        base = self.seq
+        self.seq += 1
+        full = self._sent is None or self.seq % self.keyframe_every == 1 or self._sent.keys() != current.keys()
+        previous, self._sent = self._sent, current
+        header = {"stream": self.stream_id, "seq": self.seq}
+        if full:
+            return {**header, "mode": "full", **{name: list(rows.values()) for name, rows in current.items()}}
+
+        payload: dict[str, Any] = {**header, "mode": "delta", "base": base}
+        for name, rows in current.items():
+            key = self.KEYS[name]
+            old = previous[name]
+            upsert = []
+            for ident, row in rows.items():
+                before = old.get(ident)
+                if before is None:
+                    upsert.append(row)
+                    continue
+                changed = {k: v for k, v in row.items() if before.get(k) != v}
+                if changed:
+                    upsert.append({key: ident, **changed})
+            removed = [ident for ident in old if ident not in rows]
+            payload[name] = {"upsert": upsert, "remove": removed}
+        return payload
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator
+
+import requests
+
+
+CURSOR = "▌"
+STREAM_ACCEPT = "text/event-stream, application/x-ndjson, application/json"
+
+
+def _chunk_from_payload(payload: Any) -> str:
+    """兼容几种常见的流式返回格式：{"delta"}、{"reply"}、{"content"} 以及 OpenAI 风格的 choices[].delta.content。"""
+    if isinstance(payload, str):
+        return payload
+    if not isinstance(payload, dict):
+        return ""
+    for key in ("delta", "reply", "content", "text"):
+        if isinstance(payload.get(key), str):
+            return payload[key]
+    choices = payload.get("choices")
+    if isinstance(choices, list) and choices:
+        delta = choices[0].get("delta") or choices[0].get("message") or {}
+        if isinstance(delta.get("content"), str):
+            return delta["content"]
+    return ""
+
+
+def parse_stream_lines(lines: Iterable[str]) -> Iterator[str]:
+    """把 SSE（``data: ...``）或 NDJSON 的逐行输出解析成文本块。"""
+    for raw in lines:
+        line = raw.strip()
+        if not line or line.startswith((":", "event:", "id:", "retry:")):
+            continue
+        if line.startswith("data:"):
+            line = line[5:].strip()
+            if line == "[DONE]":
+                return
+        try:
+            payload = json.loads(line)
+        except json.JSONDecodeError:
+            payload = line
+        chunk = _chunk_from_payload(payload)
+        if chunk:
+            yield chunk
+
+
+def iter_response_lines(resp: requests.Response, chunk_size: int = 8192) -> Iterator[str]:
+    """按行读取响应体，收到多少就处理多少。
+
+    ``Response.iter_lines`` 会攒满 chunk_size 或读到连接结束才返回，对非 chunked 的流式响应
+    会把整段回复憋到最后；这里用 ``read1`` 拿到已到达的数据立即切行。
+    ``resp.raw`` 默认返回线上的原始字节，接口（或中间的代理）用 gzip/deflate 压缩时要显式解码。
+    """
+    read1 = getattr(resp.raw, "read1", None)
+    pending = b""
+    while True:
+        if read1 is not None:
+            data = read1(chunk_size, decode_content=True)
+        else:
+            data = resp.raw.read(1, decode_content=True)
+        if not data:
+            break
+        pending += data
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8", errors="replace")
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
+
+
+def open_chat_stream(session: requests.Session, url: str, payload: dict[str, Any], timeout: float) -> Iterator[str]:
+    """发起请求并在拿到响应头后返回文本块迭代器；连接失败会直接抛出，方便调用方回退。
+
+    ``timeout`` 是连接和两个数据块之间的最长等待，而不是整段回复的总时长。
+    """
+    resp = session.post(url, json=payload, stream=True, timeout=(min(timeout, 5.0), timeout), headers={"Accept": STREAM_ACCEPT})
+    resp.raise_for_status()
+    content_type = resp.headers.get("Content-Type", "")
+
+    def chunks() -> Iterator[str]:
+        try:
+            if content_type.startswith("application/json"):
+                chunk = _chunk_from_payload(resp.json())
+                if chunk:
+                    yield chunk
+                return
+            yield from parse_stream_lines(iter_response_lines(resp))
+        except requests.RequestException:
+            yield "\n\n> 连接中断，回复可能不完整。"
+        finally:
+            resp.close()
+
+    return chunks()
+
+
+def paced_chunks(text: str, size: int = 4, delay: float = 0.01) -> Iterator[str]:
+    """本地回复的打字效果：按字符切块（中文没有空格也能逐段出现）。"""
+    for start in range(0, len(text), size):
+        yield text[start : start + size]
+        if delay:
+            time.sleep(delay)
+
+
+@dataclass
+class StreamStats:
+    text: str
+    ttft: float | None
+    total: float
+    frames: int
+
+
+def render_stream(
+    chunks: Iterable[str],
+    render: Callable[[str], None],
+    fps: float = 20.0,
+    started: float | None = None,
+    clock: Callable[[], float] = time.perf_counter,
+) -> StreamStats:
+    """边收边渲染，但把渲染合并到固定帧率：无论收到多少块，每秒最多重绘 fps 次。"""
+    start = clock() if started is None else started
+    interval = 1.0 / fps
+    parts: list[str] = []
+    first_at: float | None = None
+    last_frame = float("-inf")
+    frames = 0
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        now = clock()
+        if first_at is None:
+            first_at = now
+        parts.append(chunk)
+        if now - last_frame >= interval:
+            render("".join(parts) + CURSOR)
+            frames += 1
+            last_frame = now
+
+    text = "".join(parts)
+    render(text)
+    frames += 1
+    end = clock()
+    return StreamStats(
+        text=text,
+        ttft=None if first_at is None else first_at - start,
+        total=end - start,
+        frames=frames,
+    )
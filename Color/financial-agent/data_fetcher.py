@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from resilience import CircuitBreaker, StaleWhileRevalidateCache
+
+
+@dataclass(frozen=True)
+class FetchJob:
+    name: str
+    url: str
+    params: dict[str, str] = field(default_factory=dict)
+    deadline: float = 2.0
+    validate: Callable[[Any], bool] | None = None
+
+    @property
+    def cache_key(self) -> tuple[str, tuple[tuple[str, str], ...]]:
+        return self.url, tuple(sorted(self.params.items()))
+
+
+class DataFetcher:
+    """并发拉取多个数据源：共享一个线程池和一个带连接池的 keep-alive Session。
+
+    每个数据源有自己的 deadline，某个源超时只会让它自己返回 None，
+    其它已经完成的源照常返回，调用方只需要为缺失的源回退到本地模拟。
+
+    每个接口配一个熔断器，接口挂掉后不再每次重跑都白等超时；
+    成功结果进入 stale-while-revalidate 缓存，过期数据先返回，刷新在后台进行。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        pool_size: int = 16,
+        cache_ttl: float = 2.0,
+        failure_threshold: int = 3,
+        reset_timeout: float = 15.0,
+    ) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.cache = StaleWhileRevalidateCache(ttl=cache_ttl)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        with self._lock:
+            if url not in self._breakers:
+                self._breakers[url] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[url]
+
+    def get_json(self, job: FetchJob) -> Any:
+        resp = self.session.get(job.url, params=job.params, timeout=job.deadline)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _refresh(self, job: FetchJob) -> Any:
+        """真正发请求的地方：更新熔断器，成功结果写入缓存。"""
+        breaker = self.breaker(job.url)
+        try:
+            try:
+                data = self.get_json(job)
+                if job.validate is not None and not job.validate(data):
+                    raise ValueError(f"unexpected payload from {job.url}")
+            except Exception:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
+            self.cache.put(job.cache_key, data)
+            return data
+        finally:
+            self.cache.end_refresh(job.cache_key)
+
+    def _submit_refresh(self, job: FetchJob) -> Future | None:
+        if not self.cache.begin_refresh(job.cache_key):
+            return None
+        return self.executor.submit(self._refresh, job)
+
+    def fetch_all(self, jobs: list[FetchJob]) -> dict[str, Any]:
+        """同时发出所有请求；超过各自 deadline、失败或处于熔断中的源结果为 None。"""
+        start = time.monotonic()
+        results: dict[str, Any] = {}
+        pending: list[tuple[FetchJob, Future]] = []
+
+        for job in jobs:
+            breaker = self.breaker(job.url)
+            cached = self.cache.get(job.cache_key)
+
+            if cached is not None:
+                data, fresh = cached
+                results[job.name] = data
+                if not fresh and (breaker.allow_request() or breaker.try_probe()):
+                    self._submit_refresh(job)
+                continue
+
+            results[job.name] = None
+            if breaker.allow_request():
+                future = self._submit_refresh(job)
+                if future is not None:
+                    pending.append((job, future))
+            elif breaker.try_probe():
+                self._submit_refresh(job)
+
+        for job, future in pending:
+            remaining = job.deadline - (time.monotonic() - start)
+            try:
+                results[job.name] = future.result(timeout=max(0.0, remaining))
+            except Exception:
+                results[job.name] = None
+        return results
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            breakers = {url: b.state for url, b in self._breakers.items()}
+        return {
+            "hit_rate": self.cache.hit_rate,
+            "hits": self.cache.hits,
+            "stale_hits": self.cache.stale_hits,
+            "misses": self.cache.misses,
+            "breakers": breakers,
+        }
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
@@ -0,0 +1,149 @@
+"""长时间序列在画图前的降采样：LTTB、每桶最小/最大值、OHLC 蜡烛聚合。
+
+一张图在屏幕上能分辨的点数取决于它有多少像素宽，与历史有多长无关；所以目标点数按图表宽度算
+（``target_points``），历史从几百个点涨到几天的 tick，发给浏览器的点数都不变。
+窗口里的原始点数不超过目标点数时原样返回，放大到短时间窗口就能看到原始分辨率。
+
+和 ``7.streamlit/src/lib/downsample.py`` 是同一份算法（那边多一个 ``series_figure``）；financial-agent 要能单独部署，
+所以保留自己的副本，改动时两边一起改。
+"""
+from __future__ import annotations
+
+from typing import NamedTuple
+
+import numpy as np
+
+
+METHODS = ("lttb", "minmax", "ohlc")
+# 折线大约 2 像素一个点就看不出差别；蜡烛要留出实体和间隔，大约 8 像素一根
+PX_PER_POINT = {"lttb": 2.0, "minmax": 2.0, "ohlc": 8.0}
+MIN_POINTS = 32
+MAX_POINTS = 4000
+
+# float32 只有约 7 位有效数字：情绪值和几百块的股价够用，BTC 这种五位数的价格会丢掉分位。
+# 行情价格保留 4 位小数，float32 表示不了这个精度的序列改用 float64 发送
+Y_TOLERANCE = 5e-5
+
+
+class Candles(NamedTuple):
+    x: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+
+def target_points(width_px: float, method: str = "lttb") -> int:
+    """图表宽度（像素）对应的目标点数；ohlc 时是蜡烛根数。"""
+    if method not in PX_PER_POINT:
+        raise ValueError(f"unknown downsampling method: {method}")
+    return int(np.clip(width_px / PX_PER_POINT[method], MIN_POINTS, MAX_POINTS))
+
+
+def _bounds(size: int, buckets: int) -> np.ndarray:
+    """把 [0, size) 均分成 buckets 段，返回 buckets+1 个整数边界；每段长度最多相差 1。"""
+    return np.arange(buckets + 1, dtype=np.intp) * size // buckets
+
+
+def _padded(bounds: np.ndarray) -> np.ndarray:
+    """每个桶的下标补齐成等宽的二维矩阵，就能对所有桶一次性做 argmin/argmax。
+
+    补齐的位置重复指向桶里的第一个点，重复值不改变桶内的最值，选出的也总是真实的点。
+    """
+    starts, stops = bounds[:-1], bounds[1:]
+    width = int((stops - starts).max(initial=1))
+    idx = starts[:, None] + np.arange(width, dtype=np.intp)
+    return np.where(idx < stops[:, None], idx, starts[:, None])
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets：返回保留点的下标（升序，含首尾两点）。
+
+    首尾之外的点均分成 n-2 个桶，每个桶选出与"上一个选中点"和"下一个桶的均值点"
+    围成三角形面积最大的点，峰谷和拐点都会保留下来。x、y 需要已经去掉 NaN。
+    """
+    size = len(y)
+    if n >= size or size <= 2:
+        return np.arange(size, dtype=np.intp)
+    if n < 3:
+        raise ValueError("lttb needs at least 3 points")
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    bounds = _bounds(size - 2, n - 2) + 1
+    idx = _padded(bounds)
+    bx, by = x[idx], y[idx]
+
+    # 下一个桶的均值点；最后一个桶的"下一个"就是末尾那个点
+    counts = np.diff(bounds)
+    avg_x = np.append(np.add.reduceat(x[1:-1], bounds[:-1] - 1) / counts, x[-1])[1:]
+    avg_y = np.append(np.add.reduceat(y[1:-1], bounds[:-1] - 1) / counts, y[-1])[1:]
+
+    picked = np.empty(n, dtype=np.intp)
+    picked[0], picked[-1] = 0, size - 1
+    ax, ay = float(x[0]), float(y[0])
+    for i in range(n - 2):
+        # 三角形面积的两倍：|(ax-cx)(y-ay) - (ax-x)(cy-ay)|，在桶内向量化
+        cx, cy = float(avg_x[i]), float(avg_y[i])
+        area = np.abs((ax - cx) * (by[i] - ay) - (ax - bx[i]) * (cy - ay))
+        j = idx[i, area.argmax()]
+        picked[i + 1] = j
+        ax, ay = float(x[j]), float(y[j])
+    return picked
+
+
+def minmax(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """每个桶保留最小值和最大值两个点（按时间先后），返回升序下标；尖峰一个都不会丢。"""
+    size = len(y)
+    if n >= size:
+        return np.arange(size, dtype=np.intp)
+    buckets = max(1, n // 2)
+    idx = _padded(_bounds(size, buckets))
+    values = np.asarray(y)[idx]
+    rows = np.arange(buckets)
+    lo = idx[rows, values.argmin(axis=1)]
+    hi = idx[rows, values.argmax(axis=1)]
+    return np.unique(np.concatenate([lo, hi]))
+
+
+def ohlc(x: np.ndarray, y: np.ndarray, n: int) -> Candles:
+    """把序列均分成最多 n 个桶，每桶聚合成一根蜡烛；x 取每桶第一个点的时间。"""
+    size = len(y)
+    buckets = max(1, min(n, size))
+    y = np.asarray(y)
+    if size == 0:
+        return Candles(np.asarray(x)[:0], y[:0], y[:0], y[:0], y[:0])
+    bounds = _bounds(size, buckets)
+    starts = bounds[:-1]
+    return Candles(
+        x=np.asarray(x)[starts],
+        open=y[starts],
+        high=np.maximum.reduceat(y, starts),
+        low=np.minimum.reduceat(y, starts),
+        close=y[bounds[1:] - 1],
+    )
+
+
+def downsample(x: np.ndarray, y: np.ndarray, n: int, method: str = "lttb") -> tuple[np.ndarray, np.ndarray]:
+    """折线用的降采样：先去掉 NaN（序列中途加入时前面是空的），再按 method 选点。"""
+    finite = ~np.isnan(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    if method == "lttb":
+        keep = lttb(x, y, n)
+    elif method == "minmax":
+        keep = minmax(x, y, n)
+    else:
+        raise ValueError(f"unknown line downsampling method: {method}")
+    if len(keep) == len(y):
+        return x, y
+    return x[keep], y[keep]
+
+
+def compact_values(values: np.ndarray, tolerance: float = Y_TOLERANCE) -> np.ndarray:
+    """尽量用 float32（二进制编码后体积减半）；转换误差超过 tolerance 时保留 float64。"""
+    values = np.asarray(values, dtype=np.float64)
+    narrow = values.astype(np.float32)
+    if np.nanmax(np.abs(narrow - values), initial=0.0) <= tolerance:
+        return narrow
+    return values
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+
+class RingHistory:
+    """定长、数组存储的历史环形缓冲区：一列时间戳 + 每个序列（标的/主题）一列数值。
+
+    每个采样点同时写入 ``i`` 和 ``i + capacity`` 两个位置，这样"最近 N 个点"永远是底层数组里
+    连续的一段，``last`` 返回的是零拷贝视图，可以直接交给 pandas / Plotly。
+    内存上限固定为 ``2 * capacity * (序列数 + 1) * 8`` 字节，与看板打开多久无关。
+    """
+
+    def __init__(self, capacity: int, series: Sequence[str] = ()) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.series: list[str] = []
+        self.index: dict[str, int] = {}
+        self._times = np.zeros(2 * capacity, dtype="datetime64[ms]")
+        self._values = np.full((2 * capacity, 0), np.nan)
+        self._head = 0
+        self._size = 0
+        # 累计写入的行数（正在写的那一行也算上），快照据此判断它看到的行有没有被覆盖
+        self.appended = 0
+        self.add_series(series)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return self._times.nbytes + self._values.nbytes
+
+    def add_series(self, names: Sequence[str]) -> None:
+        new = [n for n in dict.fromkeys(names) if n not in self.index]
+        if not new:
+            return
+        for offset, name in enumerate(new, start=len(self.series)):
+            self.index[name] = offset
+        self.series.extend(new)
+        pad = np.full((2 * self.capacity, len(new)), np.nan)
+        self._values = np.hstack([self._values, pad])
+
+    def drop_series(self, names: Sequence[str]) -> None:
+        """删掉不再需要的序列，连同它们的历史列一起释放。"""
+        gone = {n for n in names if n in self.index}
+        if not gone:
+            return
+        keep = [i for i, name in enumerate(self.series) if name not in gone]
+        self.series = [self.series[i] for i in keep]
+        self.index = {name: i for i, name in enumerate(self.series)}
+        self._values = self._values[:, keep]
+
+    def columns(self, names: Sequence[str]) -> np.ndarray:
+        self.add_series(names)
+        return np.fromiter((self.index[n] for n in names), dtype=np.intp, count=len(names))
+
+    def append(self, ts: datetime | np.datetime64, names: Sequence[str], values: Sequence[float] | np.ndarray) -> None:
+        """O(1) 追加一个采样点；本次未出现的序列记为 NaN。"""
+        cols = self.columns(names)
+        row = np.full(len(self.series), np.nan)
+        row[cols] = values
+
+        pos = self._head
+        self.appended += 1
+        for p in (pos, pos + self.capacity):
+            self._times[p] = np.datetime64(ts, "ms")
+            self._values[p] = row
+
+        self._head = (pos + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def _window(self, n: int | None) -> slice:
+        n = self._size if n is None else max(0, min(n, self._size))
+        stop = self._head + self.capacity
+        return slice(stop - n, stop)
+
+    def last(self, n: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """返回最近 n 个点的 (times, values) 视图，values 形状为 (n, 序列数)。"""
+        window = self._window(n)
+        return self._times[window], self._values[window]
+
+    def snapshot(self) -> "HistorySnapshot":
+        """O(1) 发布当前历史：不复制数据，只记下底层数组和写入位置；必须在写入线程里调用。"""
+        return HistorySnapshot(
+            self, self._times, self._values, tuple(self.series), self.appended, self._head + self.capacity, self._size
+        )
+
+    def frame(self, n: int | None = None, names: Sequence[str] | None = None) -> pd.DataFrame:
+        """宽表：时间为索引、每个序列一列；不指定 names 时不复制底层数据。"""
+        times, values = self.last(n)
+        if names is None:
+            return pd.DataFrame(values, index=pd.DatetimeIndex(times, name="time"), columns=self.series, copy=False)
+        cols = [self.index[name] for name in names if name in self.index]
+        return pd.DataFrame(
+            values[:, cols],
+            index=pd.DatetimeIndex(times, name="time"),
+            columns=[self.series[c] for c in cols],
+        )
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True)
+class HistorySnapshot:
+    """某一时刻 ``RingHistory`` 的只读视图，发布时不复制环形缓冲区。
+
+    读取时才复制需要的窗口，复制完再对照 ``RingHistory.appended``：写入线程在这期间覆盖掉的
+    最旧几行直接丢掉，所以读到的永远是完整的行，开销只和读取的点数成正比。
+    """
+
+    ring: RingHistory
+    times_buffer: np.ndarray
+    values_buffer: np.ndarray
+    series: tuple[str, ...]
+    appended: int
+    stop: int
+    size: int
+
+    def _window(self, n: int | None) -> tuple[int, slice]:
+        n = self.size if n is None else max(0, min(n, self.size))
+        return n, slice(self.stop - n, self.stop)
+
+    def _intact(self, n: int) -> int:
+        # 复制完成后调用：第 k 行（从 0 计）只有在写满 k + capacity 行之后才会被覆盖
+        lag = self.ring.appended - self.appended
+        return max(0, min(n, self.ring.capacity - lag))
+
+    def last(self, n: int | None = None, cols: Sequence[int] | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """最近 n 个点的 (times, values) 只读副本；cols 只取其中几列。"""
+        n, window = self._window(n)
+        times = self.times_buffer[window].copy()
+        values = self.values_buffer[window].copy() if cols is None else self.values_buffer[window, list(cols)]
+        skip = n - self._intact(n)
+        return _read_only(times[skip:]), _read_only(values[skip:])
+
+    @property
+    def times(self) -> np.ndarray:
+        n, window = self._window(None)
+        times = self.times_buffer[window].copy()
+        return _read_only(times[n - self._intact(n):])
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.last()[1]
+
+    def frame(self, n: int | None = None, names: Sequence[str] | None = None) -> pd.DataFrame:
+        if names is None:
+            times, values = self.last(n)
+            return pd.DataFrame(values, index=pd.DatetimeIndex(times, name="time"), columns=list(self.series))
+        lookup = {name: i for i, name in enumerate(self.series)}
+        cols = [lookup[name] for name in names if name in lookup]
+        times, values = self.last(n, cols)
+        return pd.DataFrame(values, index=pd.DatetimeIndex(times, name="time"), columns=[self.series[c] for c in cols])
+
+    def points_since(self, seconds: float | None) -> int:
+        """最近 seconds 秒内的采样点数（None 表示全部），配合 ``frame(n)`` 取时间窗口。"""
+        times = self.times
+        if seconds is None or len(times) == 0:
+            return len(times)
+        cutoff = times[-1] - np.timedelta64(int(seconds * 1000), "ms")
+        return len(times) - int(np.searchsorted(times, cutoff, side="left"))
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+
+
+PRICE_FLOOR = 0.1
+VOLUME_FLOOR = 10_000
+
+
+def _keep(names: list[str], drop: list[str]) -> np.ndarray | None:
+    """删掉 drop 之后剩下的下标；没有要删的返回 None。"""
+    gone = set(drop)
+    if gone.isdisjoint(names):
+        return None
+    return np.array([i for i, name in enumerate(names) if name not in gone], dtype=np.intp)
+
+
+class MarketEngine:
+    """批量行情模拟引擎：所有标的的价格、开盘价、成交量都放在按标的索引的 NumPy 数组里，
+    每个 tick 用一次向量化的几何随机游走推进全部标的。"""
+
+    def __init__(
+        self,
+        seed: int | None = None,
+        volatility: float = 0.0038,
+        volume_volatility: float = 0.09,
+    ) -> None:
+        self.rng = np.random.default_rng(seed)
+        self.volatility = volatility
+        self.volume_volatility = volume_volatility
+
+        self.symbols: list[str] = []
+        self.index: dict[str, int] = {}
+        self.opens = np.empty(0, dtype=np.float64)
+        self.prices = np.empty(0, dtype=np.float64)
+        self.volumes = np.empty(0, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def _initial_prices(self, symbols: list[str]) -> np.ndarray:
+        low = np.full(len(symbols), 20.0)
+        high = np.full(len(symbols), 800.0)
+        is_btc = np.array(["BTC" in s for s in symbols], dtype=bool)
+        is_eth = np.array(["ETH" in s for s in symbols], dtype=bool) & ~is_btc
+        low[is_btc], high[is_btc] = 38000.0, 72000.0
+        low[is_eth], high[is_eth] = 1800.0, 4200.0
+        return self.rng.uniform(low, high)
+
+    def ensure(self, symbols: list[str]) -> np.ndarray:
+        """登记新标的（一次性扩容数组），返回这些标的在数组中的下标。"""
+        new = [s for s in dict.fromkeys(symbols) if s not in self.index]
+        if new:
+            base = self._initial_prices(new)
+            volumes = self.rng.integers(120_000, 5_000_000, size=len(new)).astype(np.float64)
+            for offset, symbol in enumerate(new, start=len(self.symbols)):
+                self.index[symbol] = offset
+            self.symbols.extend(new)
+            self.opens = np.concatenate([self.opens, base])
+            self.prices = np.concatenate([self.prices, base])
+            self.volumes = np.concatenate([self.volumes, volumes])
+        return np.fromiter((self.index[s] for s in symbols), dtype=np.intp, count=len(symbols))
+
+    def drop(self, symbols: list[str]) -> None:
+        """移除不再推进的标的；之后再 ensure 时会重新生成初始价格。"""
+        keep = _keep(self.symbols, symbols)
+        if keep is None:
+            return
+        self.symbols = [self.symbols[i] for i in keep]
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        self.opens, self.prices, self.volumes = self.opens[keep], self.prices[keep], self.volumes[keep]
+
+    def step(self, symbols: list[str]) -> np.ndarray:
+        """对给定标的推进一个 tick，返回它们的下标。"""
+        idx = self.ensure(symbols)
+        if idx.size == 0:
+            return idx
+
+        shocks = self.rng.normal(0.0, self.volatility, size=idx.size)
+        self.prices[idx] = np.maximum(PRICE_FLOOR, self.prices[idx] * np.exp(shocks))
+
+        vol_shocks = self.rng.normal(0.0, self.volume_volatility, size=idx.size)
+        self.volumes[idx] = np.maximum(VOLUME_FLOOR, np.floor(self.volumes[idx] * (1 + vol_shocks)))
+        return idx
+
+    def change_pct(self, idx: np.ndarray) -> np.ndarray:
+        return (self.prices[idx] / self.opens[idx] - 1) * 100
+
+    def rows(self, idx: np.ndarray, ts: str | None = None) -> list[dict[str, Any]]:
+        """把一批下标转换成与行情 API 相同格式的 list[dict]。"""
+        ts = ts or datetime.now().strftime("%H:%M:%S")
+        prices = np.round(self.prices[idx], 4).tolist()
+        changes = self.change_pct(idx).tolist()
+        volumes = self.volumes[idx].astype(np.int64).tolist()
+        return [
+            {"symbol": self.symbols[i], "price": p, "change_pct": c, "volume": v, "time": ts}
+            for i, p, c, v in zip(idx.tolist(), prices, changes, volumes)
+        ]
+
+
+SENTIMENT_LABELS = ("明显偏多", "轻度偏多", "明显偏空", "轻度偏空")
+
+
+def sentiment_labels(scores: np.ndarray) -> list[str]:
+    labels = np.select(
+        [scores > 0.35, scores > 0.05, scores < -0.35, scores < -0.05],
+        SENTIMENT_LABELS,
+        default="中性",
+    )
+    return labels.tolist()
+
+
+class SentimentEngine:
+    """舆情模拟引擎：情绪值和讨论量按主题存成数组，每个 tick 向量化地做一次有界随机游走。"""
+
+    def __init__(self, seed: int | None = None, score_step: float = 0.08, mention_step: float = 45.0) -> None:
+        self.rng = np.random.default_rng(seed)
+        self.score_step = score_step
+        self.mention_step = mention_step
+
+        self.topics: list[str] = []
+        self.index: dict[str, int] = {}
+        self.scores = np.empty(0, dtype=np.float64)
+        self.mentions = np.empty(0, dtype=np.float64)
+
+    def ensure(self, topics: list[str]) -> np.ndarray:
+        new = [t for t in dict.fromkeys(topics) if t not in self.index]
+        if new:
+            for offset, topic in enumerate(new, start=len(self.topics)):
+                self.index[topic] = offset
+            self.topics.extend(new)
+            self.scores = np.concatenate([self.scores, self.rng.uniform(-0.15, 0.25, size=len(new))])
+            mentions = self.rng.integers(60, 800, size=len(new)).astype(np.float64)
+            self.mentions = np.concatenate([self.mentions, mentions])
+        return np.fromiter((self.index[t] for t in topics), dtype=np.intp, count=len(topics))
+
+    def drop(self, topics: list[str]) -> None:
+        keep = _keep(self.topics, topics)
+        if keep is None:
+            return
+        self.topics = [self.topics[i] for i in keep]
+        self.index = {t: i for i, t in enumerate(self.topics)}
+        self.scores, self.mentions = self.scores[keep], self.mentions[keep]
+
+    def step(self, topics: list[str]) -> np.ndarray:
+        idx = self.ensure(topics)
+        if idx.size == 0:
+            return idx
+        self.scores[idx] = np.clip(self.scores[idx] + self.rng.normal(0.0, self.score_step, idx.size), -1.0, 1.0)
+        self.mentions[idx] = np.maximum(5, np.floor(self.mentions[idx] + self.rng.normal(0.0, self.mention_step, idx.size)))
+        return idx
+
+    def rows(self, idx: np.ndarray, ts: str | None = None) -> list[dict[str, Any]]:
+        ts = ts or datetime.now().strftime("%H:%M:%S")
+        scores = self.scores[idx]
+        return [
+            {"topic": self.topics[i], "score": s, "mentions": m, "label": label, "time": ts}
+            for i, s, m, label in zip(
+                idx.tolist(),
+                np.round(scores, 3).tolist(),
+                self.mentions[idx].astype(np.int64).tolist(),
+                sentiment_labels(scores),
+            )
+        ]
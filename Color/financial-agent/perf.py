@@ -0,0 +1,83 @@
+"""每次重跑的分阶段耗时记录，给压测（``7.streamlit/deploy/loadtest.py``）出分位数报告用。
+
+每次整页重跑和每次 fragment 重跑包在 ``rerun`` 里，各阶段包在 ``phase`` 里：
+
+    with perf.rerun("panel:market"):
+        with perf.phase("fetch"):
+            snapshot = read_feed(*feed_args)
+        with perf.phase("frame"):
+            market_df = snapshot.market_for(symbols)
+        ...
+
+阶段名约定为 ``fetch``（取数）、``frame``（构建 DataFrame）、``figure``（构建图表）、
+``serialize``（``st.plotly_chart`` / ``st.dataframe`` 把结果序列化发给前端）。
+设置了 ``STREAMLIT_PERF_LOG`` 时，每次重跑结束往这个文件追加一行 JSON；没设置时两个上下文管理器
+什么都不做。每行都小于 PIPE_BUF，多个工作进程用 O_APPEND 写同一个文件也不会交错。
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+ENV_LOG = "STREAMLIT_PERF_LOG"
+
+_local = threading.local()
+
+
+def log_path() -> str | None:
+    return os.getenv(ENV_LOG) or None
+
+
+def _write(record: dict[str, object]) -> None:
+    path = log_path()
+    if path is None:
+        return
+    line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def rerun(name: str) -> Iterator[None]:
+    """一次重跑的计时范围；嵌套时（整页重跑里内联执行的 fragment）只算进最外层。"""
+    if log_path() is None or getattr(_local, "phases", None) is not None:
+        yield
+        return
+    _local.phases = phases = {}
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.phases = None
+        total = (time.perf_counter() - start) * 1000
+        _write(
+            {
+                "name": name,
+                "pid": os.getpid(),
+                "ts": round(time.time(), 3),
+                "total_ms": round(total, 3),
+                "phases": {k: round(v, 3) for k, v in phases.items()},
+            }
+        )
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """把一段代码的耗时累加到当前重跑的 ``name`` 阶段；不在 ``rerun`` 里时不计时。"""
+    phases = getattr(_local, "phases", None)
+    if phases is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + (time.perf_counter() - start) * 1000
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class CircuitBreaker:
+    """单个接口的熔断器。
+
+    closed：正常放行；连续失败达到阈值后 open：直接拒绝，不再付出超时的代价；
+    open 持续 reset_timeout 秒后进入 half_open，只允许一次探测请求，成功则 closed，失败则重新 open。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 15.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    @property
+    def failures(self) -> int:
+        with self._lock:
+            return self._failures
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            return self._state == self.CLOSED
+
+    def try_probe(self) -> bool:
+        """open 且冷却期已过时切到 half_open 并返回 True，调用方负责发出唯一一次探测。"""
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+class StaleWhileRevalidateCache:
+    """带 TTL 的结果缓存：过期但未超过 max_stale 的数据仍然立即返回，同时由调用方在后台刷新。"""
+
+    def __init__(
+        self,
+        ttl: float = 2.0,
+        max_stale: float = 300.0,
+        max_entries: int = 256,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._refreshing: set[Hashable] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> tuple[Any, bool] | None:
+        """返回 (payload, is_fresh)；没有可用数据时返回 None。"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = self._clock() - stored_at
+                if age <= self.max_stale:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    if age > self.ttl:
+                        self.stale_hits += 1
+                    return value, age <= self.ttl
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def begin_refresh(self, key: Hashable) -> bool:
+        """同一个 key 同时只允许一个后台刷新。"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key: Hashable) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
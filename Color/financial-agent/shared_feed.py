@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Hashable
+
+import pandas as pd
+
+from data_fetcher import DataFetcher, FetchJob
+from history_store import HistorySnapshot, RingHistory
+from market_engine import MarketEngine, SentimentEngine
+
+
+logger = logging.getLogger(__name__)
+
+MARKET_COLUMNS = ["symbol", "price", "change_pct", "volume", "time"]
+SENTIMENT_COLUMNS = ["topic", "score", "mentions", "label", "time"]
+
+
+def _usable(data: Any) -> bool:
+    return isinstance(data, list) and bool(data)
+
+
+@dataclass(frozen=True)
+class FeedSnapshot:
+    """某一时刻的只读看板数据；所有会话共享同一个对象，任何会话都不应修改它。"""
+
+    version: int
+    created_at: datetime
+    market_df: pd.DataFrame
+    sentiment_df: pd.DataFrame
+    market_history: HistorySnapshot
+    sentiment_history: HistorySnapshot
+    sources: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def empty(cls) -> "FeedSnapshot":
+        """第一帧还没发布时给会话用的空快照（version 0）：页面照常渲染，下一次刷新再读。"""
+        return cls(
+            version=0,
+            created_at=datetime.now(),
+            market_df=pd.DataFrame(columns=MARKET_COLUMNS),
+            sentiment_df=pd.DataFrame(columns=SENTIMENT_COLUMNS),
+            market_history=RingHistory(1).snapshot(),
+            sentiment_history=RingHistory(1).snapshot(),
+            sources={"market": "pending", "sentiment": "pending"},
+        )
+
+    def covers(self, symbols: list[str], topics: list[str]) -> bool:
+        return set(symbols) <= set(self.market_df["symbol"]) and set(topics) <= set(self.sentiment_df["topic"])
+
+    def market_for(self, symbols: list[str]) -> pd.DataFrame:
+        df = self.market_df
+        return df[df["symbol"].isin(symbols)].reset_index(drop=True)
+
+    def sentiment_for(self, topics: list[str]) -> pd.DataFrame:
+        df = self.sentiment_df
+        return df[df["topic"].isin(topics)].reset_index(drop=True)
+
+
+class SharedFeed:
+    """进程级共享数据源：一个后台线程每个周期只拉取/模拟一次，发布不可变快照。
+
+    会话只负责 ``subscribe`` 自己关心的标的/主题并读取 ``latest()``，
+    所以上游调用次数和内存占用不会随在线会话数增长。``tick`` 只应由后台线程调用，会话不要自己推进数据源。
+    超过 ``subscription_ttl`` 秒没有会话读取的标的/主题会退出轮询集合，历史也一并删掉。
+    """
+
+    def __init__(
+        self,
+        fetcher: DataFetcher,
+        market_api: str = "",
+        sentiment_api: str = "",
+        interval: float = 2.0,
+        history_points: int = 120,
+        market_deadline: float = 2.0,
+        sentiment_deadline: float = 2.0,
+        subscription_ttl: float = 120.0,
+        seed: int | None = None,
+    ) -> None:
+        self.fetcher = fetcher
+        self.market_api = market_api
+        self.sentiment_api = sentiment_api
+        self.interval = interval
+        self.market_deadline = market_deadline
+        self.sentiment_deadline = sentiment_deadline
+        self.subscription_ttl = subscription_ttl
+
+        self.market_engine = MarketEngine(seed=seed)
+        self.sentiment_engine = SentimentEngine(seed=None if seed is None else seed + 1)
+        self.market_history = RingHistory(history_points)
+        self.sentiment_history = RingHistory(history_points)
+
+        self._symbols: dict[str, float] = {}
+        self._topics: dict[str, float] = {}
+        self._snapshot: FeedSnapshot | None = None
+        self._version = 0
+        self._cond = threading.Condition()
+        # tick 会改引擎和环形历史，同一时刻只能有一个写入方
+        self._writer = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="shared-feed", daemon=True)
+
+    def start(self) -> "SharedFeed":
+        if not self._thread.is_alive():
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        """停止后台线程并等它退出（正在进行的一次拉取最多再跑完一个 deadline）。"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def subscribe(self, symbols: list[str], topics: list[str]) -> bool:
+        """登记会话关心的标的/主题；出现新订阅时立即唤醒后台线程并返回 True。"""
+        now = time.monotonic()
+        with self._cond:
+            new = any(s not in self._symbols for s in symbols) or any(t not in self._topics for t in topics)
+            self._symbols.update(dict.fromkeys(symbols, now))
+            self._topics.update(dict.fromkeys(topics, now))
+        if new:
+            self._wake.set()
+        return new
+
+    def latest(self) -> FeedSnapshot | None:
+        with self._cond:
+            return self._snapshot
+
+    def wait_for(self, symbols: list[str], topics: list[str], timeout: float = 5.0) -> FeedSnapshot | None:
+        """等到快照包含这些标的/主题（新订阅后的第一帧），超时则返回当前快照。"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._snapshot is None or not self._snapshot.covers(symbols, topics):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._snapshot
+
+    def _expire(self, subscriptions: dict[str, float]) -> list[str]:
+        cutoff = time.monotonic() - self.subscription_ttl
+        expired = [k for k, seen in subscriptions.items() if seen < cutoff]
+        for key in expired:
+            del subscriptions[key]
+        return expired
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("shared feed tick failed")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def tick(self) -> FeedSnapshot:
+        with self._writer:
+            return self._tick()
+
+    def _tick(self) -> FeedSnapshot:
+        with self._cond:
+            expired_symbols = self._expire(self._symbols)
+            expired_topics = self._expire(self._topics)
+            symbols, topics = list(self._symbols), list(self._topics)
+
+        # 没有会话再读的标的/主题连同模拟状态和历史列一起释放，内存只跟当前订阅有关
+        self.market_engine.drop(expired_symbols)
+        self.market_history.drop_series(expired_symbols)
+        self.sentiment_engine.drop(expired_topics)
+        self.sentiment_history.drop_series(expired_topics)
+
+        jobs = []
+        if self.market_api and symbols:
+            jobs.append(FetchJob("market", self.market_api, {"symbols": ",".join(symbols)}, self.market_deadline, _usable))
+        if self.sentiment_api and topics:
+            jobs.append(FetchJob("sentiment", self.sentiment_api, {"topics": ",".join(topics)}, self.sentiment_deadline, _usable))
+        results = self.fetcher.fetch_all(jobs) if jobs else {}
+
+        now = datetime.now()
+        ts = now.strftime("%H:%M:%S")
+        sources = {}
+
+        market = results.get("market")
+        if _usable(market):
+            sources["market"] = "api"
+        else:
+            sources["market"] = "simulated"
+            market = self.market_engine.rows(self.market_engine.step(symbols), ts=ts)
+        market_df = pd.DataFrame(market, columns=MARKET_COLUMNS)
+        self.market_history.append(now, market_df["symbol"].tolist(), market_df["price"].to_numpy(dtype=float))
+
+        sentiment = results.get("sentiment")
+        if _usable(sentiment):
+            sources["sentiment"] = "api"
+        else:
+            sources["sentiment"] = "simulated"
+            sentiment = self.sentiment_engine.rows(self.sentiment_engine.step(topics), ts=ts)
+        sentiment_df = pd.DataFrame(sentiment, columns=SENTIMENT_COLUMNS)
+        self.sentiment_history.append(now, sentiment_df["topic"].tolist(), sentiment_df["score"].to_numpy(dtype=float))
+
+        with self._cond:
+            self._version += 1
+            snapshot = FeedSnapshot(
+                version=self._version,
+                created_at=now,
+                market_df=market_df,
+                sentiment_df=sentiment_df,
+                market_history=self.market_history.snapshot(),
+                sentiment_history=self.sentiment_history.snapshot(),
+                sources=sources,
+            )
+            self._snapshot = snapshot
+            self._cond.notify_all()
+        return snapshot
+
+
+class FeedPool:
+    """按 (行情 API, 舆情 API) 复用 ``SharedFeed``，最多保留 ``max_feeds`` 个。
+
+    端点是侧边栏里随手填的文本，不加上限的话每种组合都会多一个永不停止的轮询线程；
+    超出上限时最久没用过的数据源被挤出并停掉，之后再用到会重新创建。
+    """
+
+    def __init__(self, factory: Callable[[str, str], SharedFeed], max_feeds: int = 4) -> None:
+        self.factory = factory
+        self.max_feeds = max_feeds
+        self._lock = threading.Lock()
+        self._feeds: OrderedDict[tuple[str, str], SharedFeed] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._feeds)
+
+    def get(self, market_api: str = "", sentiment_api: str = "") -> SharedFeed:
+        key = (market_api.strip(), sentiment_api.strip())
+        evicted = []
+        with self._lock:
+            feed = self._feeds.get(key)
+            if feed is not None:
+                self._feeds.move_to_end(key)
+                return feed
+            feed = self._feeds[key] = self.factory(*key).start()
+            while len(self._feeds) > self.max_feeds:
+                evicted.append(self._feeds.popitem(last=False)[1])
+        # 在锁外等旧线程退出，不挡住其他会话取数据源
+        for old in evicted:
+            old.stop()
+        return feed
+
+    def close(self) -> None:
+        with self._lock:
+            feeds = list(self._feeds.values())
+            self._feeds.clear()
+        for feed in feeds:
+            feed.stop()
+
+
+class SnapshotCache:
+    """按快照版本派生的只读结果缓存（图表、信号索引等），键里带上 ``snapshot.version``。
+
+    同一个快照版本下，关注相同标的的会话直接复用同一份结果，不重复计算；
+    版本前进后旧条目按 LRU 淘汰。
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
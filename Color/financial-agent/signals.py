@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+
+class SymbolMatcher:
+    """Aho-Corasick 多模式匹配：一次扫描 prompt 就找出所有提到的标的，耗时与标的数量无关。"""
+
+    def __init__(self, symbols: Iterable[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[str]] = [[]]
+        for symbol in symbols:
+            self._add(symbol)
+        self._build_failure_links()
+
+    def _add(self, symbol: str) -> None:
+        node = 0
+        for ch in symbol.lower():
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        if symbol not in self._out[node]:
+            self._out[node].append(symbol)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> list[tuple[int, str]]:
+        """返回 (起始位置, 标的) 列表，按出现顺序排列。"""
+        matches = []
+        node = 0
+        for pos, ch in enumerate(text.lower()):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for symbol in self._out[node]:
+                matches.append((pos - len(symbol) + 1, symbol))
+        matches.sort(key=lambda m: (m[0], -len(m[1])))
+        return matches
+
+    def first(self, text: str) -> str | None:
+        """最靠前、同位置取最长的那个标的。"""
+        matches = self.find_all(text)
+        return matches[0][1] if matches else None
+
+
+def _top_k(values: np.ndarray, k: int) -> np.ndarray:
+    """前 k 大的下标（按值降序），用 argpartition 避免整表排序。"""
+    k = min(k, values.size)
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    part = np.argpartition(-values, k - 1)[:k]
+    return part[np.argsort(-values[part], kind="stable")]
+
+
+def _records(df: pd.DataFrame, idx: np.ndarray) -> tuple[dict[str, Any], ...]:
+    return tuple(df.iloc[idx].to_dict(orient="records"))
+
+
+@dataclass(frozen=True)
+class SignalIndex:
+    """每个快照算一次的信号索引；Quick Signal 面板和本地回复都只读它。"""
+
+    gainers: tuple[dict[str, Any], ...]
+    losers: tuple[dict[str, Any], ...]
+    movers: tuple[dict[str, Any], ...]
+    sentiment_extremes: tuple[dict[str, Any], ...]
+    hot_topics: tuple[dict[str, Any], ...]
+    rows: dict[str, dict[str, Any]]
+    matcher: SymbolMatcher
+
+    @classmethod
+    def build(cls, market_df: pd.DataFrame, sentiment_df: pd.DataFrame, k: int = 5) -> "SignalIndex":
+        change = market_df["change_pct"].to_numpy(dtype=float)
+        score = sentiment_df["score"].to_numpy(dtype=float)
+        mentions = sentiment_df["mentions"].to_numpy(dtype=float)
+        rows = {row["symbol"]: row for row in market_df.to_dict(orient="records")}
+        return cls(
+            gainers=_records(market_df, _top_k(change, k)),
+            losers=_records(market_df, _top_k(-change, k)),
+            movers=_records(market_df, _top_k(np.abs(change), k)),
+            sentiment_extremes=_records(sentiment_df, _top_k(np.abs(score), k)),
+            hot_topics=_records(sentiment_df, _top_k(mentions, k)),
+            rows=rows,
+            matcher=SymbolMatcher(rows),
+        )
+
+    def mentioned(self, prompt: str) -> dict[str, Any] | None:
+        symbol = self.matcher.first(prompt)
+        return None if symbol is None else self.rows[symbol]
@@ -0,0 +1,70 @@
+import pathlib
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from charts import MARKET_COLORS, figure_bytes, line_figure, ohlc_figure  # noqa: E402
+from downsample import compact_values  # noqa: E402
+
+
+def price_frame(points: int = 400) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    index = pd.date_range("2026-01-05 09:30", periods=points, freq="2s", name="time")
+    return pd.DataFrame(
+        {
+            "BTC-USD": np.round(67_000 + rng.normal(0, 40, points).cumsum(), 4),
+            "AAPL": np.round(190 + rng.normal(0, 0.4, points).cumsum(), 4),
+        },
+        index=index,
+    )
+
+
+def test_btc_prices_keep_their_cents() -> None:
+    frame = price_frame()
+    fig = line_figure(frame, "price", MARKET_COLORS)
+    btc, aapl = fig.data
+
+    assert btc.y.dtype == np.float64
+    assert np.abs(btc.y - frame["BTC-USD"].to_numpy()).max() < 1e-4
+    # 价格小的序列仍然用 float32，负载不变
+    assert aapl.y.dtype == np.float32
+    assert np.abs(aapl.y - frame["AAPL"].to_numpy()).max() <= 5e-5
+
+
+def test_downsampled_and_ohlc_traces_pick_exact_prices() -> None:
+    frame = price_frame()
+    btc = frame["BTC-USD"].to_numpy()
+
+    line = line_figure(frame, "price", MARKET_COLORS, max_points=50, method="minmax").data[0]
+    assert len(line.y) <= 50
+    assert np.isin(line.y, btc).all()
+
+    bars = ohlc_figure(frame, "price", MARKET_COLORS, candles=20).data[0]
+    assert bars.high.max() == btc.max()
+    assert bars.low.min() == btc.min()
+
+
+def test_compact_values_falls_back_only_when_precision_is_lost() -> None:
+    assert compact_values(np.array([0.125, -0.4, np.nan])).dtype == np.float32
+    assert compact_values(np.array([np.nan, np.nan])).dtype == np.float32
+    assert compact_values(np.array([131_234.57])).dtype == np.float64
+
+
+def test_float32_series_halve_the_payload() -> None:
+    small = line_figure(price_frame()[["AAPL"]], "price", MARKET_COLORS)
+    wide = line_figure(price_frame()[["AAPL"]].astype(np.float64) + 100_000, "price", MARKET_COLORS)
+    assert figure_bytes(small) < figure_bytes(wide)
+
+
+def test_figures_send_at_most_the_budget() -> None:
+    frame = price_frame(20_000)
+    fig = line_figure(frame, "price", ["#000"], max_points=400)
+    assert [len(trace.x) for trace in fig.data] == [400, 400]
+    candles = ohlc_figure(frame, "price", ["#000"], 150)
+    assert [len(trace.open) for trace in candles.data] == [150, 150]
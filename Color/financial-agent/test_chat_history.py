@@ -0,0 +1,58 @@
+import pathlib
+import sys
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from chat_history import ChatHistory, ContextEncoder, estimate_tokens  # noqa: E402
+
+
+def test_history_is_bounded_and_archives_old_questions() -> None:
+    history = ChatHistory("hi", max_messages=4)
+    for i in range(10):
+        history.append("user", f"question {i}")
+        history.append("assistant", f"answer {i}")
+
+    assert len(history) == 4
+    assert history.archived == 17
+    assert [m["content"] for m in history.tail(2)] == ["question 9", "answer 9"]
+    assert "question 7" in history.summary()
+
+
+def test_context_respects_token_budget_and_summarizes_the_rest() -> None:
+    history = ChatHistory("hi", max_messages=100)
+    for i in range(40):
+        history.append("user", "半导体板块风险如何" * 5)
+        history.append("assistant", "x" * 400)
+
+    messages = history.context(budget_tokens=300, per_message_tokens=120)
+
+    assert messages[0]["role"] == "system"
+    assert "此前还有" in messages[0]["content"]
+    assert sum(estimate_tokens(m["content"]) for m in messages[1:]) <= 300
+    assert messages[-1]["content"].startswith("x")
+
+
+def test_encoder_sends_keyframe_then_only_changed_fields() -> None:
+    encoder = ContextEncoder(keyframe_every=3)
+    market = [
+        {"symbol": "AAPL", "price": 190.0, "change_pct": 0.5, "volume": 10, "time": "10:00:00"},
+        {"symbol": "NVDA", "price": 700.0, "change_pct": 1.0, "volume": 20, "time": "10:00:00"},
+    ]
+    first = encoder.encode({"market": market})
+    assert first["mode"] == "full" and first["seq"] == 1
+    assert "time" not in first["market"][0]
+
+    moved = [dict(market[0], price=191.0, time="10:00:04"), dict(market[1], time="10:00:04")]
+    second = encoder.encode({"market": moved})
+    assert second["mode"] == "delta" and second["base"] == 1
+    assert second["market"] == {"upsert": [{"symbol": "AAPL", "price": 191.0}], "remove": []}
+
+    third = encoder.encode({"market": moved[:1]})
+    assert third["market"] == {"upsert": [], "remove": ["NVDA"]}
+
+    assert encoder.encode({"market": moved})["mode"] == "full"
+    encoder.reset()
+    assert encoder.encode({"market": moved})["mode"] == "full"
@@ -0,0 +1,85 @@
+import json
+import pathlib
+import sys
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from chat_stream import CURSOR, open_chat_stream, paced_chunks, parse_stream_lines, render_stream  # noqa: E402
+
+
+def test_parses_sse_ndjson_and_openai_style_chunks() -> None:
+    sse = [": keep-alive", 'data: {"delta": "半导"}', "", 'data: {"delta": "体"}', "data: [DONE]", 'data: {"delta": "x"}']
+    assert list(parse_stream_lines(sse)) == ["半导", "体"]
+
+    ndjson = ['{"delta": "A"}', '{"reply": "B"}', '{"choices": [{"delta": {"content": "C"}}]}']
+    assert list(parse_stream_lines(ndjson)) == ["A", "B", "C"]
+
+    assert list(parse_stream_lines(["data: plain text"])) == ["plain text"]
+
+
+def test_render_is_coalesced_to_frame_rate() -> None:
+    now = [0.0]
+
+    def clock() -> float:
+        return now[0]
+
+    def chunks():
+        for ch in "一二三四五六七八九十" * 10:
+            now[0] += 0.01
+            yield ch
+
+    frames: list[str] = []
+    stats = render_stream(chunks(), frames.append, fps=10, started=0.0, clock=clock)
+
+    assert stats.text == "一二三四五六七八九十" * 10
+    assert stats.ttft == 0.01
+    assert len(frames) == stats.frames == 11
+    assert frames[0] == "一" + CURSOR
+    assert frames[-1] == stats.text
+
+
+def test_paced_chunks_split_text_without_spaces() -> None:
+    assert list(paced_chunks("最大波动标的", size=2, delay=0)) == ["最大", "波动", "标的"]
+
+
+class GzipStreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        compressor = zlib.compressobj(wbits=31)
+        for piece in ["半导", "体板块", "走强"]:
+            data = compressor.compress(json.dumps({"delta": piece}).encode() + b"\n")
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        data = compressor.flush()
+        self.wfile.write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(data), data))
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_gzip_encoded_stream_is_decoded() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GzipStreamHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with requests.Session() as session:
+            url = f"http://127.0.0.1:{server.server_port}/chat"
+            assert list(open_chat_stream(session, url, {"message": "hi"}, timeout=5)) == ["半导", "体板块", "走强"]
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,118 @@
+import pathlib
+import sys
+import threading
+import time
+
+import pytest
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from data_fetcher import DataFetcher, FetchJob  # noqa: E402
+from resilience import CircuitBreaker  # noqa: E402
+
+
+class FakeFetcher(DataFetcher):
+    """不发真实请求：按 URL 返回预设结果，记录每个 URL 被请求了几次。"""
+
+    def __init__(self, responses: dict, **kwargs) -> None:
+        super().__init__(max_workers=4, **kwargs)
+        self.responses = responses
+        self.calls: dict[str, int] = {}
+
+    def get_json(self, job: FetchJob):
+        self.calls[job.url] = self.calls.get(job.url, 0) + 1
+        response = self.responses[job.url]
+        return response() if callable(response) else response
+
+
+def fail():
+    raise ConnectionError("down")
+
+
+def wait_until(predicate, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def make_fetcher():
+    fetchers = []
+
+    def make(responses: dict, **kwargs) -> FakeFetcher:
+        fetcher = FakeFetcher(responses, **kwargs)
+        fetchers.append(fetcher)
+        return fetcher
+
+    yield make
+    for fetcher in fetchers:
+        fetcher.close()
+
+
+def test_slow_source_misses_only_its_own_deadline(make_fetcher) -> None:
+    release = threading.Event()
+    fetcher = make_fetcher({"fast": [1], "slow": lambda: release.wait(2) and [2]})
+    jobs = [FetchJob("market", "fast", deadline=1.0), FetchJob("sentiment", "slow", deadline=0.05)]
+
+    start = time.monotonic()
+    results = fetcher.fetch_all(jobs)
+    release.set()
+
+    assert results == {"market": [1], "sentiment": None}
+    assert time.monotonic() - start < 0.5
+
+
+def test_open_breaker_skips_calls_until_the_probe_succeeds(make_fetcher) -> None:
+    fetcher = make_fetcher({"api": fail}, failure_threshold=2, reset_timeout=0.05, cache_ttl=60)
+    job = FetchJob("market", "api", deadline=1.0)
+
+    for _ in range(2):
+        assert fetcher.fetch_all([job]) == {"market": None}
+    assert fetcher.breaker("api").state == CircuitBreaker.OPEN
+
+    # 熔断期间直接返回 None，不再白等
+    assert fetcher.fetch_all([job]) == {"market": None}
+    assert fetcher.calls["api"] == 2
+
+    # 冷却期过后放出一次后台探测，成功则关闭熔断并写入缓存
+    time.sleep(0.06)
+    fetcher.responses["api"] = [42]
+    assert fetcher.fetch_all([job]) == {"market": None}
+    wait_until(lambda: fetcher.breaker("api").state == CircuitBreaker.CLOSED)
+    assert fetcher.fetch_all([job]) == {"market": [42]}
+    assert fetcher.calls["api"] == 3
+
+
+def test_invalid_payload_counts_as_a_failure(make_fetcher) -> None:
+    fetcher = make_fetcher({"api": []}, failure_threshold=1)
+    job = FetchJob("market", "api", validate=lambda data: bool(data))
+
+    assert fetcher.fetch_all([job]) == {"market": None}
+    assert fetcher.breaker("api").state == CircuitBreaker.OPEN
+    assert fetcher.cache.get(job.cache_key) is None
+
+
+def test_stale_payload_is_served_while_one_refresh_runs(make_fetcher) -> None:
+    release = threading.Event()
+    fetcher = make_fetcher({"api": [1]}, cache_ttl=0.0)
+    job = FetchJob("market", "api", deadline=1.0)
+    assert fetcher.fetch_all([job]) == {"market": [1]}
+
+    fetcher.responses["api"] = lambda: release.wait(2) and [2]
+    start = time.monotonic()
+    assert fetcher.fetch_all([job]) == {"market": [1]}
+    assert fetcher.fetch_all([job]) == {"market": [1]}
+    assert time.monotonic() - start < 0.5
+    # 两次读到过期数据，但同一个 key 同时只有一个刷新在跑
+    wait_until(lambda: fetcher.calls["api"] == 2)
+    assert fetcher.fetch_all([job]) == {"market": [1]}
+    assert fetcher.calls["api"] == 2
+
+    release.set()
+    wait_until(lambda: fetcher.cache.get(job.cache_key)[0] == [2])
+    assert fetcher.fetch_all([job]) == {"market": [2]}
+    assert fetcher.stats()["stale_hits"] >= 2
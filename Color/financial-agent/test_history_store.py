@@ -0,0 +1,94 @@
+import pathlib
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from history_store import RingHistory  # noqa: E402
+
+
+T0 = datetime(2026, 1, 5, 9, 30)
+
+
+def test_last_is_a_zero_copy_view_after_wraparound() -> None:
+    hist = RingHistory(capacity=4, series=["AAPL"])
+    for i in range(10):
+        hist.append(T0 + timedelta(seconds=i), ["AAPL"], [float(i)])
+
+    times, values = hist.last(3)
+    assert values[:, 0].tolist() == [7.0, 8.0, 9.0]
+    assert np.shares_memory(values, hist._values)
+    assert len(hist) == 4
+    assert hist.last()[1][:, 0].tolist() == [6.0, 7.0, 8.0, 9.0]
+
+
+def test_memory_is_bounded_by_capacity() -> None:
+    hist = RingHistory(capacity=8)
+    hist.append(T0, ["A", "B"], [1.0, 2.0])
+    size = hist.nbytes
+    for i in range(1000):
+        hist.append(T0 + timedelta(seconds=i), ["A", "B"], [1.0, 2.0])
+    assert hist.nbytes == size
+
+
+def test_frame_marks_missing_series_as_nan() -> None:
+    hist = RingHistory(capacity=5)
+    hist.append(T0, ["A"], [1.0])
+    hist.append(T0 + timedelta(seconds=1), ["A", "B"], [2.0, 3.0])
+    df = hist.frame()
+    assert df.columns.tolist() == ["A", "B"]
+    assert df["A"].tolist() == [1.0, 2.0]
+    assert np.isnan(df["B"].iloc[0])
+    assert hist.frame(names=["B"]).columns.tolist() == ["B"]
+
+
+def test_capacity_must_be_positive() -> None:
+    with pytest.raises(ValueError):
+        RingHistory(capacity=0)
+
+
+def test_drop_series_frees_columns_and_keeps_the_rest() -> None:
+    hist = RingHistory(capacity=4)
+    for i in range(6):
+        hist.append(T0 + timedelta(seconds=i), ["A", "B", "C"], [float(i), 10.0 + i, 20.0 + i])
+    size = hist.nbytes
+
+    hist.drop_series(["B", "missing"])
+    assert hist.series == ["A", "C"]
+    assert hist.index == {"A": 0, "C": 1}
+    assert hist.nbytes < size
+    assert hist.frame()["C"].tolist() == [22.0, 23.0, 24.0, 25.0]
+
+    hist.append(T0 + timedelta(seconds=6), ["B"], [99.0])
+    assert hist.series == ["A", "C", "B"]
+    assert np.isnan(hist.frame()["B"].iloc[0])
+
+
+def test_snapshot_shares_the_buffer_and_drops_rows_overwritten_later() -> None:
+    hist = RingHistory(capacity=4, series=["A"])
+    for i in range(6):
+        hist.append(T0 + timedelta(seconds=i), ["A"], [float(i)])
+    snap = hist.snapshot()
+    assert snap.values_buffer is hist._values
+    assert snap.frame()["A"].tolist() == [2.0, 3.0, 4.0, 5.0]
+
+    # 之后又写了 1 行：快照里最旧的一行已被覆盖，其余行不受影响
+    hist.append(T0 + timedelta(seconds=6), ["A"], [6.0])
+    assert snap.frame()["A"].tolist() == [3.0, 4.0, 5.0]
+    assert snap.frame(2, ["A"])["A"].tolist() == [4.0, 5.0]
+    assert snap.points_since(1) == 2
+
+    # 新增序列换了底层数组，快照仍读旧数组；写满一圈后快照里就没有完整的行了
+    hist.append(T0 + timedelta(seconds=7), ["A", "B"], [7.0, 1.0])
+    assert snap.series == ("A",)
+    assert snap.frame(2)["A"].tolist() == [4.0, 5.0]
+    for i in range(8, 12):
+        hist.append(T0 + timedelta(seconds=i), ["A"], [float(i)])
+    assert len(snap.times) == 0
+    assert hist.snapshot().frame()["A"].tolist() == [8.0, 9.0, 10.0, 11.0]
@@ -0,0 +1,56 @@
+import pathlib
+import sys
+
+import numpy as np
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from market_engine import PRICE_FLOOR, MarketEngine  # noqa: E402
+
+
+def test_seeded_engines_are_reproducible() -> None:
+    symbols = ["AAPL", "BTC-USD", "ETH-USD"]
+    a, b = MarketEngine(seed=7), MarketEngine(seed=7)
+    for _ in range(5):
+        a.step(symbols)
+        b.step(symbols)
+    assert np.array_equal(a.prices, b.prices)
+    assert np.array_equal(a.volumes, b.volumes)
+
+
+def test_step_only_moves_requested_symbols() -> None:
+    engine = MarketEngine(seed=1)
+    engine.ensure(["AAPL", "MSFT"])
+    before = engine.prices.copy()
+    idx = engine.step(["MSFT"])
+    assert idx.tolist() == [1]
+    assert engine.prices[0] == before[0]
+    assert engine.prices[1] != before[1]
+
+
+def test_thousands_of_symbols_per_tick() -> None:
+    symbols = [f"SYM{i}" for i in range(5000)]
+    engine = MarketEngine(seed=3)
+    idx = engine.step(symbols)
+    rows = engine.rows(idx, ts="09:30:00")
+    assert len(rows) == 5000
+    assert rows[0]["symbol"] == "SYM0"
+    assert (engine.prices >= PRICE_FLOOR).all()
+    btc = MarketEngine(seed=3)
+    btc.ensure(["BTC-USD"])
+    assert btc.prices[0] >= 38000
+
+
+def test_drop_keeps_the_state_of_remaining_symbols() -> None:
+    engine = MarketEngine(seed=5)
+    engine.step(["AAPL", "MSFT", "TSLA"])
+    tsla = engine.prices[2]
+
+    engine.drop(["MSFT", "UNKNOWN"])
+    assert engine.symbols == ["AAPL", "TSLA"]
+    assert len(engine.prices) == len(engine.opens) == len(engine.volumes) == 2
+    assert engine.prices[engine.index["TSLA"]] == tsla
+    assert engine.step(["MSFT"]).tolist() == [2]
@@ -0,0 +1,67 @@
+import pathlib
+import sys
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from resilience import CircuitBreaker, StaleWhileRevalidateCache  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_breaker_opens_then_recovers_through_half_open_probe() -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert not breaker.try_probe()
+
+    clock.now = 10
+    assert breaker.try_probe()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.try_probe()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 20
+    assert breaker.try_probe()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_cache_serves_stale_until_max_stale() -> None:
+    clock = FakeClock()
+    cache = StaleWhileRevalidateCache(ttl=2, max_stale=30, clock=clock)
+    assert cache.get("k") is None
+
+    cache.put("k", [1])
+    assert cache.get("k") == ([1], True)
+    clock.now = 5
+    assert cache.get("k") == ([1], False)
+    clock.now = 31
+    assert cache.get("k") is None
+
+    assert (cache.hits, cache.stale_hits, cache.misses) == (2, 1, 2)
+    assert cache.hit_rate == 0.5
+
+
+def test_cache_allows_one_refresh_per_key() -> None:
+    cache = StaleWhileRevalidateCache()
+    assert cache.begin_refresh("k")
+    assert not cache.begin_refresh("k")
+    cache.end_refresh("k")
+    assert cache.begin_refresh("k")
@@ -0,0 +1,111 @@
+import pathlib
+import sys
+import threading
+
+import pytest
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from data_fetcher import DataFetcher  # noqa: E402
+from shared_feed import FeedPool, FeedSnapshot, SharedFeed  # noqa: E402
+
+
+@pytest.fixture
+def feed():
+    fetcher = DataFetcher(max_workers=1)
+    yield SharedFeed(fetcher, history_points=10, seed=11)
+    fetcher.close()
+
+
+def test_tick_publishes_snapshot_for_union_of_subscriptions(feed) -> None:
+    assert feed.subscribe(["AAPL", "NVDA"], ["AI"])
+    assert feed.subscribe(["TSLA"], ["AI"])
+    assert not feed.subscribe(["AAPL"], ["AI"])
+
+    snap = feed.tick()
+    assert snap.covers(["AAPL", "NVDA", "TSLA"], ["AI"])
+    assert snap.market_for(["TSLA"])["symbol"].tolist() == ["TSLA"]
+    assert snap.sources == {"market": "simulated", "sentiment": "simulated"}
+    assert feed.latest() is snap
+
+
+def test_snapshot_history_is_read_only_and_bounded(feed) -> None:
+    feed.subscribe(["AAPL"], ["AI"])
+    for _ in range(25):
+        snap = feed.tick()
+
+    assert snap.version == 25
+    assert len(snap.market_history.times) == 10
+    with pytest.raises(ValueError):
+        snap.market_history.values[0, 0] = 1.0
+    assert snap.market_history.frame(5, ["AAPL"]).shape == (5, 1)
+
+
+def test_idle_subscriptions_leave_the_poll_set(feed) -> None:
+    feed.subscription_ttl = 0.0
+    feed.subscribe(["AAPL"], ["AI"])
+    snap = feed.tick()
+    assert snap.market_df.empty
+
+
+def test_expired_series_are_dropped_from_history_and_engines(feed) -> None:
+    feed.subscribe(["AAPL", "NVDA"], ["AI", "EV"])
+    feed.tick()
+    assert feed.market_history.series == ["AAPL", "NVDA"]
+
+    # 只有 NVDA / EV 还在被读取
+    feed._symbols["AAPL"] = feed._topics["AI"] = float("-inf")
+    feed.subscribe(["NVDA"], ["EV"])
+    snap = feed.tick()
+
+    assert snap.market_df["symbol"].tolist() == ["NVDA"]
+    assert feed.market_history.series == ["NVDA"]
+    assert feed.sentiment_history.series == ["EV"]
+    assert feed.market_engine.symbols == ["NVDA"]
+    assert feed.sentiment_engine.topics == ["EV"]
+    assert snap.market_history.frame(2, ["NVDA"]).notna().all().all()
+
+
+def test_empty_snapshot_renders_without_data() -> None:
+    snap = FeedSnapshot.empty()
+    assert snap.version == 0
+    assert snap.market_for(["AAPL"]).empty and snap.sentiment_for(["AI"]).empty
+    assert snap.market_history.points_since(None) == 0
+    assert not snap.covers(["AAPL"], [])
+
+
+def test_ticks_from_several_threads_do_not_interleave(feed) -> None:
+    feed.subscribe(["AAPL", "NVDA"], ["AI"])
+    threads = [threading.Thread(target=lambda: [feed.tick() for _ in range(20)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    snap = feed.latest()
+    assert snap.version == 80
+    assert feed.market_history.appended == 80
+    assert snap.market_history.frame(10, ["AAPL", "NVDA"]).notna().all().all()
+
+
+def test_feed_pool_bounds_and_stops_evicted_feeds() -> None:
+    fetcher = DataFetcher(max_workers=1)
+    pool = FeedPool(lambda m, s: SharedFeed(fetcher, market_api=m, sentiment_api=s, interval=0.05), max_feeds=2)
+    try:
+        first = pool.get("http://a", "")
+        assert pool.get(" http://a ", "") is first
+        second = pool.get("http://b", "")
+        pool.get("http://a", "")  # a 最近用过，挤出的是 b
+        third = pool.get("http://c", "")
+
+        assert len(pool) == 2
+        assert not second._thread.is_alive()
+        assert first._thread.is_alive() and third._thread.is_alive()
+        assert pool.get("http://b", "") is not second
+    finally:
+        pool.close()
+        fetcher.close()
+    assert not first._thread.is_alive() and not third._thread.is_alive()
@@ -0,0 +1,61 @@
+import pathlib
+import sys
+
+import pandas as pd
+
+
+ROOT = pathlib.Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from signals import SignalIndex, SymbolMatcher  # noqa: E402
+
+
+def test_matcher_finds_overlapping_symbols_case_insensitively() -> None:
+    matcher = SymbolMatcher(["BTC", "BTC-USD", "TC", "NVDA"])
+
+    matches = matcher.find_all("看看 btc-usd 和 nvda")
+
+    assert matches == [(3, "BTC-USD"), (3, "BTC"), (4, "TC"), (13, "NVDA")]
+    assert matcher.first("Is NVDA or btc better?") == "NVDA"
+    assert matcher.first("no symbols here") is None
+
+
+def test_signal_index_orders_top_k_without_full_sort() -> None:
+    market = pd.DataFrame(
+        {
+            "symbol": ["A", "B", "C", "D"],
+            "price": [10.0, 20.0, 30.0, 40.0],
+            "change_pct": [1.5, -3.0, 0.2, 2.5],
+            "volume": [1, 2, 3, 4],
+        }
+    )
+    sentiment = pd.DataFrame(
+        {
+            "topic": ["x", "y", "z"],
+            "score": [0.1, -0.8, 0.5],
+            "mentions": [300, 100, 900],
+            "label": ["中性", "偏空", "偏多"],
+        }
+    )
+
+    signals = SignalIndex.build(market, sentiment, k=2)
+
+    assert [r["symbol"] for r in signals.gainers] == ["D", "A"]
+    assert [r["symbol"] for r in signals.losers] == ["B", "C"]
+    assert [r["symbol"] for r in signals.movers] == ["B", "D"]
+    assert [r["topic"] for r in signals.sentiment_extremes] == ["y", "z"]
+    assert signals.hot_topics[0]["topic"] == "z"
+    assert signals.mentioned("看一下 c 的走势")["price"] == 30.0
+
+
+def test_signal_index_on_empty_frames() -> None:
+    market = pd.DataFrame(columns=["symbol", "price", "change_pct", "volume", "time"])
+    sentiment = pd.DataFrame(columns=["topic", "score", "mentions", "label", "time"])
+
+    signals = SignalIndex.build(market, sentiment)
+
+    assert signals.gainers == signals.losers == signals.movers == ()
+    assert signals.sentiment_extremes == signals.hot_topics == ()
+    assert signals.rows == {}
+    assert signals.mentioned("NVDA 怎么样") is None